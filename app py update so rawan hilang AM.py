@@ -1,24 +1,28 @@
 import streamlit as st
 import pandas as pd
-import cloudinary
-import cloudinary.uploader
-import cloudinary.api
 import io
-import requests
 import time
 import json
 from datetime import datetime, timedelta
+from rekap_engine import gabung_rekap, unduh_semua_hasil
+from tabel import tampilkan_tabel_halaman
+from pembersih import bersihkan_prefix, hapus_massal
+from progres import ProgresToko, kode_dari_hasil
+from cache_kunci import cache_kunci, clear_semua
+from json_store import AntrianTulis, DocStore, LogAktivitas
+from storage import buat_penyimpanan, folder_lokal
 
 # =================================================================
 # 1. KONFIGURASI & HIDE UI
 # =================================================================
+@st.cache_resource(show_spinner=False)
+def get_storage():
+    # Semua I/O file lewat sini. STORAGE_LOKAL=<folder> -> filesystem lokal (benchmark / offline)
+    if folder_lokal(): return buat_penyimpanan()
+    return buat_penyimpanan({k: st.secrets[k] for k in ("cloud_name", "api_key", "api_secret")})
+
 try:
-    cloudinary.config( 
-      cloud_name = st.secrets["cloud_name"], 
-      api_key = st.secrets["api_key"], 
-      api_secret = st.secrets["api_secret"],
-      secure = True
-    )
+    get_storage()
 except:
     st.error("Konfigurasi Secrets Cloudinary tidak ditemukan!")
 
@@ -37,7 +41,14 @@ st.markdown("""
 # 2. FUNGSI DATABASE & LOGS
 # =================================================================
 USER_DB_PATH = "so_rawan_hilang/config/users.json"
-LOG_DB_PATH = "so_rawan_hilang/config/access_logs.json"
+LOG_DB_PATH = "so_rawan_hilang/config/access_logs.json" # Arsip lama (read-only)
+LOG_SHARD_FOLDER = "so_rawan_hilang/config/access_log_area"
+REKAP_MAX_WORKERS = 8 # Batas download paralel saat gabung rekap
+HAPUS_MAX_WORKERS = 4 # Batas batch delete_resources yang jalan bersamaan
+HASIL_PREFIX = "so_rawan_hilang/hasil/Hasil_"
+PROGRES_DETIK = 60 # Dokumen progres dipakai tanpa cek version selama ini (HOME dibuka semua user tiap rerun)
+REKONSILIASI_DETIK = 600 # Dokumen progres dicocokkan ulang dengan listing Hasil_ paling cepat tiap 10 menit
+PROGRES_PREFIX = "so_rawan_hilang/config/progres_v" # {PROGRES_PREFIX}{versi master}.json = kode toko yang sudah submit
 
 def get_now_wita():
     return datetime.utcnow() + timedelta(hours=8)
@@ -49,106 +60,121 @@ def get_indonesia_date():
 
 def load_json_db(path):
     try:
-        url = f"https://res.cloudinary.com/{st.secrets['cloud_name']}/raw/upload/v1/{path}"
-        resp = requests.get(url, timeout=10)
-        return resp.json() if resp.status_code == 200 else {}
+        storage = get_storage()
+        return json.loads(storage.unduh(storage.url(path, "raw")))
     except: return {}
 
 def save_json_db(path, db_dict):
     try:
         json_data = json.dumps(db_dict)
-        cloudinary.uploader.upload(io.BytesIO(json_data.encode()), resource_type="raw", public_id=path, overwrite=True, invalidate=True)
+        get_storage().simpan(json_data.encode(), path, "raw", invalidate=True)
         return True
     except: return False
 
+def hapus_raw(public_ids):
+    # Lewat pembersih (batch 100 id, paralel terbatas) seperti pembersihan Hasil_
+    return hapus_massal(get_storage(), list(public_ids), "raw", max_workers=HAPUS_MAX_WORKERS)
+
+def arsip_log_lama():
+    # Format lama {nik: {tanggal: hits}} -> {tanggal: {nik: hits}}. None = file lama tidak ada, error baca diteruskan
+    lama = get_doc_store().muat(LOG_DB_PATH)
+    if lama is None: return None
+    hasil = {}
+    for nik, per_tgl in lama.items():
+        for tgl, hits in per_tgl.items(): hasil.setdefault(tgl, {})[nik] = hits
+    return hasil
+
+@st.cache_resource(show_spinner=False)
+def get_doc_store():
+    # Dipakai bersama semua sesi, isi JSON di-cache per version. Tulis = compare-and-swap per version
+    storage = get_storage()
+    return DocStore(storage.meta, storage.unduh, storage.simpan_jika_versi)
+
+@st.cache_resource(show_spinner=False)
+def get_log_akses():
+    return LogAktivitas(get_doc_store(), LOG_SHARD_FOLDER, get_storage().daftar_semua, hapus_raw, arsip=arsip_log_lama)
+
+@st.cache_resource(show_spinner=False)
+def get_antrian_log():
+    # Satu worker latar untuk semua sesi: hit login ditulis per batch
+    # Kompaksi log ikut dicek tiap putaran worker, tidak menunggu admin membuka tab monitoring
+    return AntrianTulis(lambda batch: get_log_akses().catat_banyak(batch),
+                        berkala=lambda: get_log_akses().kompaksi_jika_perlu(str(get_now_wita().date())))
+
 def record_login_hit(nik):
-    db_logs = load_json_db(LOG_DB_PATH)
-    today = get_now_wita().strftime('%Y-%m-%d')
-    if nik not in db_logs: db_logs[nik] = {}
-    db_logs[nik][today] = db_logs[nik].get(today, 0) + 1
-    save_json_db(LOG_DB_PATH, db_logs)
+    get_antrian_log().kirim((nik, get_now_wita()))
 
 # =================================================================
 # 3. FUNGSI OLAH DATA & DASHBOARD
 # =================================================================
 
-@st.cache_data(ttl=60) # Dikurangi ke 1 menit agar lebih responsif setelah upload
+@cache_kunci(lambda: "master", ttl=60, salin=True) # Dikurangi ke 1 menit agar lebih responsif setelah upload
 def get_master_info():
     try:
         p_id = "so_rawan_hilang/master_utama.xlsx"
-        res = cloudinary.api.resource(p_id, resource_type="raw", cache_control="no-cache")
+        storage = get_storage()
+        res = storage.meta(p_id, "raw")
         v_id = str(res.get('version', '1'))
-        url = f"https://res.cloudinary.com/{st.secrets['cloud_name']}/raw/upload/v{v_id}/{p_id}"
-        resp = requests.get(url, timeout=10)
-        if resp.status_code == 200:
-            df = pd.read_excel(io.BytesIO(resp.content))
-            df.columns = [str(c).strip() for c in df.columns]
-            return df, v_id
+        df = pd.read_excel(io.BytesIO(storage.unduh(res['secure_url'])))
+        df.columns = [str(c).strip() for c in df.columns]
+        return df, v_id
     except: return None, None
     return None, None
 
 def load_user_save(toko_id, v_id):
     try:
         p_id = f"so_rawan_hilang/hasil/Hasil_{toko_id}_v{v_id}.xlsx"
-        url = f"https://res.cloudinary.com/{st.secrets['cloud_name']}/raw/upload/v1/{p_id}"
-        resp = requests.get(url, timeout=10)
-        if resp.status_code == 200:
-            df = pd.read_excel(io.BytesIO(resp.content))
-            df.columns = [str(c).strip() for c in df.columns]
-            return df
+        storage = get_storage()
+        df = pd.read_excel(io.BytesIO(storage.unduh(storage.url(p_id, "raw"))))
+        df.columns = [str(c).strip() for c in df.columns]
+        return df
     except: return None
 
-@st.cache_data(ttl=60)
+def muat_kode_terkirim(m_ver):
+    """Kode toko yang sudah submit untuk versi master ini (dokumen progres, dibuat dari listing 1x saja)"""
+    store, p_id = get_doc_store(), f"{PROGRES_PREFIX}{m_ver}.json"
+    kode = store.muat(p_id, umur=PROGRES_DETIK)
+    if kode is None:
+        # Belum ada dokumen progres (versi master dari sebelum fitur ini) -> isi dari listing Hasil_
+        dari_listing = {kode_dari_hasil(r['public_id']) for r in get_storage().daftar_semua(HASIL_PREFIX) if f"_v{m_ver}" in r['public_id']}
+        kode = store.update(p_id, lambda d: sorted(set(d) | dari_listing), default=[])
+    return kode
+
+def catat_toko_terkirim(m_ver, toko_code):
+    muat_kode_terkirim(m_ver)
+    get_doc_store().update(f"{PROGRES_PREFIX}{m_ver}.json", lambda d: d if toko_code in d else d + [toko_code], default=[])
+
+@cache_kunci(lambda m_ver: m_ver, ttl=REKONSILIASI_DETIK, max_entries=2)
+def rekonsiliasi_progres(m_ver):
+    """Tambahkan toko yang file Hasil_-nya ada tapi tidak tercatat (update delta gagal). Return jumlah toko baru / None jika gagal"""
+    try:
+        dari_listing = {kode_dari_hasil(r['public_id']) for r in get_storage().daftar_semua(HASIL_PREFIX) if f"_v{m_ver}" in r['public_id']}
+        sebelum = set(muat_kode_terkirim(m_ver))
+        if dari_listing <= sebelum: return 0
+        get_doc_store().update(f"{PROGRES_PREFIX}{m_ver}.json", lambda d: sorted(set(d) | dari_listing), default=[])
+        return len(dari_listing - sebelum)
+    except Exception: return None # Dicoba lagi setelah TTL, bukan tiap rerun
+
+@cache_kunci(lambda m_ver, df_master: m_ver, max_entries=2) # df_master tidak di-hash
+def get_progres_toko(m_ver, df_master):
+    return ProgresToko(df_master)
+
 def get_progress_rankings(m_ver, df_master):
     try:
-        submitted_codes = set()
-        next_cursor = None
-        while True:
-            res = cloudinary.api.resources(resource_type="raw", type="upload", prefix="so_rawan_hilang/hasil/Hasil_", max_results=500, next_cursor=next_cursor)
-            for r in res.get('resources', []):
-                if f"_v{m_ver}" in r['public_id']:
-                    code = r['public_id'].split('Hasil_')[-1].split('_v')[0]
-                    submitted_codes.add(code)
-            next_cursor = res.get('next_cursor')
-            if not next_cursor: break
-        
-        # Cari kolom AM & AS secara fleksibel (tidak peduli huruf besar/kecil)
-        col_am = next((c for c in df_master.columns if c.lower() == 'am'), None)
-        col_as = next((c for c in df_master.columns if c.lower() == 'as'), None)
-        
-        if not col_am or not col_as:
-            return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
-
-        df_stores = df_master[[df_master.columns[0], df_master.columns[1], col_am, col_as]].drop_duplicates()
-        df_stores.columns = ['Kode', 'Nama', 'AM', 'AS']
-        df_stores['Status'] = df_stores['Kode'].astype(str).apply(lambda x: 1 if x in submitted_codes else 0)
-        
-        # SUMMARY AM - Urut Terjelek (Ascending)
-        am_sum = df_stores.groupby('AM').agg(Target=('Kode', 'count'), Sudah=('Status', 'sum')).reset_index()
-        am_sum['Belum'] = am_sum['Target'] - am_sum['Sudah']
-        am_sum['Progres'] = (am_sum['Sudah'] / am_sum['Target']) * 100
-        am_sum.columns = ['AM', 'Target Toko SO', 'Sudah Input', 'Belum Input', 'Progres']
-        am_sum = am_sum.sort_values(by=['Progres', 'Target Toko SO'], ascending=[True, False])
-
-        # SUMMARY AS - Urut Terjelek (Ascending)
-        as_sum = df_stores.groupby('AS').agg(Target=('Kode', 'count'), Sudah=('Status', 'sum')).reset_index()
-        as_sum['Belum'] = as_sum['Target'] - as_sum['Sudah']
-        as_sum['Progres'] = (as_sum['Sudah'] / as_sum['Target']) * 100
-        as_sum.columns = ['AS', 'Target Toko SO', 'Sudah Input', 'Belum Input', 'Progres']
-        as_sum = as_sum.sort_values(by=['Progres', 'Target Toko SO'], ascending=[True, False])
-        
-        return df_stores, am_sum, as_sum
+        progres = get_progres_toko(m_ver, df_master)
+        rekonsiliasi_progres(m_ver) # Sesekali saja (TTL), menutup update delta yang gagal
+        progres.sinkron(muat_kode_terkirim(m_ver)) # Hanya toko baru yang diproses
+        return progres.ringkasan()
     except: return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
 
-def delete_old_reports(current_ver):
+def delete_old_reports(current_ver, dry_run=False, progress_cb=None):
+    """Hapus semua Hasil_ selain versi master aktif (100 file per panggilan, beberapa batch paralel)"""
     try:
-        res = cloudinary.api.resources(resource_type="raw", type="upload", prefix="so_rawan_hilang/hasil/Hasil_", max_results=500)
-        deleted_count = 0
-        for r in res.get('resources', []):
-            if f"_v{current_ver}" not in r['public_id']:
-                cloudinary.uploader.destroy(r['public_id'], resource_type="raw")
-                deleted_count += 1
-        return True, deleted_count
+        target, laporan = bersihkan_prefix(
+            get_storage(), HASIL_PREFIX, simpan=lambda pid: f"_v{current_ver}" in pid,
+            dry_run=dry_run, max_workers=HAPUS_MAX_WORKERS, progress_cb=progress_cb
+        )
+        return True, (target, laporan)
     except Exception as e: return False, str(e)
 
 # =================================================================
@@ -158,10 +184,23 @@ def delete_old_reports(current_ver):
 @st.dialog("🗑️ Bersihkan Data Lama")
 def confirm_delete_old_data(v_now):
     st.error("⚠️ Semua hasil input periode SEBELUMNYA akan dihapus permanen.")
+    ok, cek = delete_old_reports(v_now, dry_run=True)
+    if not ok: st.error(f"Gagal: {cek}"); return
+    if not cek[0]: st.info("Tidak ada file lama."); return
+    st.write(f"**{len(cek[0])}** file akan dihapus.")
     if st.button("IYA, Hapus Sekarang", type="primary", use_container_width=True):
-        success, result = delete_old_reports(v_now)
+        bar = st.progress(0.0, text="Menghapus...")
+        success, result = delete_old_reports(v_now, progress_cb=lambda i, n: bar.progress(i / n, text=f"Batch {i}/{n}"))
         if success:
-            st.success(f"✅ Berhasil menghapus {result} file!"); time.sleep(2); st.rerun()
+            _, lap = result
+            waktu = [dt for _, dt, err in lap["batch"] if err is None]
+            st.caption(f"{len(lap['batch'])} batch dalam {lap['detik']:.1f} detik" + (f" (per batch {min(waktu):.1f}-{max(waktu):.1f} detik)" if waktu else ""))
+            if lap["gagal"]:
+                st.warning(f"{lap['dihapus']} file terhapus, {len(lap['gagal'])} gagal. Jalankan lagi untuk mengulang sisanya.")
+                with st.expander("Detail gagal"):
+                    for pid, err in list(lap["gagal"].items())[:50]: st.caption(f"{pid}: {err}")
+            else:
+                st.success(f"✅ Berhasil menghapus {lap['dihapus']} file!"); time.sleep(2); st.rerun()
         else: st.error(f"Gagal: {result}")
 
 @st.dialog("⚠️ Konfirmasi Publish")
@@ -169,8 +208,8 @@ def confirm_admin_publish(file_obj):
     st.warning("Publish Master baru akan mereset progres toko hari ini.")
     if st.button("IYA, Publish Sekarang", type="primary", use_container_width=True):
         try:
-            cloudinary.uploader.upload(file_obj, resource_type="raw", public_id="so_rawan_hilang/master_utama.xlsx", overwrite=True, invalidate=True)
-            st.cache_data.clear() # Paksa dashboard update
+            get_storage().simpan(file_obj, "so_rawan_hilang/master_utama.xlsx", "raw", invalidate=True)
+            st.cache_data.clear(); clear_semua() # Paksa dashboard update
             st.success("✅ Master Terbit!"); time.sleep(2); st.rerun()
         except Exception as e: st.error(f"Gagal: {e}")
 
@@ -181,8 +220,14 @@ def confirm_user_submit(data_full, toko_code, v_id):
         with pd.ExcelWriter(buf, engine='openpyxl') as w: data_full.to_excel(w, index=False)
         try:
             p_id = f"so_rawan_hilang/hasil/Hasil_{toko_code}_v{v_id}.xlsx"
-            cloudinary.uploader.upload(buf.getvalue(), resource_type="raw", public_id=p_id, overwrite=True, invalidate=True)
-            st.success("✅ Tersimpan!"); time.sleep(1.5); st.rerun()
+            get_storage().simpan(buf.getvalue(), p_id, "raw", invalidate=True)
+            st.success("✅ Tersimpan!")
+            try: catat_toko_terkirim(v_id, toko_code); jeda = 1.5
+            except Exception as e:
+                # File sudah tersimpan: progres dicocokkan ulang dari listing pada view dashboard berikutnya
+                rekonsiliasi_progres.clear()
+                st.warning(f"Progres dashboard belum ter-update ({e}), akan disinkronkan otomatis."); jeda = 4
+            time.sleep(jeda); st.rerun()
         except: st.error("Gagal!")
 
 @st.fragment
@@ -300,30 +345,45 @@ elif st.session_state.page == "ADMIN":
             m_df, m_ver = get_master_info()
             if m_df is not None:
                 if st.button("🔄 Gabung Data Seluruh Toko"):
-                    res = cloudinary.api.resources(resource_type="raw", type="upload", prefix="so_rawan_hilang/hasil/Hasil_", max_results=500)
-                    all_f = [r for r in res.get('resources', []) if f"_v{m_ver}" in r['public_id']]
-                    # Pencarian kolom kunci
-                    m_key = next((c for c in m_df.columns if c.lower() == 'prdcd'), m_df.columns[2])
-                    for r in all_f:
-                        s_df = pd.read_excel(r['secure_url']); s_df.columns = [str(c).strip() for c in s_df.columns]
-                        s_key = next((c for c in s_df.columns if c.lower() == 'prdcd'), s_df.columns[2])
-                        for _, row in s_df.iterrows():
-                            try:
-                                mask = (m_df[m_key].astype(str) == str(row[s_key])) & (m_df[m_df.columns[0]].astype(str) == str(row[s_df.columns[0]]))
-                                if mask.any(): m_df.loc[mask, s_df.columns] = row.values
-                            except: pass
+                    all_f = [r for r in get_storage().daftar_semua(HASIL_PREFIX) if f"_v{m_ver}" in r['public_id']]
+                    bar = st.progress(0.0, text="Mengunduh hasil toko...")
+                    def update_bar(n, total, nama): bar.progress(n / total, text=f"Mengunduh hasil toko... {n}/{total}")
+                    hasil_toko, gagal = unduh_semua_hasil(
+                        [(r['public_id'].split('/')[-1], r['secure_url']) for r in all_f],
+                        max_workers=REKAP_MAX_WORKERS, progress_cb=update_bar,
+                        unduh=get_storage().unduh # Session HTTP bersama (keep-alive) / file lokal
+                    )
+                    bar.empty()
+                    if gagal:
+                        with st.expander(f"⚠️ {len(gagal)} file gagal dibaca"):
+                            for nama, err in gagal.items(): st.caption(f"{nama}: {err}")
+                    list_hasil = list(hasil_toko.values())
+                    # Gabung sekaligus (kunci Toko + PRDCD), bukan per baris
+                    m_df = gabung_rekap(m_df, list_hasil)
                     buf = io.BytesIO()
                     with pd.ExcelWriter(buf) as w: m_df.to_excel(w, index=False)
                     st.download_button("📥 Download Rekap", buf.getvalue(), f"Rekap_{get_indonesia_date()}.xlsx")
             st.divider()
+            if st.button("🔁 Sinkron Progres dari File Hasil") and m_ver:
+                rekonsiliasi_progres.clear()
+                baru = rekonsiliasi_progres(m_ver)
+                if baru is None: st.error("Gagal membaca daftar file hasil.")
+                else: st.success(f"Progres sinkron, {baru} toko ditambahkan.")
             if st.button("🗑️ Hapus Inputan Lama"):
                 if m_ver: confirm_delete_old_data(m_ver)
 
         with t2:
-            logs = load_json_db(LOG_DB_PATH)
+            log_akses = get_log_akses()
+            hari_ini = get_now_wita().date()
+            rentang = st.date_input("Periode:", (hari_ini - timedelta(days=6), hari_ini), key="rentang_log_so")
+            tgl_awal, tgl_akhir = (rentang if len(rentang) == 2 else (rentang[0], rentang[0]))
+            get_antrian_log() # Pastikan worker latar (tulis log + kompaksi) sudah jalan
+            logs = log_akses.baca(str(tgl_awal), str(tgl_akhir))
+            if log_akses.error_arsip: st.warning(f"Log lama (sebelum migrasi) gagal dibaca, belum ikut dihitung: {log_akses.error_arsip}")
+            if log_akses.error_kompaksi: st.warning(f"Kompaksi log terakhir gagal (dicoba ulang otomatis): {log_akses.error_kompaksi}")
             if logs:
-                flat = [{"NIK": k, "Tanggal": t, "Hits": h} for k, d in logs.items() for t, h in d.items()]
-                st.dataframe(pd.DataFrame(flat).sort_values(by="Tanggal", ascending=False), hide_index=True, use_container_width=True)
+                flat = [{"NIK": k, "Tanggal": t, "Hits": h} for t, d in logs.items() for k, h in d.items()]
+                tampilkan_tabel_halaman(pd.DataFrame(flat).sort_values(by="Tanggal", ascending=False), "log_so", hide_index=True, use_container_width=True)
 
         with t3:
             r_nik = st.text_input("NIK reset:", max_chars=10); r_pw = st.text_input("PW Baru:", type="password")
@@ -1,16 +1,25 @@
 import streamlit as st
 import pandas as pd
-import cloudinary
-import cloudinary.uploader
-import cloudinary.api
-import cloudinary.utils
 import hashlib
-import requests
-import io
 import json
 import time
 import os
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from katalog import KatalogFile
+from tabel import IndexCari, format_ribuan_kolom, tampilkan_tabel_halaman
+from cache_kunci import cache_kunci, stats_semua
+from cari_rusak import IndexRusak
+from gambar import cek_foto, kecilkan_foto
+from http_client import klien as klien_http
+from instrumen import diukur, label_rerun, pantau_storage, pencatat, rerun, tahap
+from prefetch import Prefetcher, terbaru_per_folder
+from json_store import AntrianTulis, DataBulanan, DocStore, LogAktivitas
+from storage import buat_penyimpanan, folder_lokal
+from excel_engine import (
+    ambil_workbook, ambil_grid, daftar_sheet, susun_tabel, workbook_cache, sheet_cache, MAX_BARIS, MAX_KOLOM,
+    buat_sidecar, id_manifest, is_sidecar, sidecar_usang
+)
 
 # --- 1. KONFIGURASI HALAMAN ---
 st.set_page_config(
@@ -21,8 +30,10 @@ st.set_page_config(
 
 # --- 2. KONFIGURASI GLOBAL ---
 USER_DB_PATH = "Config/users_area.json"       
-LOG_DB_PATH = "Config/activity_log_area.json"
-RUSAK_PABRIK_DB = "Config/data_rusak_pabrik.json" 
+LOG_DB_PATH = "Config/activity_log_area.json" # Arsip lama (read-only)
+LOG_SHARD_FOLDER = "Config/activity_log_area"
+RUSAK_PABRIK_DB = "Config/data_rusak_pabrik.json" # Format lama (satu list), dipecah otomatis ke folder bulanan
+RUSAK_PABRIK_DB_FOLDER = "Config/rusak_pabrik"
 RUSAK_PABRIK_IMG_FOLDER = "Area/RusakPabrik/Foto"
 
 # --- 3. CSS & TEMA ---
@@ -89,6 +100,12 @@ DATA_CONTACT = {
     "AREA_RUSAK": [("Putu IC", "087850110155"), ("Dwi IC", "083114444424"), ("Gean IC", "087725860048")]
 }
 
+# Kata kunci kategori file (dipakai index katalog)
+KATEGORI_FILE = {
+    "Area/BarangRusak": {"Say Bread": ["say bread"], "Mr Bread": ["mr bread"], "Fried Chicken": ["fried chicken"], "Onigiri": ["onigiri"], "DRY": ["dry"]},
+    "Area/Intransit": {"NRB Intransit": ["nrb"], "BPB/TAT Intransit": ["bpb", "tat"]}
+}
+
 VIEWER_CREDENTIALS = {
     "INTERNAL_IC": {"user": "ic_bli", "pass": "123456"},
     "DC": {"user": "ic_dc", "pass": "123456"}
@@ -96,94 +113,128 @@ VIEWER_CREDENTIALS = {
 
 # --- 5. SYSTEM FUNCTIONS ---
 def init_cloudinary():
+    if folder_lokal(): return # STORAGE_LOKAL diisi -> semua file di folder lokal, tanpa Cloudinary
     if "cloudinary" not in st.secrets:
         st.error("⚠️ Kunci Cloudinary belum dipasang!")
         st.stop()
-    cloudinary.config(
-        cloud_name=st.secrets["cloudinary"]["cloud_name"],
-        api_key=st.secrets["cloudinary"]["api_key"],
-        api_secret=st.secrets["cloudinary"]["api_secret"],
-        secure=True
-    )
-
-@st.cache_data(ttl=600, show_spinner=False) 
+
+@st.cache_resource(show_spinner=False)
+def get_storage():
+    # Semua I/O file lewat sini (Cloudinary, atau folder lokal untuk benchmark / offline)
+    # Tiap operasi tercatat sebagai tahap storage.* di panel Performance
+    if folder_lokal(): return pantau_storage(buat_penyimpanan())
+    return pantau_storage(buat_penyimpanan({k: st.secrets["cloudinary"][k] for k in ("cloud_name", "api_key", "api_secret")}))
+
+@st.cache_resource(show_spinner=False)
+def get_katalog():
+    # Satu katalog dipakai bersama semua sesi
+    ambil = lambda **kw: get_storage().daftar(kw.get("prefix", ""), "raw", next_cursor=kw.get("next_cursor"))
+    return KatalogFile(ambil, KATEGORI_FILE, ttl=600)
+
+@diukur()
 def get_all_files_cached():
-    try:
-        raw = cloudinary.api.resources(resource_type="raw", type="upload", max_results=500)
-        return raw.get('resources', [])
-    except:
-        return []
+    return get_katalog().pastikan_segar()
 
+@diukur()
 def upload_file(file_upload, folder_path):
     public_id_path = f"{folder_path}/{file_upload.name}"
-    res = cloudinary.uploader.upload(file_upload, resource_type="raw", public_id=public_id_path, overwrite=True)
+    res = get_storage().simpan(file_upload, public_id_path, "raw")
     return res
 
+@diukur()
+def ingest_excel(blob, res_xlsx):
+    """Simpan sidecar Parquet + manifest di folder yang sama. Return (list resource terupload, list public_id sidecar lama yang dihapus)"""
+    storage, p_xlsx = get_storage(), res_xlsx['public_id']
+    manifest, files = buat_sidecar(blob, p_xlsx)
+    hasil = []
+    for p_id, isi in files:
+        hasil.append(storage.simpan(isi, p_id, "raw"))
+    if files:
+        manifest["xlsx_version"] = str(res_xlsx.get('version', ''))
+        hasil.append(storage.simpan(json.dumps(manifest).encode('utf-8'), id_manifest(p_xlsx), "raw"))
+    # File di-overwrite dengan sheet lebih sedikit: sidecar index lama yang tidak ada di manifest baru ikut dihapus
+    ada = [r['public_id'] for r in storage.daftar_semua(f"{p_xlsx}.", "raw")]
+    usang = sidecar_usang(p_xlsx, manifest if files else None, ada)
+    if usang: storage.hapus(usang, "raw")
+    return hasil, usang
+
+@diukur()
 def upload_image_error(image_file):
-    res = cloudinary.uploader.upload(image_file, folder="ReportError", resource_type="image")
+    res = get_storage().simpan(image_file, folder="ReportError", resource_type="image")
     return res
 
 def hapus_file(public_id, res_type="raw"):
     try:
-        cloudinary.api.delete_resources([public_id], resource_type=res_type, type="upload")
+        get_storage().hapus([public_id], res_type)
         return True
     except:
         return False
 
 # --- FUNGSI DATABASE (REALTIME) ---
+@st.cache_resource(show_spinner=False)
+def get_doc_store():
+    # Dipakai bersama semua sesi, isi JSON di-cache per version Cloudinary
+    # Cloudinary tidak punya upload bersyarat: simpan_jika_versi cek version tepat sebelum upload
+    storage = get_storage()
+    return DocStore(storage.meta, storage.unduh, storage.simpan_jika_versi)
+
+@diukur()
 def get_json_fresh(public_id):
-    """Mengambil file JSON terbaru dengan bypass cache"""
-    try:
-        resource = cloudinary.api.resource(public_id, resource_type="raw")
-        url = resource.get('secure_url')
-        if url:
-            url_no_cache = f"{url}?t={int(time.time())}"
-            resp = requests.get(url_no_cache)
-            if resp.status_code == 200:
-                return resp.json()
-        return {}
-    except:
-        return {}
+    """Mengambil file JSON terbaru (cek version, download hanya jika berubah)"""
+    return get_doc_store().get(public_id, {})
+
+def get_json_wajib(public_id):
+    """Seperti get_json_fresh, tapi error baca diteruskan (bukan {}). {} hanya jika dokumen memang belum ada"""
+    data = get_doc_store().muat(public_id)
+    return {} if data is None else data
+
+def upload_json_to_cloud(public_id, mutasi, default=None):
+    """Baca -> mutasi(data) -> tulis jika version belum berubah, diulang dengan data terbaru jika bentrok"""
+    return get_doc_store().update(public_id, mutasi, default)
+
+def hapus_banyak_raw(public_ids):
+    get_storage().hapus(public_ids, "raw")
+
+@st.cache_resource(show_spinner=False)
+def get_log_aktivitas():
+    # Login ditulis ke shard per jam (kecil), dipadatkan ke dokumen harian oleh admin view
+    return LogAktivitas(get_doc_store(), LOG_SHARD_FOLDER, get_storage().daftar_semua, hapus_banyak_raw, arsip=lambda: get_doc_store().muat(LOG_DB_PATH))
 
-def upload_json_to_cloud(data_dict, public_id):
-    json_data = json.dumps(data_dict)
-    cloudinary.uploader.upload(
-        io.BytesIO(json_data.encode('utf-8')), 
-        resource_type="raw", 
-        public_id=public_id,
-        overwrite=True
-    )
+def get_now_wita():
+    return datetime.utcnow() + timedelta(hours=8)
+
+@st.cache_resource(show_spinner=False)
+def get_antrian_log():
+    # Satu worker latar untuk semua sesi: login dikumpulkan lalu ditulis per batch
+    # Kompaksi log ikut dicek tiap putaran worker, tidak menunggu admin membuka tab monitoring
+    return AntrianTulis(lambda batch: get_log_aktivitas().catat_banyak(batch),
+                        berkala=lambda: get_log_aktivitas().kompaksi_jika_perlu(str(get_now_wita().date())))
 
 def catat_login_activity(username):
-    try:
-        log_data = get_json_fresh(LOG_DB_PATH)
-        now = datetime.utcnow() + timedelta(hours=8)
-        tanggal_str = now.strftime("%Y-%m-%d")
-        
-        if tanggal_str not in log_data:
-            log_data[tanggal_str] = {}
-        
-        if username not in log_data[tanggal_str]:
-            log_data[tanggal_str][username] = 0
-            
-        log_data[tanggal_str][username] += 1
-        upload_json_to_cloud(log_data, LOG_DB_PATH)
-    except Exception as e: print(f"Log Error: {e}")
+    # Tidak menunggu upload, login langsung lanjut
+    get_antrian_log().kirim((username, get_now_wita()))
 
 def hash_password(password):
     return hashlib.sha256(str.encode(password)).hexdigest()
 
 # --- FUNGSI KHUSUS RUSAK PABRIK ---
+@st.cache_resource(show_spinner=False)
+def get_data_rusak():
+    # Satu dokumen per Bulan_Upload + index {bulan: jumlah}
+    return DataBulanan(get_doc_store(), RUSAK_PABRIK_DB_FOLDER, hapus_banyak_raw, lama=RUSAK_PABRIK_DB)
+
+@st.cache_resource(ttl=600, max_entries=4, show_spinner=False)
+def load_index_rusak(tanda):
+    # tanda = isi index bulanan {bulan: jumlah}, berubah tiap tambah/hapus -> index dibangun ulang
+    return IndexRusak(get_data_rusak().baca())
+
+@diukur()
 def simpan_data_rusak_pabrik(kode_toko, no_nrb, tgl_nrb, file_foto):
     try:
         # VALIDASI KODE TOKO (4 DIGIT ALPHANUMERIC)
         if len(kode_toko) != 4:
             return False, "⚠️ Gagal: Kode Toko harus tepat 4 karakter."
 
-        # Cek Ukuran File 2MB
-        if file_foto.size > 2 * 1024 * 1024:
-            return False, "⚠️ Gagal: Ukuran foto melebihi 2 MB. Silakan Screenshot dulu atau kompres."
-
         kode_clean = kode_toko.upper().replace(" ", "")
         nrb_clean = no_nrb.upper().replace(" ", "")
         tgl_str = tgl_nrb.strftime("%d%m%Y")
@@ -192,18 +243,15 @@ def simpan_data_rusak_pabrik(kode_toko, no_nrb, tgl_nrb, file_foto):
         nama_file_unik = f"{kode_clean}_{nrb_clean}_{tgl_str}"
         public_id = f"{RUSAK_PABRIK_IMG_FOLDER}/{folder_bulan}/{nama_file_unik}"
         
-        res = cloudinary.uploader.upload(
-            file_foto, 
-            resource_type="image", 
-            public_id=public_id,
-            overwrite=True,
-            transformation=[{'width': 800, 'crop': "limit"}, {'quality': "auto:eco"}, {'fetch_format': "auto"}]
-        )
-        url_foto = res.get('secure_url')
-
-        data_lama = get_json_fresh(RUSAK_PABRIK_DB)
-        if isinstance(data_lama, dict) and not data_lama: data_lama = [] 
-        
+        # Tolak file / resolusi berlebihan sebelum Pillow men-decode piksel
+        ok_foto, pesan_foto = cek_foto(file_foto)
+        if not ok_foto: return False, pesan_foto
+        # Foto dikecilkan ke 800px & JPEG di sini, jadi yang dikirim ke Cloudinary hanya puluhan KB
+        foto_kecil, _, _ = kecilkan_foto(file_foto)
+        # URL tanpa version sudah bisa disusun sebelum upload selesai -> DB tidak perlu menunggu.
+        # Upload memakai invalidate=True agar kirim ulang (toko/NRB/tanggal sama) tidak tertahan foto lama di CDN
+        url_foto = get_storage().url(public_id, "image")
+
         entry_baru = {
             "Input_Time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "Bulan_Upload": folder_bulan, 
@@ -213,62 +261,116 @@ def simpan_data_rusak_pabrik(kode_toko, no_nrb, tgl_nrb, file_foto):
             "Bukti_Foto": url_foto,
             "User_Input": st.session_state.get('area_user_name', 'Unknown')
         }
-        
-        data_lama.append(entry_baru)
-        upload_json_to_cloud(data_lama, RUSAK_PABRIK_DB)
+
+        data_rusak, storage = get_data_rusak(), get_storage()
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            f_foto = pool.submit(
+                storage.simpan,
+                foto_kecil,
+                public_id,
+                "image",
+                invalidate=True,
+                transformation=[{'width': 800, 'crop': "limit"}, {'quality': "auto:eco"}, {'fetch_format': "auto"}]
+            )
+            f_db = pool.submit(data_rusak.tambah, entry_baru)
+        err_foto, err_db = f_foto.exception(), f_db.exception()
+
+        # Rollback: jangan sisakan foto tanpa data, atau data tanpa foto
+        if err_foto and not err_db:
+            try: data_rusak.buang(entry_baru)
+            except Exception as e: print(f"Rollback DB gagal: {e}")
+        if err_db and not err_foto:
+            try: storage.hapus([public_id], "image", invalidate=True)
+            except Exception as e: print(f"Rollback foto gagal: {e}")
+        if err_foto or err_db:
+            return False, f"Error System: {err_foto or err_db}"
         return True, "✅ Data & Foto Berhasil Disimpan!"
     except Exception as e: return False, f"Error System: {e}"
 
 def hapus_data_bulan_tertentu(bulan_target):
     try:
         prefix_folder = f"{RUSAK_PABRIK_IMG_FOLDER}/{bulan_target}/"
-        cloudinary.api.delete_resources_by_prefix(prefix_folder, resource_type="image")
-        try: cloudinary.api.delete_folder(prefix_folder)
-        except: pass 
-
-        data_lama = get_json_fresh(RUSAK_PABRIK_DB)
-        if isinstance(data_lama, list):
-            data_baru = [d for d in data_lama if d.get('Bulan_Upload') != bulan_target]
-            upload_json_to_cloud(data_baru, RUSAK_PABRIK_DB)
-            
+        get_storage().hapus_prefix(prefix_folder, "image")
+
+        get_data_rusak().hapus_bulan(bulan_target)
+
         return True, f"Semua data bulan {bulan_target} berhasil dihapus permanen."
     except Exception as e:
         return False, f"Gagal menghapus: {e}"
 
 # --- EXCEL FUNCTIONS ---
-@st.cache_data(ttl=600, show_spinner=False)
-def load_excel_data(url, sheet_name, header_row, force_text=False):
+# Bytes workbook diambil dari workbook_cache (1x download per public_id + version)
+# Sheet di-parse sekali ke sheet_cache (dari sidecar Parquet jika ada), ganti Header / Jaga Teks cukup disusun ulang di memori
+# Kunci cache = public_id + version + pilihan sheet (url & sidecar tidak di-hash), hasil tidak di-copy tiap hit
+@diukur()
+@cache_kunci(lambda public_id, version, url, sheet_name, header_row, force_text=False, sidecar=None:
+             (public_id, version, sheet_name, header_row, force_text), ttl=600, max_entries=32, salin=True)
+def load_excel_data(public_id, version, url, sheet_name, header_row, force_text=False, sidecar=None):
     try:
-        response = requests.get(url)
-        file_content = io.BytesIO(response.content)
-        row_idx = header_row - 1 if header_row > 0 else 0
-        if force_text:
-            df = pd.read_excel(file_content, sheet_name=sheet_name, header=row_idx, dtype=str).fillna("")
-        else:
-            df = pd.read_excel(file_content, sheet_name=sheet_name, header=row_idx)
-        df.columns = df.columns.astype(str)
-        return df
+        return susun_tabel(ambil_grid(public_id, version, url, sheet_name, sidecar), header_row, force_text)
     except:
         return None
 
-@st.cache_data(ttl=600, show_spinner=False)
-def get_sheet_names(url):
+# Index pencarian dibuat sekali per tabel, dipakai bersama semua sesi tanpa copy (read-only: hanya cari / teks_kolom)
+@diukur()
+@cache_kunci(lambda public_id, version, url, sheet_name, header_row, force_text=False, sidecar=None:
+             (public_id, version, sheet_name, header_row, force_text), ttl=600, max_entries=16)
+def load_index_cari(public_id, version, url, sheet_name, header_row, force_text=False, sidecar=None):
+    df = load_excel_data(public_id, version, url, sheet_name, header_row, force_text, sidecar)
+    return IndexCari(df) if df is not None else None
+
+@diukur()
+@cache_kunci(lambda public_id, version, url: (public_id, version), ttl=600, max_entries=64)
+def get_sheet_names(public_id, version, url):
     try:
-        response = requests.get(url)
-        return pd.ExcelFile(io.BytesIO(response.content)).sheet_names
+        return daftar_sheet(ambil_workbook(public_id, version, url))
     except:
         return []
 
-def format_ribuan_indo(nilai):
+@diukur()
+def cari_manifest(katalog, file_info):
+    m_info = katalog.cari(id_manifest(file_info['public_id']))
+    if not m_info: return None
     try:
-        if float(nilai) % 1 != 0:
-            val = "{:,.2f}".format(float(nilai)) 
-        else:
-            val = "{:,.0f}".format(float(nilai))
-        translation = val.maketrans({",": ".", ".": ","})
-        return val.translate(translation)
+        manifest = json.loads(ambil_workbook(m_info['public_id'], m_info.get('version', ''), m_info['secure_url']))
     except:
-        return nilai
+        return None
+    # Manifest lama (xlsx sudah diganti) diabaikan
+    if str(manifest.get('xlsx_version')) != str(file_info.get('version', '')): return None
+    return manifest
+
+def pilihan_sheet(katalog, file_info):
+    """(manifest / None, daftar sheet) - dari manifest sidecar jika ada, tanpa buka xlsx"""
+    manifest = cari_manifest(katalog, file_info)
+    if manifest: return manifest, [x['nama'] for x in manifest['sheets']]
+    return None, get_sheet_names(file_info['public_id'], file_info.get('version', ''), file_info['secure_url'])
+
+def cari_sidecar(katalog, manifest, sheet):
+    if not manifest: return None
+    info_sh = next((x for x in manifest['sheets'] if x['nama'] == sheet), None)
+    return katalog.cari(info_sh['file']) if info_sh else None
+
+# --- PREFETCH ---
+# Tab Area hampir selalu dibuka dengan file terbaru -> download & parse duluan di latar
+FOLDER_PREFETCH = [ADMIN_CONFIG[k]["folder"] for k in ("AREA_INTRANSIT", "AREA_NKL", "AREA_RUSAK")]
+
+@st.cache_resource(show_spinner=False)
+def get_prefetcher():
+    return Prefetcher()
+
+def buka_tampilan_awal(katalog, file_info):
+    """Sama dengan tampilan pertama proses_tampilkan_excel (sheet pertama, Header 1, tanpa Jaga Teks) -> kunci cache sama"""
+    manifest, sheets = pilihan_sheet(katalog, file_info)
+    if not sheets: return
+    load_excel_data(file_info['public_id'], file_info.get('version', ''), file_info['secure_url'],
+                    sheets[0], 1, False, cari_sidecar(katalog, manifest, sheets[0]))
+
+def prefetch_file(katalog, file_info):
+    get_prefetcher().minta((file_info['public_id'], str(file_info.get('version', ''))), buka_tampilan_awal, katalog, file_info)
+
+def prefetch_terbaru(katalog, folders=FOLDER_PREFETCH):
+    # Dipanggil tiap rerun, file yang sudah diprefetch (public_id + version sama) dilewati
+    for f in terbaru_per_folder(katalog, folders): prefetch_file(katalog, f)
 
 # --- UI COMPONENTS ---
 def tampilkan_kontak(divisi_key):
@@ -282,46 +384,54 @@ def tampilkan_kontak(divisi_key):
                 wa = "62" + telp[1:] if telp.startswith("0") else telp
                 cols[i%4].info(f"**{nama}**\n[{telp}](https://wa.me/{wa})")
 
-def proses_tampilkan_excel(url, key_unik):
-    sheets = get_sheet_names(url)
+@diukur()
+def format_tampilan(df_display):
+    df_display = df_display.copy()
+    num_cols = df_display.select_dtypes(include=['float64', 'int64']).columns.tolist()
+    kw_raw_code = ['prdcd', 'plu', 'barcode', 'kode', 'id', 'nik', 'no', 'nomor']
+
+    for col in num_cols:
+        try:
+            col_str = str(col).lower()
+            if any(k in col_str for k in kw_raw_code):
+                df_display[col] = df_display[col].astype(str).str.replace(r'\.0$', '', regex=True)
+            elif pd.api.types.is_numeric_dtype(df_display[col]):
+                df_display[col] = format_ribuan_kolom(df_display[col])
+        except: continue
+    return df_display
+
+def proses_tampilkan_excel(file_info, key_unik, katalog):
+    p_id, ver, url = file_info['public_id'], file_info.get('version', ''), file_info['secure_url']
+    manifest, sheets = pilihan_sheet(katalog, file_info)
     if sheets:
         c1, c2 = st.columns(2)
         sh = c1.selectbox("Sheet:", sheets, key=f"sh_{key_unik}")
         hd = c2.number_input("Header:", 1, key=f"hd_{key_unik}")
         c3, c4 = st.columns([2, 1])
-        src = c3.text_input("Cari:", key=f"src_{key_unik}")
+        src = c3.text_input("Cari:", key=f"src_{key_unik}", help='Beberapa kata dipisah spasi (semua harus ada). Cari per kolom: kolom:nilai, frasa: "kata kata"')
         fmt = c4.checkbox("Jaga Semua Teks (No HP/NIK)", key=f"fmt_{key_unik}")
         
+        sidecar = cari_sidecar(katalog, manifest, sh)
+
         with st.spinner("Loading Data..."): 
-            df_raw = load_excel_data(url, sh, hd, fmt)
+            df_raw = load_excel_data(p_id, ver, url, sh, hd, fmt, sidecar)
         
         if df_raw is not None:
+            if df_raw.attrs.get("terpotong"):
+                st.caption(f"⚠️ File sangat besar: hanya {MAX_BARIS:,} baris / {MAX_KOLOM} kolom pertama yang ditampilkan.")
+            kunci_data = (p_id, ver, sh, hd, fmt)
             if src:
                 try:
-                    mask = df_raw.astype(str).apply(lambda x: x.str.contains(src, case=False, na=False)).any(axis=1)
-                    df_raw = df_raw[mask]
+                    idx_cari = load_index_cari(p_id, ver, url, sh, hd, fmt, sidecar)
+                    with tahap("cari", baris=len(df_raw)): df_raw = df_raw[idx_cari.cari(src)]
+                    kunci_data += (src,)
                 except: pass
 
-            df_display = df_raw.copy()
-
-            if not fmt:
-                num_cols = df_display.select_dtypes(include=['float64', 'int64']).columns.tolist()
-                kw_raw_code = ['prdcd', 'plu', 'barcode', 'kode', 'id', 'nik', 'no', 'nomor']
-
-                for col in num_cols:
-                    try:
-                        col_str = str(col).lower()
-                        if any(k in col_str for k in kw_raw_code):
-                            df_display[col] = df_display[col].astype(str).str.replace(r'\.0$', '', regex=True)
-                        elif pd.api.types.is_numeric_dtype(df_display[col]):
-                            df_display[col] = df_display[col].apply(format_ribuan_indo)
-                    except: continue
-
             st.write("")
             with st.expander("📏 Pengaturan Tampilan Tabel"):
                 col_fz, col_mode, col_h = st.columns(3)
                 with col_fz:
-                    pilihan_kolom = ["Tidak Ada"] + df_display.columns.tolist()
+                    pilihan_kolom = ["Tidak Ada"] + df_raw.columns.tolist()
                     freeze_col = st.selectbox("❄️ Freeze Kolom Kiri:", pilihan_kolom, key=f"fz_{key_unik}")
                 with col_mode:
                     st.write("↔️ Mode Lebar")
@@ -329,33 +439,35 @@ def proses_tampilkan_excel(url, key_unik):
                 with col_h:
                     table_height = st.slider("↕️ Tinggi (px):", 200, 1000, 500, 50, key=f"th_{key_unik}")
             
-            if freeze_col != "Tidak Ada":
-                df_display = df_display.set_index(freeze_col)
-
-            st.dataframe(df_display, use_container_width=use_full_width, height=table_height)
+            # Urut & potong halaman di server, format angka hanya untuk baris yang tampil
+            tampilkan_tabel_halaman(
+                df_raw, key_unik, format_fn=None if fmt else format_tampilan,
+                index_col=None if freeze_col == "Tidak Ada" else freeze_col, kunci_data=kunci_data,
+                use_container_width=use_full_width, height=table_height
+            )
             
-            csv = df_raw.to_csv(index=False).encode('utf-8')
+            with tahap("csv_export", baris=len(df_raw)): csv = df_raw.to_csv(index=False).encode('utf-8')
             col_info, col_dl = st.columns([3, 1])
             with col_info: st.caption(f"Total: {len(df_raw)} Baris")
             with col_dl:
                 st.download_button("📥 Download CSV", csv, f"Data_Export_{sh}.csv", "text/csv", key=f"dl_{key_unik}")
         else: st.warning("⚠️ Gagal membaca data. Cek Header.")
 
-def tampilkan_viewer(judul_tab, folder_target, semua_files, kode_kontak=None):
+def tampilkan_viewer(judul_tab, folder_target, katalog, kode_kontak=None):
     tampilkan_kontak(kode_kontak)
     prefix = folder_target + "/"
-    files_filtered = [f for f in semua_files if f['public_id'].startswith(prefix) and f['public_id'].endswith('.xlsx')]
+    files_filtered = katalog.files_folder(folder_target)
     
     if not files_filtered:
         st.info(f"📭 Data Kosong: {folder_target}")
         return
 
-    dict_files = {f['public_id'].replace(prefix, ""): f['secure_url'] for f in files_filtered}
+    dict_files = {f['public_id'].replace(prefix, ""): f for f in files_filtered}
     unik = f"std_{folder_target}"
     pilih = st.selectbox(f"Pilih File {judul_tab}:", list(dict_files.keys()), key=f"sel_{unik}")
-    if pilih: proses_tampilkan_excel(dict_files[pilih], unik)
+    if pilih: proses_tampilkan_excel(dict_files[pilih], unik, katalog)
 
-def tampilkan_viewer_area_rusak(folder_target, semua_files, kode_kontak=None):
+def tampilkan_viewer_area_rusak(folder_target, katalog, kode_kontak=None):
     tampilkan_kontak(kode_kontak)
     st.markdown("### ⚠️ Area - Barang Rusak")
     
@@ -366,23 +478,16 @@ def tampilkan_viewer_area_rusak(folder_target, semua_files, kode_kontak=None):
         st.divider()
 
         prefix = folder_target + "/"
-        files_in = [f for f in semua_files if f['public_id'].startswith(prefix) and f['public_id'].endswith('.xlsx')]
-        
-        if kat == "Semua Data": ff = files_in
-        elif kat == "Say Bread": ff = [f for f in files_in if "say bread" in f['public_id'].lower()]
-        elif kat == "Mr Bread": ff = [f for f in files_in if "mr bread" in f['public_id'].lower()]
-        elif kat == "Fried Chicken": ff = [f for f in files_in if "fried chicken" in f['public_id'].lower()]
-        elif kat == "Onigiri": ff = [f for f in files_in if "onigiri" in f['public_id'].lower()]
-        elif kat == "DRY": ff = [f for f in files_in if "dry" in f['public_id'].lower()]
-        else: ff = []
+        if kat == "Semua Data": ff = katalog.files_folder(folder_target)
+        else: ff = katalog.files_kategori(folder_target, kat)
 
         if not ff:
             st.warning(f"File '{kat}' tidak ditemukan.")
         else:
-            dict_files = {f['public_id'].replace(prefix, ""): f['secure_url'] for f in ff}
+            dict_files = {f['public_id'].replace(prefix, ""): f for f in ff}
             unik = "area_rusak_special"
             pilih = st.selectbox(f"Pilih File ({kat}):", list(dict_files.keys()), key=f"sel_{unik}")
-            if pilih: proses_tampilkan_excel(dict_files[pilih], unik)
+            if pilih: proses_tampilkan_excel(dict_files[pilih], unik, katalog)
 
     with tab_input:
         st.info("Formulir Input Berita Acara Rusak Pabrik")
@@ -395,7 +500,7 @@ def tampilkan_viewer_area_rusak(folder_target, semua_files, kode_kontak=None):
             in_tgl = st.date_input("Tanggal NRB")
             st.markdown("---")
             in_foto = st.file_uploader("Upload Foto Berita Acara", type=['jpg', 'jpeg', 'png'])
-            st.caption("ℹ️ Size maksimal 2 MB. Jika hasil foto lebih besar harap screenshot dahulu lalu upload ulang.")
+            st.caption("ℹ️ Size maksimal 15 MB. Foto besar otomatis dikecilkan (lebar 800px) sebelum diupload.")
             
             if st.button("Kirim Laporan", type="primary", use_container_width=True):
                 if in_kode and in_nrb and in_foto:
@@ -421,8 +526,8 @@ def tampilkan_viewer_area_rusak(folder_target, semua_files, kode_kontak=None):
         st.write("")
         with st.expander("Riwayat Inputan Anda (Hari Ini)"):
             try:
-                raw_data = get_json_fresh(RUSAK_PABRIK_DB)
-                if isinstance(raw_data, list) and raw_data:
+                raw_data = get_data_rusak().baca_bulan(datetime.now().strftime("%Y-%m"))
+                if raw_data:
                     df_rusak = pd.DataFrame(raw_data)
                     curr_user = st.session_state.get('area_user_name', '')
                     if curr_user:
@@ -431,7 +536,7 @@ def tampilkan_viewer_area_rusak(folder_target, semua_files, kode_kontak=None):
                 else: st.caption("Belum ada data.")
             except: pass
 
-def tampilkan_viewer_area_intransit(folder_target, semua_files, kode_kontak=None):
+def tampilkan_viewer_area_intransit(folder_target, katalog, kode_kontak=None):
     tampilkan_kontak(kode_kontak)
     st.markdown("### 🚛 Area - Intransit/Proforma")
     kat = st.radio("Filter Kategori:", ["Semua Data", "NRB Intransit", "BPB/TAT Intransit"], horizontal=True)
@@ -441,18 +546,65 @@ def tampilkan_viewer_area_intransit(folder_target, semua_files, kode_kontak=None
         st.markdown("""<div style="background-color: #004400; padding: 10px; border-radius: 5px; margin-bottom: 10px; border: 1px solid green;"><marquee style="color: #ccffcc; font-weight: bold; font-size: 16px;">📢 JIKA BPB DAN TAT TELAH DIPROSES DAN FISIK DITERIMA TOKO, TOLONG KONFIRMASI KE TULASI IC</marquee></div>""", unsafe_allow_html=True)
     st.divider()
     prefix = folder_target + "/"
-    files_in = [f for f in semua_files if f['public_id'].startswith(prefix) and f['public_id'].endswith('.xlsx')]
-    if kat == "Semua Data": ff = files_in
-    elif kat == "NRB Intransit": ff = [f for f in files_in if "nrb" in f['public_id'].lower()]
-    elif kat == "BPB/TAT Intransit": ff = [f for f in files_in if "bpb" in f['public_id'].lower() or "tat" in f['public_id'].lower()]
-    else: ff = []
+    if kat == "Semua Data": ff = katalog.files_folder(folder_target)
+    else: ff = katalog.files_kategori(folder_target, kat)
     if not ff:
         st.warning(f"File kategori '{kat}' tidak ditemukan.")
         return
-    dict_files = {f['public_id'].replace(prefix, ""): f['secure_url'] for f in ff}
+    dict_files = {f['public_id'].replace(prefix, ""): f for f in ff}
     unik = "area_intransit_special"
     pilih = st.selectbox(f"Pilih File ({kat}):", list(dict_files.keys()), key=f"sel_{unik}")
-    if pilih: proses_tampilkan_excel(dict_files[pilih], unik)
+    if pilih: proses_tampilkan_excel(dict_files[pilih], unik, katalog)
+
+def tampilkan_panel_performa():
+    st.markdown("#### ⏱️ Waktu per Tahap")
+    c_info, c_rf, c_rs = st.columns([4, 1, 1])
+    with c_info: st.caption("Sampel dari semua sesi sejak server jalan. Tahap bersarang (mis. storage.unduh di dalam load_excel_data) ikut terhitung di induknya.")
+    with c_rf:
+        if st.button("🔄 Refresh", key="perf_refresh", use_container_width=True): st.rerun()
+    with c_rs:
+        if st.button("🧹 Reset", key="perf_reset", use_container_width=True): pencatat.clear(); st.rerun()
+
+    ringkasan = pencatat.ringkasan()
+    if ringkasan:
+        df_tahap = pd.DataFrame(ringkasan)
+        df_tahap['hit_rate'] = df_tahap['hit_rate'].map(lambda x: "-" if pd.isna(x) else f"{x:.0%}")
+        st.dataframe(df_tahap.round(2), hide_index=True, use_container_width=True)
+    else: st.info("Belum ada data.")
+
+    st.markdown("#### 🔁 Rerun Terakhir")
+    reruns = pencatat.reruns()[::-1]
+    if reruns:
+        df_rerun = pd.DataFrame([{
+            "Mulai": r['mulai'], "Halaman": r['label'], "Total (ms)": round(r['ms'], 1), "Tahap": len(r['tahap']),
+            "Terlama": max(((t['nama'], t['ms']) for t in r['tahap'] if t['kedalaman'] == 0), key=lambda x: x[1], default=("-", 0))[0],
+        } for r in reruns])
+        st.dataframe(df_rerun, hide_index=True, use_container_width=True, height=250)
+        i = st.selectbox("Detail rerun:", range(len(reruns)), format_func=lambda i: f"{reruns[i]['mulai']} - {reruns[i]['label']} ({reruns[i]['ms']:.0f} ms)", key="perf_rerun")
+        detail = sorted(reruns[i]['tahap'], key=lambda t: t.get('mulai_ms', 0))
+        st.dataframe(pd.DataFrame([{
+            "Tahap": " " * t['kedalaman'] + t['nama'], "Mulai (ms)": round(t.get('mulai_ms', 0), 1), "Durasi (ms)": round(t['ms'], 2),
+            "KB": None if t['bytes'] is None else round(t['bytes'] / 1024, 1),
+            "Cache": {True: "hit", False: "miss"}.get(t['hit'], ""), "Error": t.get('error', ""),
+        } for t in detail]), hide_index=True, use_container_width=True)
+        if reruns[i]['terpotong']: st.caption(f"{reruns[i]['terpotong']} tahap lain tidak ditampilkan.")
+
+    st.markdown("#### 🗄️ Cache")
+    c_a, c_b = st.columns(2)
+    with c_a:
+        st.caption("Workbook (bytes) & Sheet (grid)")
+        st.json({"workbook_cache": workbook_cache.stats(), "sheet_cache": sheet_cache.stats()}, expanded=False)
+        st.caption("Dokumen JSON & antrian log")
+        st.json({"doc_store": get_doc_store().stats(), "antrian_log": get_antrian_log().stats()}, expanded=False)
+        st.caption("HTTP (pool koneksi bersama)")
+        st.json(klien_http.stats(), expanded=False)
+        st.caption("Prefetch workbook terbaru")
+        st.json(get_prefetcher().stats(), expanded=False)
+        st.caption("Katalog file")
+        st.json(get_katalog().stats(), expanded=False)
+    with c_b:
+        st.caption("Cache berkunci (tabel, index cari, sheet)")
+        st.dataframe(pd.DataFrame(stats_semua()).round(3), hide_index=True, use_container_width=True)
 
 # --- MAIN APP ---
 def main():
@@ -464,11 +616,13 @@ def main():
 
     init_cloudinary()
     all_files = get_all_files_cached()
+    prefetch_terbaru(all_files)
 
     st.title("📊 Monitoring IC Bali")
     
     menu_options = ["Area", "Internal IC", "DC", "Lapor Error", "🔐 Admin Panel", "🎨 Tampilan Web"]
     menu = st.radio("Navigasi:", menu_options, horizontal=True)
+    label_rerun(menu)
     st.divider()
 
     # --- 1. AREA ---
@@ -503,9 +657,11 @@ def main():
                         p = st.text_input("Password", type="password")
                         if st.form_submit_button("Masuk"):
                             with st.spinner("Memverifikasi..."):
-                                db_users = get_json_fresh(USER_DB_PATH) 
+                                try: db_users = get_json_wajib(USER_DB_PATH)
+                                except Exception as e: db_users = None; st.error(f"Gagal membaca data user, coba lagi: {e}")
                                 p_hash = hash_password(p)
-                                if u in db_users and db_users[u] == p_hash:
+                                if db_users is None: pass
+                                elif u in db_users and db_users[u] == p_hash:
                                     st.session_state['auth_area'] = True
                                     st.session_state['area_user_name'] = u
                                     catat_login_activity(u) 
@@ -539,15 +695,18 @@ def main():
                         if submit_daftar:
                             if new_u and new_p:
                                 with st.spinner("Mendaftarkan..."):
-                                    db_users = get_json_fresh(USER_DB_PATH)
-                                    if new_u in db_users:
-                                        st.error("Username sudah dipakai!")
+                                    p_hash_baru = hash_password(new_p)
+                                    # None = username sudah dipakai -> batal tanpa menulis
+                                    def daftar_user(db_users): return None if new_u in db_users else {**db_users, new_u: p_hash_baru}
+                                    try:
+                                        hasil_daftar = upload_json_to_cloud(USER_DB_PATH, daftar_user, default={})
+                                    except Exception as e:
+                                        st.error(f"Gagal mendaftar, coba lagi: {e}")
                                     else:
-                                        db_users[new_u] = hash_password(new_p)
-                                        upload_json_to_cloud(db_users, USER_DB_PATH)
-                                        time.sleep(2)
-                                        st.success(f"✅ Akun '{new_u}' Berhasil Dibuat!")
-                                        st.info("Silakan pindah ke Tab 'Masuk' dan Login menggunakan password yang baru dibuat.")
+                                        if hasil_daftar is None: st.error("Username sudah dipakai!")
+                                        else:
+                                            st.success(f"✅ Akun '{new_u}' Berhasil Dibuat!")
+                                            st.info("Silakan pindah ke Tab 'Masuk' dan Login menggunakan password yang baru dibuat.")
                             else: st.warning("Isi data dengan lengkap")
         else:
             c_info, c_out = st.columns([5, 1])
@@ -652,7 +811,7 @@ def main():
             with c_out: 
                 if st.button("Logout"): st.session_state['admin_logged_in_key']=None; st.rerun()
             
-            tab_file, tab_user_mgr, tab_rusak_pabrik = st.tabs(["📂 Manajemen File/Foto", "👥 Manajemen User & Monitoring", "🏭 Rekap Rusak Pabrik"])
+            tab_file, tab_user_mgr, tab_rusak_pabrik, tab_perf = st.tabs(["📂 Manajemen File/Foto", "👥 Manajemen User & Monitoring", "🏭 Rekap Rusak Pabrik", "⏱️ Performance"])
             
             with tab_file:
                 col_up, col_del = st.columns(2)
@@ -663,8 +822,14 @@ def main():
                         up = st.file_uploader("Pilih Excel", type=['xlsx'], key="admin_up_xls")
                         if up and st.button("Upload Excel", use_container_width=True):
                             with st.spinner("Uploading..."):
-                                upload_file(up, cfg['folder'])
-                                get_all_files_cached.clear()
+                                res_up = upload_file(up, cfg['folder'])
+                                all_files.tambah(res_up)
+                                try:
+                                    baru, usang = ingest_excel(up.getvalue(), res_up)
+                                    for r in baru: all_files.tambah(r)
+                                    for p in usang: all_files.hapus(p)
+                                except Exception as e: st.warning(f"Sidecar gagal dibuat, viewer tetap baca xlsx: {e}")
+                                prefetch_file(all_files, res_up) # Viewer berikutnya langsung dapat dari cache
                                 st.success("Selesai!")
                                 st.rerun()
 
@@ -672,15 +837,22 @@ def main():
                     st.markdown("#### 🗑️ Hapus File")
                     with st.container(border=True):
                         prefix = cfg['folder'] + "/"
-                        my_files = [f for f in all_files if f['public_id'].startswith(prefix) and f['resource_type'] == 'raw']
+                        isi_folder = all_files.files_folder(cfg['folder'], ext=None)
+                        my_files = [f for f in isi_folder if f['resource_type'] == 'raw' and not is_sidecar(f['public_id'])]
                         
                         if my_files:
                             d_del = {f['public_id'].replace(prefix, ""): f['public_id'] for f in my_files}
                             sel_del = st.selectbox("Pilih File:", list(d_del.keys()), key="admin_del")
                             if st.button("Hapus Permanen", type="primary", use_container_width=True):
                                 with st.spinner("Deleting..."):
-                                    hapus_file(d_del[sel_del], "raw")
-                                    get_all_files_cached.clear()
+                                    pid_del = d_del[sel_del]
+                                    # Ikut hapus sidecar & manifest milik file ini
+                                    terkait = [f['public_id'] for f in isi_folder if f['public_id'].startswith(pid_del + ".") and is_sidecar(f['public_id'])]
+                                    for p in [pid_del] + terkait:
+                                        if hapus_file(p, "raw"):
+                                            all_files.hapus(p)
+                                            workbook_cache.hapus_file(p)
+                                            sheet_cache.hapus_file(p)
                                     st.success("Terhapus.")
                                     st.rerun()
                         else:
@@ -692,7 +864,8 @@ def main():
                     st.markdown("#### 🛠️ Kelola User Area")
                     with st.container(border=True):
                         if st.button("🔄 Reload Data User"): st.rerun()
-                        db_users = get_json_fresh(USER_DB_PATH)
+                        try: db_users = get_json_wajib(USER_DB_PATH)
+                        except Exception as e: db_users = None; st.error(f"Gagal membaca data user: {e}")
                         if db_users:
                             st.write(f"Total User: **{len(db_users)}**")
                             pilih_user = st.selectbox("Pilih Username:", list(db_users.keys()), key="sel_user_mgr")
@@ -700,17 +873,20 @@ def main():
                             new_pass = st.text_input("Password Baru:", type="password", key="inp_new_pass")
                             if st.button("Simpan Password Baru", use_container_width=True):
                                 if new_pass:
-                                    db_users[pilih_user] = hash_password(new_pass)
-                                    upload_json_to_cloud(db_users, USER_DB_PATH)
-                                    st.success(f"Password '{pilih_user}' berhasil diubah!")
-                                    time.sleep(1)
-                                    st.rerun()
+                                    p_hash = hash_password(new_pass)
+                                    # User dihapus sesi lain -> jangan dibuat ulang
+                                    try: hasil_reset = upload_json_to_cloud(USER_DB_PATH, lambda db: {**db, pilih_user: p_hash} if pilih_user in db else None, default={})
+                                    except Exception as e: st.error(f"Gagal menyimpan password: {e}")
+                                    else:
+                                        if hasil_reset is None: st.warning(f"User '{pilih_user}' sudah dihapus, password tidak disimpan.")
+                                        else: st.success(f"Password '{pilih_user}' berhasil diubah!")
+                                        time.sleep(1)
+                                        st.rerun()
                                 else: st.warning("Password kosong!")
                             st.markdown("---")
                             if st.button("❌ Hapus User Ini", type="primary", use_container_width=True):
                                 try:
-                                    del db_users[pilih_user]
-                                    upload_json_to_cloud(db_users, USER_DB_PATH)
+                                    upload_json_to_cloud(USER_DB_PATH, lambda db: {k: v for k, v in db.items() if k != pilih_user}, default={})
                                     st.success(f"User '{pilih_user}' telah dihapus!")
                                     time.sleep(1)
                                     st.rerun()
@@ -720,8 +896,19 @@ def main():
                 with col_monitor:
                     st.markdown("#### 📊 Monitoring Aktivitas")
                     with st.container(border=True):
-                        if st.button("🔄 Refresh Monitoring"): st.rerun()
-                        log_data = get_json_fresh(LOG_DB_PATH)
+                        c_rf, c_tgl = st.columns([1, 2])
+                        with c_rf:
+                            if st.button("🔄 Refresh Monitoring"): st.rerun()
+                        hari_ini = get_now_wita().date()
+                        with c_tgl:
+                            rentang = st.date_input("Periode:", (hari_ini - timedelta(days=6), hari_ini), key="rentang_log")
+                        tgl_awal, tgl_akhir = (rentang if len(rentang) == 2 else (rentang[0], rentang[0]))
+
+                        log_area = get_log_aktivitas()
+                        get_antrian_log() # Pastikan worker latar (tulis log + kompaksi) sudah jalan
+                        log_data = log_area.baca(str(tgl_awal), str(tgl_akhir))
+                        if log_area.error_arsip: st.warning(f"Log lama (sebelum migrasi) gagal dibaca, belum ikut dihitung: {log_area.error_arsip}")
+                        if log_area.error_kompaksi: st.warning(f"Kompaksi log terakhir gagal (dicoba ulang otomatis): {log_area.error_kompaksi}")
                         if log_data:
                             rekap_list = []
                             total_hits = 0
@@ -732,11 +919,12 @@ def main():
                             df_log = pd.DataFrame(rekap_list)
                             df_log = df_log.sort_values(by="Tanggal", ascending=False)
                             m1, m2 = st.columns(2)
-                            m1.metric("Total Login (All Time)", total_hits)
-                            st.dataframe(df_log, use_container_width=True, height=300)
+                            m1.metric("Total Login (All Time)", log_area.total_semua())
+                            m2.metric("Total Login (Periode)", total_hits)
+                            tampilkan_tabel_halaman(df_log, "log_area", use_container_width=True, height=300)
                             csv_log = df_log.to_csv(index=False).encode('utf-8')
                             st.download_button("📥 Download Log (CSV)", csv_log, "Activity_Log.csv", "text/csv", use_container_width=True)
-                        else: st.info("Log aktivitas kosong.")
+                        else: st.info("Log aktivitas kosong pada periode ini.")
 
             with tab_rusak_pabrik:
                 st.markdown("#### 🏭 Rekap & Download Foto Rusak Pabrik")
@@ -745,19 +933,25 @@ def main():
                 with c_nrb: cari_nrb = st.text_input("No NRB:", placeholder="12345")
                 with c_bln: cari_bulan = st.text_input("Bulan (YYYY-MM):", placeholder="2026-01")
 
+                data_rusak_bln = get_data_rusak()
                 if st.button("🔍 Cari Foto", use_container_width=True):
-                    data_rusak = get_json_fresh(RUSAK_PABRIK_DB)
-                    if isinstance(data_rusak, list) and data_rusak:
-                        df_rusak = pd.DataFrame(data_rusak)
-                        mask = pd.Series([True] * len(df_rusak))
-                        if cari_toko: mask &= df_rusak['Kode_Toko'].str.contains(cari_toko.upper(), na=False)
-                        if cari_nrb: mask &= df_rusak['No_NRB'].str.contains(cari_nrb.upper(), na=False)
-                        if cari_bulan: mask &= (df_rusak['Tanggal_NRB'].astype(str).str.contains(cari_bulan) | df_rusak.get('Bulan_Upload', '').astype(str).str.contains(cari_bulan))
-                        
-                        hasil = df_rusak[mask]
-                        if not hasil.empty:
-                            st.success(f"Ditemukan {len(hasil)} Data.")
-                            for index, row in hasil.iterrows():
+                    st.session_state['q_rusak'] = (cari_toko, cari_nrb, cari_bulan)
+                    st.session_state['pg_cari_rusak'] = 1
+
+                # Pencarian awalan (prefix) lewat index, hanya 1 halaman thumbnail yang dirender
+                if 'q_rusak' in st.session_state:
+                    index_rusak = load_index_rusak(tuple(sorted(data_rusak_bln.index().items())))
+                    if len(index_rusak):
+                        q_toko, q_nrb, q_bulan = st.session_state['q_rusak']
+                        total = len(index_rusak.cari_id(q_toko, q_nrb, q_bulan))
+                        if total:
+                            jml_hal = max(1, -(-total // 20))
+                            if st.session_state.get('pg_cari_rusak', 1) > jml_hal: st.session_state['pg_cari_rusak'] = 1
+                            c_info, c_hal = st.columns([3, 1])
+                            with c_hal: hal = st.number_input(f"Hal (1-{jml_hal}):", min_value=1, max_value=jml_hal, step=1, key="pg_cari_rusak")
+                            with c_info: st.success(f"Ditemukan {total} Data.")
+                            hasil, _ = index_rusak.cari(q_toko, q_nrb, q_bulan, halaman=hal, ukuran=20)
+                            for row in hasil:
                                 with st.container(border=True):
                                     c_img, c_det = st.columns([1, 2])
                                     with c_img:
@@ -773,13 +967,19 @@ def main():
 
                 st.divider()
                 st.markdown("#### 📋 Tabel Semua Data")
-                if st.button("🔄 Refresh Tabel"): st.rerun()
+                c_bln_tbl, c_ref = st.columns([3, 1])
+                idx_rusak = data_rusak_bln.index()
+                semua_bulan = sorted(idx_rusak, reverse=True)
+                with c_bln_tbl:
+                    bulan_tbl = st.multiselect("Bulan:", semua_bulan, default=semua_bulan[:1], format_func=lambda b: f"{b} ({idx_rusak[b]} data)", key="bulan_tbl_rusak")
+                with c_ref:
+                    if st.button("🔄 Refresh Tabel"): st.rerun()
                 try:
-                    raw_data = get_json_fresh(RUSAK_PABRIK_DB)
-                    if isinstance(raw_data, list) and raw_data:
+                    raw_data = data_rusak_bln.baca(bulan_tbl)
+                    if raw_data:
                         df_table = pd.DataFrame(raw_data)
                         if "Input_Time" in df_table.columns: df_table = df_table.sort_values(by="Input_Time", ascending=False)
-                        st.dataframe(df_table, use_container_width=True)
+                        tampilkan_tabel_halaman(df_table, "rekap_rusak", use_container_width=True)
                         csv_rsk = df_table.to_csv(index=False).encode('utf-8')
                         st.download_button("📥 Download Rekap (CSV)", csv_rsk, "Rekap_Rusak.csv", "text/csv", use_container_width=True)
                 except: pass
@@ -787,11 +987,8 @@ def main():
                 st.write("")
                 with st.expander("🚨 Danger Zone: Hapus Data Bulanan (Bersih-bersih)"):
                     st.error("Perhatian: Fitur ini akan menghapus SELURUH foto dan data pada bulan yang dipilih. Tidak bisa dibatalkan!")
-                    raw_data_del = get_json_fresh(RUSAK_PABRIK_DB)
-                    list_bulan = []
-                    if isinstance(raw_data_del, list):
-                        list_bulan = sorted(list(set([d.get('Bulan_Upload') for d in raw_data_del if d.get('Bulan_Upload')])))
-                    
+                    list_bulan = data_rusak_bln.daftar_bulan()
+
                     if list_bulan:
                         bulan_target = st.selectbox("Pilih Bulan yang akan dihapus total:", list_bulan)
                         pass_confirm = st.text_input("Masukkan Password Konfirmasi (123456):", type="password")
@@ -812,6 +1009,9 @@ def main():
                     else:
                         st.info("Tidak ada data bulan yang bisa dihapus.")
 
+            with tab_perf:
+                tampilkan_panel_performa()
+
     # --- 7. TAMPILAN WEB ---
     elif menu == "🎨 Tampilan Web":
         st.subheader("🎨 Pengaturan Tampilan")
@@ -829,4 +1029,5 @@ def main():
     st.markdown("""<div style='position: fixed; bottom: 0; right: 0; padding: 10px; opacity: 0.5; font-size: 12px; color: grey;'>Monitoring IC Bali System</div>""", unsafe_allow_html=True)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with rerun():
+        main()
\ No newline at end of file
@@ -0,0 +1,393 @@
+import argparse
+import gc
+import io
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+
+# =================================================================
+# BENCHMARK END-TO-END - Jalur panas viewer (app.py) & admin SO, tanpa Cloudinary
+# =================================================================
+# Semua file di storage lokal (STORAGE_LOKAL), data sintetis dibuat sekali per ukuran.
+#   python benchmark.py --baris 20000 --toko 200 --keluar hasil.json
+#   python benchmark.py --baris 500000 --toko 2000 --folder /tmp/bench   (data besar dipakai ulang)
+#   python benchmark.py --keluar baru.json --banding lama.json           (jalan + bandingkan)
+#   python benchmark.py --banding lama.json baru.json                    (hanya bandingkan)
+PERSENTIL = (50, 90, 95, 99)
+AMBANG_REGRESI = 20.0 # % kenaikan p50 yang dianggap regresi
+BEDA_MIN_MS = 2.0 # Selisih p50 di bawah ini dianggap noise walau persentasenya besar
+PASSWORD_UJI = "rahasia123"
+FOLDER_VIEWER = ("Area/Intransit/NRB Intransit", "Area/NKL/NKL Harian", "Area/BarangRusak/Say Bread")
+SO_MASTER = "so_rawan_hilang/master_utama.xlsx"
+
+# --- DATA SINTETIS ---
+def buat_workbook(n_baris, seed=0):
+    rng = np.random.default_rng(seed)
+    kode = np.char.add("T", (rng.integers(0, 3000, n_baris)).astype(str))
+    qty = rng.integers(1, 500, n_baris)
+    harga = rng.integers(1_000, 250_000, n_baris)
+    df = pd.DataFrame({
+        "Kode Toko": kode, "Nama Toko": np.char.add("Toko ", kode),
+        "PRDCD": rng.integers(10**7, 10**8, n_baris), "Deskripsi": np.char.add("Barang ", rng.integers(0, 20_000, n_baris).astype(str)),
+        "Qty": qty, "Harga": harga, "Total": qty * harga, "Rata2": np.round(harga / 3, 2),
+        "No NRB": np.char.add("NRB", rng.integers(10**5, 10**6, n_baris).astype(str)),
+        "Tanggal": pd.Timestamp("2026-01-01") + pd.to_timedelta(rng.integers(0, 300, n_baris), unit="D"),
+    })
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf) as w:
+        df.to_excel(w, sheet_name="Data", index=False)
+        df.head(50).to_excel(w, sheet_name="Ringkasan", index=False)
+    return buf.getvalue()
+
+def buat_master_so(n_toko, n_item, seed=0):
+    rng = np.random.default_rng(seed)
+    toko = [f"T{i:04d}" for i in range(n_toko)]
+    am = {t: f"AM{rng.integers(25)}" for t in toko}
+    as_ = {t: f"AS{rng.integers(120)}" for t in toko}
+    return pd.DataFrame({
+        "Toko": [t for t in toko for _ in range(n_item)], "Nama": [f"Toko {t}" for t in toko for _ in range(n_item)],
+        "PRDCD": [str(10**7 + j) for _ in toko for j in range(n_item)],
+        "AM": [am[t] for t in toko for _ in range(n_item)], "AS": [as_[t] for t in toko for _ in range(n_item)],
+        "Stok H-1": rng.integers(0, 100, n_toko * n_item), "Query Sales": None, "Jml Fisik": None, "Selisih": None,
+    })
+
+def ke_xlsx(df):
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf, engine='openpyxl') as w: df.to_excel(w, index=False)
+    return buf.getvalue()
+
+def buat_foto(lebar=3000, tinggi=2000):
+    from PIL import Image
+    rng = np.random.default_rng(0)
+    pix = rng.integers(0, 255, (tinggi, lebar, 3), dtype=np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(pix).save(buf, format="JPEG", quality=92)
+    return buf.getvalue()
+
+def siapkan_data(storage, a):
+    """Isi storage lokal: workbook viewer (+ sidecar), users, rusak pabrik, master & hasil SO"""
+    import app
+    from excel_engine import buat_sidecar, id_manifest
+
+    t0 = time.perf_counter()
+    blob = buat_workbook(a.baris)
+    for i, nama in enumerate(FOLDER_VIEWER):
+        p_id = f"{nama} {a.baris}.xlsx"
+        res = storage.simpan(blob, p_id, "raw")
+        # Sama seperti upload admin: sidecar Parquet + manifest
+        manifest, files = buat_sidecar(blob, p_id)
+        for s_id, isi in files: storage.simpan(isi, s_id, "raw")
+        if manifest:
+            manifest["xlsx_version"] = str(res['version'])
+            storage.simpan(json.dumps(manifest).encode(), id_manifest(p_id), "raw")
+    print(f"  workbook {a.baris:,} baris ({len(blob) / 1e6:.1f} MB) x {len(FOLDER_VIEWER)} folder")
+
+    users = {f"user{i:04d}": app.hash_password(PASSWORD_UJI) for i in range(a.user)}
+    storage.simpan(json.dumps(users).encode(), app.USER_DB_PATH, "raw")
+
+    rng = np.random.default_rng(1)
+    bulan = [f"2026-{m:02d}" for m in range(1, 7)]
+    rusak = [{
+        "Input_Time": f"{b}-{rng.integers(1, 28):02d} 10:{i % 60:02d}:00", "Bulan_Upload": b,
+        "Kode_Toko": f"T{rng.integers(3000):04d}", "No_NRB": f"NRB{i:06d}", "Tanggal_NRB": f"{b}-01",
+        "Bukti_Foto": storage.url(f"{app.RUSAK_PABRIK_IMG_FOLDER}/{b}/x{i}", "image"), "User_Input": f"user{i % 50:04d}",
+    } for i, b in enumerate(rng.choice(bulan, a.rusak))]
+    storage.simpan(json.dumps(rusak).encode(), app.RUSAK_PABRIK_DB, "raw") # Format lama, dipecah per bulan saat dibuka
+    app.get_data_rusak().index()
+
+    m_df = buat_master_so(a.toko, a.item)
+    v_id = str(storage.simpan(ke_xlsx(m_df), SO_MASTER, "raw")['version'])
+    terkirim = m_df['Toko'].drop_duplicates().sample(frac=a.terkirim, random_state=0)
+    for t in terkirim:
+        s = m_df[m_df['Toko'] == t].copy()
+        s["Query Sales"], s["Jml Fisik"] = 1, 9
+        s["Selisih"] = 0
+        storage.simpan(ke_xlsx(s), f"so_rawan_hilang/hasil/Hasil_{t}_v{v_id}.xlsx", "raw")
+    print(f"  master SO {a.toko} toko x {a.item} item, {len(terkirim)} hasil toko")
+    print(f"  data siap dalam {time.perf_counter() - t0:.1f} detik")
+
+# --- PENGUKURAN ---
+def ringkas(ms, peak_bytes):
+    arr = np.asarray(ms)
+    hasil = {"n": len(ms), "rata2_ms": float(arr.mean()), "min_ms": float(arr.min()), "max_ms": float(arr.max())}
+    hasil.update({f"p{p}_ms": float(np.percentile(arr, p)) for p in PERSENTIL})
+    hasil["peak_mb"] = peak_bytes / 1e6 if peak_bytes is not None else None
+    return hasil
+
+def ukur(fn, ulang, siapkan=None):
+    """`ulang` kali diukur waktunya + 1x lagi dengan tracemalloc untuk puncak memori (tracemalloc memperlambat)"""
+    ms = []
+    for i in range(ulang):
+        if siapkan: siapkan()
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        ms.append((time.perf_counter() - t0) * 1000)
+    if siapkan: siapkan()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return ringkas(ms, peak)
+
+# --- SKENARIO ---
+def skenario_viewer(storage, a):
+    import app
+    import excel_engine
+    from cache_kunci import clear_semua
+    from tabel import urutan_baris
+
+    excel_engine.sheet_cache.folder = os.path.join(a.folder, "_sheet_cache") # Jangan pakai cache disk milik app yang sedang jalan
+    katalog = app.get_katalog()
+    katalog.pastikan_segar()
+    f_info = katalog.files_folder("Area/NKL")[0]
+    p_id, ver, url = f_info['public_id'], f_info.get('version', ''), f_info['secure_url']
+    manifest = app.cari_manifest(katalog, f_info)
+    sidecar = katalog.cari(manifest['sheets'][0]['file']) if manifest else None
+    buka = lambda: app.load_excel_data(p_id, ver, url, "Data", 1, False, sidecar)
+
+    def dingin():
+        excel_engine.workbook_cache.clear()
+        excel_engine.sheet_cache.clear(disk=True)
+        clear_semua()
+
+    def buka_xlsx():
+        # Tanpa sidecar: download + parse xlsx penuh (file lama sebelum ingest)
+        dingin()
+        app.load_excel_data(p_id, ver, url, "Data", 1, False, None)
+
+    def dingin_lalu_prefetch():
+        # Login: katalog selesai -> prefetch jalan di latar sementara user mengetik password
+        dingin()
+        app.get_prefetcher().lupakan()
+        app.prefetch_terbaru(katalog)
+        app.get_prefetcher().tunggu()
+
+    df = buka()
+    idx = app.load_index_cari(p_id, ver, url, "Data", 1, False, sidecar)
+    kata = str(df.iloc[len(df) // 2]["Kode Toko"])
+
+    def cari_format():
+        # Satu ketikan di kolom Cari + urut + format halaman 100 baris
+        hasil = df[idx.cari(f'{kata} barang')]
+        halaman = hasil.iloc[urutan_baris(hasil, "Total", turun=True)[:100]]
+        app.format_tampilan(halaman)
+
+    return {
+        "buka_excel_dingin_sidecar": (buka, dingin),
+        "buka_excel_dingin_xlsx": (buka_xlsx, None),
+        "buka_excel_hangat": (buka, None),
+        "buka_excel_setelah_prefetch": (lambda: app.buka_tampilan_awal(katalog, f_info), dingin_lalu_prefetch),
+        "cari_format_halaman": (cari_format, None),
+        "format_halaman_100": (lambda: app.format_tampilan(df.iloc[:100]), None),
+    }
+
+def skenario_rusak(storage, a):
+    import app
+    from cari_rusak import IndexRusak
+    foto = buat_foto()
+    ke = iter(range(10**6))
+
+    def submit():
+        ok, pesan = app.simpan_data_rusak_pabrik("F08C", f"NRB{next(ke):07d}", date(2026, 3, 1), foto)
+        if not ok: raise RuntimeError(pesan)
+
+    def index_cari():
+        idx = IndexRusak(app.get_data_rusak().baca())
+        idx.cari(toko="T0", halaman=1, ukuran=50)
+
+    return {"submit_rusak_pabrik": (submit, None), "index_cari_rusak": (index_cari, None)}
+
+def skenario_so(storage, a):
+    from json_store import DocStore
+    from progres import ProgresToko, kode_dari_hasil
+    from rekap_engine import gabung_rekap, unduh_semua_hasil
+
+    prefix = "so_rawan_hilang/hasil/Hasil_"
+    res = storage.meta(SO_MASTER)
+    v_id = str(res['version'])
+    m_df = pd.read_excel(io.BytesIO(storage.unduh(res['secure_url'])))
+    m_df.columns = [str(c).strip() for c in m_df.columns]
+    store = DocStore(storage.meta, storage.unduh, storage.simpan_jika_versi)
+    p_progres = f"so_rawan_hilang/config/progres_v{v_id}.json"
+
+    def kode_terkirim():
+        # Sama dengan muat_kode_terkirim di app SO (listing hanya jika dokumen progres belum ada)
+        kode = store.muat(p_progres)
+        if kode is None:
+            dari_listing = {kode_dari_hasil(r['public_id']) for r in storage.daftar_semua(prefix) if f"_v{v_id}" in r['public_id']}
+            kode = store.update(p_progres, lambda d: sorted(set(d) | dari_listing), default=[])
+        return kode
+
+    def hapus_progres():
+        storage.hapus([p_progres])
+
+    def rankings_dingin():
+        # Versi master baru: tabel toko dibangun + semua toko terkirim diterapkan
+        progres = ProgresToko(m_df)
+        progres.sinkron(kode_terkirim())
+        progres.ringkasan()
+
+    progres_hangat = ProgresToko(m_df)
+    progres_hangat.sinkron(kode_terkirim())
+    sisa = iter(sorted(set(m_df['Toko'].astype(str)) - progres_hangat.sudah))
+
+    def rankings_inkremental():
+        # Rerun dashboard setelah 1 toko submit
+        kode = next(sisa, None)
+        if kode: store.update(p_progres, lambda d: d + [kode], default=[])
+        progres_hangat.sinkron(kode_terkirim())
+        progres_hangat.ringkasan()
+
+    def rekap():
+        all_f = [r for r in storage.daftar_semua(prefix) if f"_v{v_id}" in r['public_id']]
+        hasil, gagal = unduh_semua_hasil([(r['public_id'].split('/')[-1], r['secure_url']) for r in all_f], max_workers=8, unduh=storage.unduh)
+        if gagal: raise RuntimeError(f"{len(gagal)} file gagal")
+        rekap_df = gabung_rekap(m_df, list(hasil.values()))
+        ke_xlsx(rekap_df)
+
+    return {
+        "progress_rankings_dingin": (rankings_dingin, hapus_progres),
+        "progress_rankings_inkremental": (rankings_inkremental, None),
+        "rekap_gabung": (rekap, None),
+    }
+
+def skenario_apptest(storage, a):
+    """Rerun penuh app.py (AppTest, tanpa browser): login Area sampai 3 tab viewer tampil, lalu satu pencarian"""
+    from streamlit.testing.v1 import AppTest
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+    sesi = {}
+
+    def login():
+        at = AppTest.from_file(path, default_timeout=600)
+        at.run()
+        at.radio[0].set_value("Area").run()
+        next(t for t in at.text_input if t.label == "Username").set_value("user0001")
+        next(t for t in at.text_input if t.label == "Password").set_value(PASSWORD_UJI)
+        next(b for b in at.button if b.label == "Masuk").click().run()
+        if at.exception or not at.session_state['auth_area']: raise RuntimeError(f"Login gagal: {at.exception}")
+        sesi['at'] = at
+
+    def cari():
+        at = sesi['at']
+        kata = f"T{np.random.default_rng().integers(3000)}"
+        at.text_input(key="src_std_Area/NKL").set_value(kata).run()
+        if at.exception: raise RuntimeError(str(at.exception))
+
+    return {"login_sampai_tabel": (login, None), "cari_rerun": (cari, lambda: sesi.get('at') or login())}
+
+GRUP_SKENARIO = {"viewer": skenario_viewer, "rusak": skenario_rusak, "so": skenario_so, "apptest": skenario_apptest}
+
+# --- HASIL & PERBANDINGAN ---
+def commit_git():
+    try: return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except Exception: return None
+
+def banding(lama, baru, ambang=AMBANG_REGRESI):
+    """Cetak perubahan p50 / p95 / peak per skenario. Return daftar skenario yang regresi"""
+    regresi = []
+    print(f"\n{'Skenario':<32} {'p50 lama':>10} {'p50 baru':>10} {'Δ%':>7} {'p95 Δ%':>7} {'peak Δ%':>8}")
+    delta = lambda b, l: (b - l) / l * 100 if l else 0.0
+    for nama, b in baru["skenario"].items():
+        l = lama["skenario"].get(nama)
+        if not l or "error" in l or "error" in b:
+            print(f"{nama:<32} {'-':>10} {'-':>10}")
+            continue
+        d50, d95 = delta(b["p50_ms"], l["p50_ms"]), delta(b["p95_ms"], l["p95_ms"])
+        dpk = delta(b["peak_mb"] or 0, l["peak_mb"] or 0)
+        tanda = " <- regresi" if d50 > ambang and b["p50_ms"] - l["p50_ms"] > BEDA_MIN_MS else ""
+        if tanda: regresi.append(nama)
+        print(f"{nama:<32} {l['p50_ms']:>10.1f} {b['p50_ms']:>10.1f} {d50:>+7.1f} {d95:>+7.1f} {dpk:>+8.1f}{tanda}")
+    if lama.get("parameter") != baru.get("parameter"): print("⚠️ Parameter berbeda, perbandingan tidak apple-to-apple")
+    return regresi
+
+def jalankan(a):
+    os.environ["STORAGE_LOKAL"] = a.folder
+    logging.disable(logging.WARNING) # Warning "No runtime found" di luar `streamlit run`
+    from storage import PenyimpananLokal
+    from excel_engine import peak_rss_mb
+    from instrumen import pencatat
+    storage = PenyimpananLokal(a.folder)
+
+    parameter = {k: getattr(a, k) for k in ("baris", "toko", "item", "terkirim", "user", "rusak", "ulang")}
+    penanda = os.path.join(a.folder, "benchmark_data.json")
+    kunci_data = {k: v for k, v in parameter.items() if k != "ulang"}
+    try:
+        with open(penanda) as f: sudah = json.load(f) == kunci_data
+    except (OSError, ValueError): sudah = False
+    if not sudah:
+        print(f"Menyiapkan data sintetis di {a.folder} ...")
+        siapkan_data(storage, a)
+        with open(penanda, "w") as f: json.dump(kunci_data, f)
+
+    hasil = {
+        "waktu": datetime.now().isoformat(timespec="seconds"), "commit": commit_git(), "parameter": parameter,
+        "sistem": {"python": platform.python_version(), "pandas": pd.__version__, "platform": platform.platform(), "cpu": os.cpu_count()},
+        "skenario": {},
+    }
+    pilih = set(a.skenario) if a.skenario else None
+    print(f"\n{'Skenario':<32} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'peak MB':>8}")
+    for grup, buat in GRUP_SKENARIO.items():
+        if pilih and grup not in pilih: continue
+        try: daftar = buat(storage, a)
+        except Exception as e:
+            hasil["skenario"][grup] = {"error": f"Persiapan gagal: {e}"}
+            print(f"{grup:<32} GAGAL: {e}")
+            continue
+        for nama, (fn, siapkan) in daftar.items():
+            try:
+                r = hasil["skenario"][nama] = ukur(fn, a.ulang, siapkan)
+                print(f"{nama:<32} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['max_ms']:>9.1f} {r['peak_mb']:>8.1f}")
+            except Exception as e:
+                hasil["skenario"][nama] = {"error": str(e)}
+                print(f"{nama:<32} GAGAL: {e}")
+    hasil["peak_rss_mb"] = peak_rss_mb()
+    hasil["tahap"] = pencatat.ringkasan() # Rincian per tahap (instrumen) dari semua skenario
+    print(f"Puncak RSS proses: {hasil['peak_rss_mb']:.0f} MB" if hasil["peak_rss_mb"] else "")
+    return hasil
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Benchmark jalur panas viewer & admin SO (storage lokal)")
+    p.add_argument("--baris", type=int, default=20_000, help="baris workbook viewer (1k-500k)")
+    p.add_argument("--toko", type=int, default=200, help="jumlah toko master SO (10-2000)")
+    p.add_argument("--item", type=int, default=20, help="item per toko master SO")
+    p.add_argument("--terkirim", type=float, default=0.5, help="porsi toko yang sudah submit hasil")
+    p.add_argument("--user", type=int, default=500, help="jumlah akun di users_area.json")
+    p.add_argument("--rusak", type=int, default=5_000, help="entry rusak pabrik")
+    p.add_argument("--ulang", type=int, default=5, help="pengulangan per skenario")
+    p.add_argument("--skenario", nargs="*", choices=list(GRUP_SKENARIO), help="grup yang dijalankan (default semua)")
+    p.add_argument("--folder", help="folder storage lokal (data dipakai ulang jika parameter sama)")
+    p.add_argument("--keluar", help="file JSON hasil")
+    p.add_argument("--banding", nargs="+", metavar="JSON", help="LAMA [BARU]: bandingkan dengan hasil sebelumnya")
+    p.add_argument("--ambang", type=float, default=AMBANG_REGRESI, help="%% kenaikan p50 yang dianggap regresi")
+    a = p.parse_args(argv)
+
+    if a.banding and len(a.banding) == 2:
+        with open(a.banding[0]) as f1, open(a.banding[1]) as f2: regresi = banding(json.load(f1), json.load(f2), a.ambang)
+        return 1 if regresi else 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        a.folder = os.path.abspath(a.folder or tmp)
+        hasil = jalankan(a)
+    if a.keluar:
+        with open(a.keluar, "w") as f: json.dump(hasil, f, indent=2)
+        print(f"Hasil ditulis ke {a.keluar}")
+    if a.banding:
+        with open(a.banding[0]) as f: regresi = banding(json.load(f), hasil, a.ambang)
+        if regresi: return 1
+    return 1 if any("error" in r for r in hasil["skenario"].values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+from instrumen import tandai_cache
+
+# =================================================================
+# CACHE BERKUNCI - Kunci cache dipilih sendiri (versi / public_id),
+# argumen berat (DataFrame) diteruskan apa adanya tanpa di-hash
+# =================================================================
+SEMUA_CACHE = {} # modul.nama_fungsi -> CacheKunci (untuk statistik & clear sekaligus)
+
+_COW = None
+
+def _pandas_cow():
+    # pandas >= 3.0 selalu Copy-on-Write; versi lama hanya jika opsinya diaktifkan
+    global _COW
+    if _COW is None:
+        import pandas as pd
+        _COW = int(pd.__version__.split(".")[0]) >= 3 or pd.options.mode.copy_on_write is True
+    return _COW
+
+def salinan(hasil):
+    """Salinan untuk satu pemanggil: DataFrame / Series (juga di dalam tuple) di-copy, objek lain apa adanya"""
+    if isinstance(hasil, tuple): return tuple(salinan(h) for h in hasil)
+    if type(hasil).__module__.startswith("pandas") and hasattr(hasil, "copy"):
+        # Copy-on-Write: shallow copy sudah aman (ubahan in-place tidak sampai ke cache) & hampir gratis
+        return hasil.copy(deep=not _pandas_cow())
+    return hasil
+
+class CacheKunci:
+    """
+    LRU + TTL, dipakai bersama semua sesi. Hasil yang sama diberikan ke semua sesi:
+    salin=True -> tiap pemanggil dapat salinan (DataFrame yang akan diubah), salin=False -> hasil harus
+    diperlakukan read-only oleh pemanggil (objek index, list, dst).
+    """
+    def __init__(self, nama, ttl=None, max_entries=64, salin=False):
+        self.nama = nama
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.salin = salin
+        self._data = OrderedDict() # kunci -> (waktu_simpan, hasil)
+        self._lock = threading.Lock()
+        self._kunci_hitung = {}
+        self.hits = 0
+        self.misses = 0
+        self.detik_kunci = 0.0 # Total waktu membuat kunci
+        self.panggilan = 0
+
+    def get(self, kunci):
+        with self._lock:
+            simpanan = self._data.get(kunci)
+            if simpanan is None: return False, None
+            if self.ttl is not None and time.time() - simpanan[0] > self.ttl:
+                del self._data[kunci]
+                return False, None
+            self._data.move_to_end(kunci)
+            return True, simpanan[1]
+
+    def put(self, kunci, hasil):
+        with self._lock:
+            self._data[kunci] = (time.time(), hasil)
+            self._data.move_to_end(kunci)
+            while len(self._data) > self.max_entries: self._data.popitem(last=False)
+
+    def ambil(self, kunci, hitung):
+        """Ambil dari cache, atau panggil hitung() sekali saja walau diminta banyak sesi bersamaan"""
+        ada, hasil = self.get(kunci)
+        tandai_cache(ada)
+        if not ada:
+            with self._lock: lock_kunci = self._kunci_hitung.setdefault(kunci, threading.Lock())
+            try:
+                with lock_kunci:
+                    ada, hasil = self.get(kunci)
+                    if not ada:
+                        with self._lock: self.misses += 1
+                        hasil = hitung()
+                        self.put(kunci, hasil)
+                        return salinan(hasil) if self.salin else hasil
+            finally:
+                with self._lock: self._kunci_hitung.pop(kunci, None)
+        with self._lock: self.hits += 1
+        return salinan(hasil) if self.salin else hasil
+
+    def catat_kunci(self, detik):
+        with self._lock:
+            self.detik_kunci += detik
+            self.panggilan += 1
+
+    def clear(self):
+        with self._lock: self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "nama": self.nama, "entries": len(self._data), "hits": self.hits, "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "ms_kunci_rata2": (self.detik_kunci / self.panggilan * 1000) if self.panggilan else 0.0,
+            }
+
+def cache_kunci(kunci, ttl=None, max_entries=64, salin=False):
+    """
+    Dekorator pengganti st.cache_data untuk fungsi dengan argumen berat.
+    kunci(*args, **kwargs) -> tuple kecil hashable (mis. (public_id, version, sheet)).
+    salin=True untuk hasil DataFrame yang mungkin diubah pemanggil (st.cache_data selalu memberi salinan).
+    Contoh: @cache_kunci(lambda m_ver, df: m_ver)
+    """
+    def dekorator(fn):
+        # Script Streamlit dieksekusi ulang tiap rerun -> pakai lagi cache yang sudah ada untuk fungsi yang sama
+        nama = f"{fn.__module__}.{fn.__qualname__}"
+        cache = SEMUA_CACHE.get(nama)
+        if cache is None: cache = SEMUA_CACHE[nama] = CacheKunci(nama, ttl, max_entries, salin)
+
+        @functools.wraps(fn)
+        def bungkus(*args, **kwargs):
+            t0 = time.perf_counter()
+            k = kunci(*args, **kwargs)
+            cache.catat_kunci(time.perf_counter() - t0)
+            return cache.ambil(k, lambda: fn(*args, **kwargs))
+
+        bungkus.cache = cache
+        bungkus.clear = cache.clear
+        return bungkus
+    return dekorator
+
+def clear_semua():
+    for cache in SEMUA_CACHE.values(): cache.clear()
+
+def stats_semua():
+    return [cache.stats() for cache in SEMUA_CACHE.values()]
@@ -0,0 +1,101 @@
+import sys
+import time
+import numpy as np
+
+# =================================================================
+# INDEX RUSAK PABRIK - Cari foto per Kode Toko / No NRB / Bulan
+# =================================================================
+class IndexRusak:
+    """
+    Dibangun sekali dari list entry (semua partisi bulan), lalu dipakai tiap pencarian.
+    Per kolom disimpan nilai terurut + posisi baris -> prefix lookup cukup 2x binary search.
+    Urutan hasil: Input_Time terbaru di atas.
+    """
+    def __init__(self, entries):
+        # Urutkan sekali dari terbaru, sehingga id baris = peringkat hasil
+        waktu = np.array([str(e.get("Input_Time") or "") for e in entries], dtype=object)
+        urut = np.argsort(waktu, kind="stable")[::-1]
+        self.entries = [entries[i] for i in urut]
+        self._toko = self._buat_index([e.get("Kode_Toko") for e in self.entries])
+        self._nrb = self._buat_index([e.get("No_NRB") for e in self.entries])
+        # Bulan cocok ke Bulan_Upload atau Tanggal_NRB (YYYY-MM-DD), sama seperti pencarian lama
+        n = len(self.entries)
+        self._bulan = self._buat_index(
+            [e.get("Bulan_Upload") for e in self.entries] + [e.get("Tanggal_NRB") for e in self.entries],
+            posisi=np.tile(np.arange(n), 2),
+        )
+
+    def __len__(self): return len(self.entries)
+
+    @staticmethod
+    def _buat_index(nilai, posisi=None):
+        teks = np.array([str(v).upper() if v is not None else "" for v in nilai], dtype=str)
+        if posisi is None: posisi = np.arange(len(teks))
+        urut = np.argsort(teks, kind="stable")
+        return teks[urut], posisi[urut]
+
+    @staticmethod
+    def _prefix(index, awalan):
+        kunci, posisi = index
+        kiri = np.searchsorted(kunci, awalan, side="left")
+        kanan = np.searchsorted(kunci, awalan + "\uffff", side="left")
+        return posisi[kiri:kanan]
+
+    def cari_id(self, toko="", nrb="", bulan=""):
+        """Id baris (urut terbaru) yang cocok dengan semua awalan yang diisi"""
+        hasil = None
+        for index, awalan in ((self._toko, toko), (self._nrb, nrb), (self._bulan, bulan)):
+            awalan = (awalan or "").strip().upper()
+            if not awalan: continue
+            ids = np.unique(self._prefix(index, awalan))
+            hasil = ids if hasil is None else np.intersect1d(hasil, ids, assume_unique=True)
+            if not len(hasil): break
+        return np.arange(len(self.entries)) if hasil is None else hasil
+
+    def cari(self, toko="", nrb="", bulan="", halaman=1, ukuran=20):
+        """Return (entry di halaman tsb, total cocok)"""
+        ids = self.cari_id(toko, nrb, bulan)
+        mulai = (max(1, halaman) - 1) * ukuran
+        return [self.entries[i] for i in ids[mulai:mulai + ukuran]], len(ids)
+
+# --- BENCHMARK (python cari_rusak.py [jumlah_entry]) ---
+def _entry_sintetis(n, seed=0):
+    rng = np.random.default_rng(seed)
+    toko = [f"T{a}{b:02d}" for a in "ABCDEFGHJK" for b in range(100)]
+    hasil = []
+    for i in range(n):
+        bln = f"2025-{rng.integers(1, 13):02d}"
+        hasil.append({
+            "Input_Time": f"{bln}-{rng.integers(1, 29):02d} {rng.integers(0, 24):02d}:00:{i % 60:02d}",
+            "Bulan_Upload": bln,
+            "Kode_Toko": toko[rng.integers(len(toko))],
+            "No_NRB": f"NRB{rng.integers(10**6):06d}",
+            "Tanggal_NRB": f"{bln}-{rng.integers(1, 29):02d}",
+            "Bukti_Foto": f"https://res.cloudinary.com/x/image/upload/v1/foto_{i}.jpg",
+        })
+    return hasil
+
+def _cari_lama(entries, toko, nrb, bulan):
+    # Cara lama: DataFrame penuh + str.contains tiap klik
+    import pandas as pd
+    df = pd.DataFrame(entries)
+    mask = pd.Series([True] * len(df))
+    if toko: mask &= df['Kode_Toko'].str.contains(toko.upper(), na=False)
+    if nrb: mask &= df['No_NRB'].str.contains(nrb.upper(), na=False)
+    if bulan: mask &= (df['Tanggal_NRB'].astype(str).str.contains(bulan) | df['Bulan_Upload'].astype(str).str.contains(bulan))
+    return int(mask.sum())
+
+def benchmark(n=100_000):
+    entries = _entry_sintetis(n)
+    t0 = time.perf_counter(); index = IndexRusak(entries); t_bangun = time.perf_counter() - t0
+    print(f"{n:,} entry, bangun index {t_bangun:.3f} detik")
+    print(f"{'Query':<28} {'Cocok':>7} {'Lama (ms)':>10} {'Index (ms)':>11} {'Sama':>5}")
+    for toko, nrb, bulan in (("TA", "", ""), ("TB05", "", ""), ("", "NRB12", ""), ("", "", "2025-03"), ("TC", "", "2025-07"), ("TZ99", "", "")):
+        t0 = time.perf_counter(); jml_lama = _cari_lama(entries, toko, nrb, bulan); t1 = time.perf_counter()
+        for _ in range(10): halaman, total = index.cari(toko, nrb, bulan, halaman=2)
+        t2 = time.perf_counter()
+        # Awalan kode toko / NRB / bulan di data sintetis juga tidak muncul di tengah teks -> jumlah harus sama
+        print(f"{f'{toko}|{nrb}|{bulan}':<28} {total:>7} {(t1 - t0) * 1000:>10.1f} {(t2 - t1) * 100:>11.2f} {str(total == jml_lama):>5}")
+
+if __name__ == "__main__":
+    benchmark(*map(int, sys.argv[1:]))
@@ -0,0 +1,454 @@
+import io
+import os
+import sys
+import time
+import tracemalloc
+import hashlib
+import importlib.util
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime, time as dtime
+import pandas as pd
+from pandas.io.parsers import TextParser
+from openpyxl import load_workbook
+from openpyxl.cell.cell import ERROR_CODES
+from instrumen import diukur, tandai_cache
+from storage import unduh_url
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Calamine (Rust) lebih cepat tapi memuat seluruh sheet sekaligus: hanya dipakai jika diminta (EXCEL_CALAMINE=1).
+# Default = streaming openpyxl, memori terbatas MAX_BARIS x MAX_KOLOM berapa pun ukuran file.
+ADA_CALAMINE = importlib.util.find_spec("python_calamine") is not None
+PAKAI_CALAMINE = ADA_CALAMINE and os.environ.get("EXCEL_CALAMINE") == "1"
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+# Batas baca per sheet, agar memori tetap terbatas walau file sangat besar
+MAX_BARIS = 300_000
+MAX_KOLOM = 250
+
+# =================================================================
+# WORKBOOK CACHE - Satu kali download per file (public_id + version)
+# =================================================================
+class WorkbookCache:
+    """Cache bytes workbook (LRU) dengan batas total ukuran & jumlah file"""
+    def __init__(self, max_bytes=150 * 1024 * 1024, max_items=32):
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._unduhan = {} # key -> Future download yang sedang berjalan
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.gagal = 0
+        self.evictions = 0
+        self.bytes_evicted = 0
+
+    def get(self, key):
+        with self._lock:
+            blob = self._data.get(key)
+            if blob is None: return None
+            self._data.move_to_end(key)
+            return blob
+
+    def put(self, key, blob):
+        with self._lock:
+            lama = self._data.pop(key, None)
+            if lama is not None: self.total_bytes -= len(lama)
+            if len(blob) > self.max_bytes: return # Terlalu besar, tidak disimpan
+            self._data[key] = blob
+            self.total_bytes += len(blob)
+            while self.total_bytes > self.max_bytes or len(self._data) > self.max_items:
+                _, dibuang = self._data.popitem(last=False)
+                self.total_bytes -= len(dibuang)
+                self.evictions += 1
+                self.bytes_evicted += len(dibuang)
+
+    def ambil(self, key, unduh):
+        """
+        Ambil dari cache, atau panggil unduh() sekali saja walau diminta banyak sesi bersamaan.
+        Jika unduh() gagal, semua yang sedang menunggu menerima error yang sama (tidak mengulang
+        download satu per satu); kegagalan tidak di-cache, permintaan berikutnya mencoba lagi.
+        """
+        with self._lock:
+            blob = self._data.get(key)
+            if blob is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+            else:
+                unduhan = self._unduhan.get(key)
+                pengunduh = unduhan is None
+                if pengunduh:
+                    unduhan = self._unduhan[key] = Future()
+                    self.misses += 1
+        tandai_cache(blob is not None)
+        if blob is not None: return blob
+        if not pengunduh:
+            blob = unduhan.result() # Error pengunduh ikut di-raise di sini
+            with self._lock: self.hits += 1
+            return blob
+        try:
+            blob = unduh()
+            self.put(key, blob)
+        except BaseException as e:
+            with self._lock:
+                self.gagal += 1
+                self._unduhan.pop(key, None)
+            unduhan.set_exception(e)
+            raise
+        with self._lock: self._unduhan.pop(key, None)
+        unduhan.set_result(blob)
+        return blob
+
+    def hapus_file(self, public_id):
+        with self._lock:
+            for key in [k for k in self._data if k[0] == public_id]:
+                self.total_bytes -= len(self._data.pop(key))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "files": len(self._data), "bytes": self.total_bytes, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses, "gagal": self.gagal,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "evictions": self.evictions, "bytes_evicted": self.bytes_evicted,
+            }
+
+workbook_cache = WorkbookCache()
+
+@diukur("unduh_workbook", bytes_hasil=len)
+def unduh_bytes(url):
+    # https:// (Cloudinary) maupun file:// (storage lokal)
+    return unduh_url(url)
+
+def ambil_workbook(public_id, version, url):
+    return workbook_cache.ambil((public_id, str(version)), lambda: unduh_bytes(url))
+
+# =================================================================
+# SHEET CACHE - Parse xlsx sekali, ganti header / mode teks di memori
+# =================================================================
+# Kode tipe sel untuk simpan grid mentah ke Parquet (kolom teks + kolom kode)
+KOSONG, TEKS, BULAT, DESIMAL, BOOL, TANGGAL, JAM = range(7)
+_KE_NILAI = {
+    TEKS: str, BULAT: int, DESIMAL: float, BOOL: lambda s: s == "True",
+    TANGGAL: datetime.fromisoformat, JAM: dtime.fromisoformat,
+}
+
+def _kode_tipe(v):
+    if v is None or (isinstance(v, float) and v != v) or v == "": return KOSONG
+    if isinstance(v, bool): return BOOL
+    if isinstance(v, int): return BULAT
+    if isinstance(v, float): return DESIMAL
+    if isinstance(v, str): return TEKS
+    if isinstance(v, datetime): return TANGGAL
+    if isinstance(v, dtime): return JAM
+    raise TypeError(type(v).__name__)
+
+def grid_ke_parquet(grid):
+    kolom = {}
+    for i, col in enumerate(grid.columns):
+        nilai = grid[col].tolist()
+        kode = [_kode_tipe(v) for v in nilai]
+        kolom[f"t{i}"] = pa.array([None if k == KOSONG else str(v) for v, k in zip(nilai, kode)], pa.string())
+        kolom[f"k{i}"] = pa.array(kode, pa.int8())
+    meta = {b"terpotong": b"1" if grid.attrs.get("terpotong") else b"0"}
+    buf = io.BytesIO()
+    pq.write_table(pa.table(kolom).replace_schema_metadata(meta), buf, compression="zstd")
+    return buf.getvalue()
+
+@diukur("parse_parquet")
+def parquet_ke_grid(blob):
+    tabel = pq.read_table(io.BytesIO(blob))
+    data = {}
+    for i in range(tabel.num_columns // 2):
+        teks = tabel.column(f"t{i}").to_pylist()
+        kode = tabel.column(f"k{i}").to_pylist()
+        data[i] = [float('nan') if k == KOSONG else _KE_NILAI[k](t) for t, k in zip(teks, kode)]
+    grid = pd.DataFrame(data, dtype=object)
+    grid.attrs["terpotong"] = (tabel.schema.metadata or {}).get(b"terpotong") == b"1"
+    return grid
+
+class SheetCache:
+    """
+    Grid mentah per sheet (tanpa header, tipe asli openpyxl).
+    Tier 1: memori (LRU). Tier 2: Parquet di disk lokal (jika pyarrow tersedia), dibatasi `max_disk_bytes`
+    (LRU per mtime, dibaca = disentuh). Versi lama file yang sama dihapus saat versi baru ditulis.
+    """
+    def __init__(self, max_items=8, folder=None, max_disk_bytes=512 * 1024 * 1024):
+        self.max_items = max_items
+        self.folder = folder or os.path.join(tempfile.gettempdir(), "excel_web_sheet_cache")
+        self.max_disk_bytes = max_disk_bytes
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._lock_disk = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_dibuang = 0
+
+    @staticmethod
+    def _hash(teks):
+        return hashlib.md5(str(teks).encode()).hexdigest()[:16]
+
+    def _path(self, key):
+        # {public_id}_{version}_{sheet} -> file versi lama milik public_id yang sama bisa dikenali
+        public_id, version, *sisa = key
+        return os.path.join(self.folder, f"{self._hash(public_id)}_{self._hash(version)}_{self._hash(sisa)}.parquet")
+
+    def _simpan_memori(self, key, grid):
+        with self._lock:
+            self._data[key] = grid
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_items: self._data.popitem(last=False)
+
+    def ambil(self, key, parse):
+        with self._lock:
+            grid = self._data.get(key)
+            if grid is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+        if grid is not None:
+            tandai_cache(True)
+            return grid
+        grid = self._baca_disk(key)
+        tandai_cache(grid is not None) # Hit cache disk juga dihitung hit
+        if grid is not None:
+            with self._lock: self.disk_hits += 1
+        else:
+            with self._lock: self.misses += 1
+            grid = parse()
+            self._tulis_disk(key, grid)
+        self._simpan_memori(key, grid)
+        return grid
+
+    def _tulis_disk(self, key, grid):
+        if pq is None: return
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            path = self._path(key)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f: f.write(grid_ke_parquet(grid))
+            os.replace(tmp, path)
+        except Exception: return # Tipe sel tidak dikenal / disk penuh -> cukup cache memori
+        self._rapikan_disk(path)
+
+    def _rapikan_disk(self, path_baru):
+        """Hapus versi lama milik public_id yang sama, lalu file paling lama tidak dipakai sampai <= max_disk_bytes"""
+        nama_baru = os.path.basename(path_baru)
+        awalan_file, awalan_versi = nama_baru.split("_")[0] + "_", "_".join(nama_baru.split("_")[:2]) + "_"
+        with self._lock_disk:
+            try:
+                daftar = []
+                for e in os.scandir(self.folder):
+                    if not e.is_file(): continue
+                    if e.name.startswith(awalan_file) and not e.name.startswith(awalan_versi):
+                        self._hapus_path(e.path) # Versi lama (file sudah di-overwrite admin)
+                        continue
+                    st_ = e.stat()
+                    daftar.append((st_.st_mtime, st_.st_size, e.path))
+                total = sum(d[1] for d in daftar)
+                for _, ukuran, path in sorted(daftar):
+                    if total <= self.max_disk_bytes: break
+                    if path == path_baru: continue
+                    self._hapus_path(path)
+                    total -= ukuran
+            except OSError: pass
+
+    def _hapus_path(self, path):
+        try:
+            os.remove(path)
+            self.disk_dibuang += 1
+        except OSError: pass
+
+    def _baca_disk(self, key):
+        path = self._path(key)
+        if pq is None or not os.path.exists(path): return None
+        try:
+            with open(path, "rb") as f: grid = parquet_ke_grid(f.read())
+        except Exception:
+            return None
+        try: os.utime(path) # LRU disk: mtime = terakhir dipakai
+        except OSError: pass
+        return grid
+
+    def hapus_file(self, public_id):
+        """File dihapus admin: buang semua versi & sheet-nya (memori + disk)"""
+        with self._lock:
+            for key in [k for k in self._data if k[0] == public_id]: del self._data[key]
+        awalan = self._hash(public_id) + "_"
+        with self._lock_disk:
+            if os.path.isdir(self.folder):
+                for nama in os.listdir(self.folder):
+                    if nama.startswith(awalan): self._hapus_path(os.path.join(self.folder, nama))
+
+    def clear(self, disk=False):
+        with self._lock: self._data.clear()
+        if disk and os.path.isdir(self.folder):
+            for nama in os.listdir(self.folder):
+                try: os.remove(os.path.join(self.folder, nama))
+                except OSError: pass
+
+    def stats(self):
+        with self._lock:
+            return {"sheets": len(self._data), "hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                    "disk_dibuang": self.disk_dibuang}
+
+sheet_cache = SheetCache()
+
+def _nilai_sel(v):
+    # Konversi sama seperti reader openpyxl milik pandas
+    if v is None or v == "": return None
+    if isinstance(v, float) and v.is_integer(): return int(v)
+    if isinstance(v, str) and v in ERROR_CODES: return float('nan')
+    return v
+
+def baca_grid_stream(blob, sheet_name, max_rows=MAX_BARIS, max_cols=MAX_KOLOM):
+    """Baca 1 sheet baris per baris (openpyxl read_only), berhenti di max_rows x max_cols"""
+    wb = load_workbook(io.BytesIO(blob), read_only=True, data_only=True)
+    try:
+        ws = wb[sheet_name]
+        ws.reset_dimensions() # Dimensi di file sering salah, baca apa adanya
+        rows, terakhir, terpotong = [], -1, False
+        for i, row in enumerate(ws.iter_rows(max_col=max_cols + 1, values_only=True)):
+            if i >= max_rows:
+                terpotong = True
+                break
+            r = [_nilai_sel(v) for v in row[:max_cols]]
+            if len(row) > max_cols and any(v is not None for v in row[max_cols:]): terpotong = True
+            while r and r[-1] is None: r.pop()
+            if r: terakhir = i
+            rows.append(r)
+    finally:
+        wb.close()
+    del rows[terakhir + 1:]
+    grid = pd.DataFrame(rows, dtype=object)
+    grid.attrs["terpotong"] = terpotong
+    return grid
+
+def baca_grid_calamine(blob, sheet_name, max_rows=MAX_BARIS, max_cols=MAX_KOLOM):
+    """Baris dibatasi saat baca (nrows), kolom lebih dari max_cols (+1 untuk cek terpotong) tidak masuk DataFrame"""
+    grid = pd.read_excel(io.BytesIO(blob), sheet_name=sheet_name, header=None, dtype=object, engine="calamine",
+                         nrows=max_rows + 1, usecols=lambda c: c <= max_cols)
+    terpotong = len(grid) > max_rows or grid.shape[1] > max_cols
+    grid = grid.iloc[:max_rows, :max_cols]
+    grid.attrs["terpotong"] = terpotong
+    return grid
+
+@diukur("parse_xlsx")
+def baca_grid(blob, sheet_name, max_rows=MAX_BARIS, max_cols=MAX_KOLOM):
+    if PAKAI_CALAMINE:
+        try: return baca_grid_calamine(blob, sheet_name, max_rows, max_cols)
+        except Exception: pass
+    return baca_grid_stream(blob, sheet_name, max_rows, max_cols)
+
+def peak_rss_mb():
+    """Puncak memori proses (MB), untuk monitoring"""
+    if resource is None: return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+def ambil_grid(public_id, version, url, sheet_name, sidecar=None):
+    """sidecar: info file parquet hasil ingest (public_id, version, secure_url) jika ada"""
+    key = (public_id, str(version), sheet_name)
+    def parse():
+        if sidecar and pq is not None:
+            try: return parquet_ke_grid(ambil_workbook(sidecar['public_id'], sidecar['version'], sidecar['secure_url']))
+            except Exception: pass # Sidecar rusak / hilang -> baca xlsx
+        return baca_grid(ambil_workbook(public_id, version, url), sheet_name)
+    return sheet_cache.ambil(key, parse)
+
+@diukur("susun_tabel")
+def susun_tabel(grid, header_row, force_text=False):
+    """Hasil sama dengan pd.read_excel(header=..., dtype=...) tapi dari grid di memori"""
+    row_idx = header_row - 1 if header_row > 0 else 0
+    rows = grid.where(grid.notna(), "").values.tolist()
+    if force_text:
+        df = TextParser(rows, header=row_idx, dtype=str, skip_blank_lines=False).read().fillna("")
+    else:
+        df = TextParser(rows, header=row_idx, skip_blank_lines=False).read()
+    df.columns = df.columns.astype(str)
+    df.attrs["terpotong"] = grid.attrs.get("terpotong", False)
+    return df
+
+def daftar_sheet(blob):
+    wb = load_workbook(io.BytesIO(blob), read_only=True)
+    try: return wb.sheetnames
+    finally: wb.close()
+
+# =================================================================
+# INGEST - Sidecar Parquet per sheet + manifest saat admin upload
+# =================================================================
+SUFFIX_MANIFEST = ".manifest.json"
+
+def id_sidecar(xlsx_public_id, idx):
+    return f"{xlsx_public_id}.sheet{idx}.parquet"
+
+def id_manifest(xlsx_public_id):
+    return f"{xlsx_public_id}{SUFFIX_MANIFEST}"
+
+def is_sidecar(public_id):
+    return public_id.endswith(".parquet") or public_id.endswith(SUFFIX_MANIFEST)
+
+def buat_sidecar(blob, xlsx_public_id):
+    """Parse semua sheet sekali. Return (manifest, list (public_id sidecar, bytes parquet))"""
+    if pq is None: return None, []
+    manifest, files = {"sheets": []}, []
+    for i, nama in enumerate(daftar_sheet(blob)):
+        grid = baca_grid(blob, nama)
+        p_id = id_sidecar(xlsx_public_id, i)
+        files.append((p_id, grid_ke_parquet(grid)))
+        manifest["sheets"].append({"nama": nama, "baris": len(grid), "kolom": grid.shape[1], "file": p_id})
+    return manifest, files
+
+def sidecar_usang(xlsx_public_id, manifest, ada):
+    """public_id sidecar / manifest milik xlsx ini (dari `ada`) yang tidak dipakai manifest baru (None = semua)"""
+    dipakai = {x['file'] for x in manifest['sheets']} | {id_manifest(xlsx_public_id)} if manifest else set()
+    awalan = f"{xlsx_public_id}.sheet"
+    return [p for p in ada if p not in dipakai and
+            ((p.startswith(awalan) and p.endswith(".parquet")) or p == id_manifest(xlsx_public_id))]
+
+# --- BENCHMARK MEMORI (python excel_engine.py [jumlah_baris]) ---
+def ukur(fn, *args, **kwargs):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    try:
+        hasil = fn(*args, **kwargs)
+        return hasil, time.perf_counter() - t0, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def benchmark(n_rows=20000, n_cols=15):
+    import numpy as np
+    df = pd.DataFrame({f"k{i}": np.arange(n_rows) * 1.5 if i % 2 else [f"teks{j}" for j in range(n_rows)] for i in range(n_cols)})
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf) as w:
+        df.to_excel(w, sheet_name="Data", index=False)
+        df.head(10).to_excel(w, sheet_name="Lain", index=False)
+    blob = buf.getvalue()
+    print(f"Workbook {len(blob) / 1e6:.1f} MB, {n_rows} x {n_cols}")
+    _, dt, peak = ukur(pd.read_excel, io.BytesIO(blob), sheet_name="Data", header=None, dtype=object)
+    print(f"{'pd.read_excel':<28} {dt:7.2f} s  peak {peak / 1e6:7.1f} MB")
+    for batas in (None, n_rows // 4):
+        grid, dt, peak = ukur(baca_grid_stream, blob, "Data", max_rows=batas or MAX_BARIS)
+        label = f"stream (max {batas or MAX_BARIS} baris)"
+        print(f"{label:<28} {dt:7.2f} s  peak {peak / 1e6:7.1f} MB  terpotong={grid.attrs['terpotong']}")
+
+if __name__ == "__main__":
+    benchmark(*map(int, sys.argv[1:]))
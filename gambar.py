@@ -0,0 +1,57 @@
+import io
+from PIL import Image, ImageOps
+
+# =================================================================
+# PRA-PROSES FOTO - Kecilkan di server sebelum upload ke Cloudinary
+# =================================================================
+LEBAR_MAKS = 800 # Sama dengan transformasi 'limit' Cloudinary sebelumnya
+KUALITAS_JPEG = 80
+MAKS_BYTES = 15 * 1024 * 1024 # Foto kamera HP umumnya < 10 MB
+MAKS_PIKSEL = 40_000_000 # ~8000x5000. Di atas ini ditolak sebelum di-decode (decompression bomb)
+
+def cek_foto(file_foto, maks_bytes=MAKS_BYTES, maks_piksel=MAKS_PIKSEL):
+    """(ok, pesan). Hanya cek ukuran file & resolusi dari header, piksel belum di-decode"""
+    ukuran = getattr(file_foto, "size", None)
+    if ukuran is None: ukuran = len(file_foto if isinstance(file_foto, bytes) else file_foto.getvalue())
+    if ukuran > maks_bytes:
+        return False, f"⚠️ Gagal: Ukuran foto melebihi {maks_bytes // (1024 * 1024)} MB."
+    blob = file_foto if isinstance(file_foto, bytes) else file_foto.getvalue()
+    try:
+        with Image.open(io.BytesIO(blob)) as img: lebar, tinggi = img.size
+    except Exception:
+        return True, "" # Tidak terbaca Pillow: tetap diupload apa adanya (lihat kecilkan_foto)
+    if lebar * tinggi > maks_piksel:
+        return False, f"⚠️ Gagal: Resolusi foto terlalu besar ({lebar}x{tinggi}). Silakan screenshot dulu."
+    return True, ""
+
+def kecilkan_foto(file_foto, lebar_maks=LEBAR_MAKS, kualitas=KUALITAS_JPEG):
+    """
+    file_foto: bytes / file-like (UploadedFile). Return (bytes JPEG, ukuran_asli, ukuran_baru).
+    Orientasi EXIF diterapkan, transparansi diganti putih. File yang tidak bisa dibaca Pillow
+    dikembalikan apa adanya agar tetap bisa diupload.
+    """
+    blob = file_foto if isinstance(file_foto, bytes) else file_foto.getvalue()
+    try:
+        img = Image.open(io.BytesIO(blob))
+        img = ImageOps.exif_transpose(img)
+    except Exception:
+        return blob, len(blob), len(blob)
+
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGBA")
+        latar = Image.new("RGB", img.size, (255, 255, 255))
+        latar.paste(img, mask=img.getchannel("A"))
+        img = latar
+    elif img.mode != "RGB":
+        img = img.convert("RGB")
+
+    if img.width > lebar_maks:
+        img = img.resize((lebar_maks, max(1, round(img.height * lebar_maks / img.width))), Image.LANCZOS)
+
+    out = io.BytesIO()
+    img.save(out, format="JPEG", quality=kualitas, optimize=True, progressive=True)
+    hasil = out.getvalue()
+    # Foto kecil yang sudah JPEG bisa jadi lebih besar setelah encode ulang -> pakai yang asli
+    if len(hasil) >= len(blob) and blob[:3] == b"\xff\xd8\xff" and img.width <= lebar_maks:
+        return blob, len(blob), len(blob)
+    return hasil, len(blob), len(hasil)
@@ -0,0 +1,138 @@
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# =================================================================
+# HTTP CLIENT - Satu session bersama (pool koneksi keep-alive) untuk semua download
+# =================================================================
+# Session requests dipakai bersama antar thread (hanya GET, tanpa cookie / ubah header session).
+TIMEOUT_KONEKSI = 5 # detik sampai koneksi TCP/TLS terbentuk
+TIMEOUT_BACA = 30 # detik maksimal tanpa data masuk
+MAKS_KONEKSI = 16 # Per host, >= jumlah worker download paralel (rekap)
+MAKS_ULANG = 3
+JEDA_AWAL = 0.5
+JEDA_MAKS = 8.0
+STATUS_ULANG = {408, 425, 429, 500, 502, 503, 504}
+ERROR_ULANG = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+class AdapterHitung(HTTPAdapter):
+    """
+    HTTPAdapter yang menghitung koneksi TCP baru lewat hook publik urllib3: pool dengan ConnectionCls
+    turunan yang memanggil hitung() setiap connect(). Tanpa membaca atribut privat pool.
+    """
+    def __init__(self, hitung, **kw):
+        self._hitung = hitung # Diset sebelum super().__init__ (yang memanggil init_poolmanager)
+        super().__init__(**kw)
+
+    def _kelas_pool(self, pool_cls, conn_cls):
+        hitung = self._hitung
+        class Koneksi(conn_cls):
+            def connect(self):
+                hitung()
+                return super().connect()
+        return type(pool_cls.__name__, (pool_cls,), {"ConnectionCls": Koneksi})
+
+    def init_poolmanager(self, *args, **kw):
+        super().init_poolmanager(*args, **kw)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": self._kelas_pool(HTTPConnectionPool, HTTPConnection),
+            "https": self._kelas_pool(HTTPSConnectionPool, HTTPSConnection),
+        }
+
+class KlienHTTP:
+    """
+    GET dengan pool koneksi, timeout (koneksi, baca), retry backoff eksponensial + jitter (terbatas),
+    gzip opsional. stats(): jumlah request, koneksi baru vs dipakai ulang, retry, bytes.
+    """
+    def __init__(self, timeout=(TIMEOUT_KONEKSI, TIMEOUT_BACA), maks_koneksi=MAKS_KONEKSI,
+                 maks_ulang=MAKS_ULANG, jeda_awal=JEDA_AWAL, jeda_maks=JEDA_MAKS, gzip=True):
+        self.timeout = timeout
+        self.maks_ulang = maks_ulang
+        self.jeda_awal = jeda_awal
+        self.jeda_maks = jeda_maks
+        self.gzip = gzip
+        self.session = requests.Session()
+        # Retry diatur sendiri (termasuk error saat membaca body), adapter tidak retry
+        self._adapter = AdapterHitung(self._koneksi_baru, pool_connections=8, pool_maxsize=maks_koneksi, max_retries=0, pool_block=False)
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+        self._lock = threading.Lock()
+        self.koneksi = 0
+        self.request = 0
+        self.sukses = 0
+        self.gagal = 0
+        self.retry = 0
+        self.bytes = 0
+        self.respons_gzip = 0
+        self.detik = 0.0
+
+    def _koneksi_baru(self):
+        with self._lock: self.koneksi += 1
+
+    def _jeda(self, coba, retry_after=None):
+        if retry_after is not None:
+            try: return min(float(retry_after), self.jeda_maks)
+            except ValueError: pass
+        return random.uniform(0, min(self.jeda_maks, self.jeda_awal * 2 ** coba))
+
+    def get(self, url, timeout=None, gzip=None, headers=None):
+        """requests.Response (sudah dibaca penuh). Status 4xx (selain 408/425/429) langsung raise, tanpa retry"""
+        hdr = dict(headers or {})
+        if not (self.gzip if gzip is None else gzip): hdr["Accept-Encoding"] = "identity" # mis. xlsx (sudah zip)
+        timeout = timeout or self.timeout
+        for coba in range(self.maks_ulang + 1):
+            with self._lock: self.request += 1
+            t0 = time.perf_counter()
+            retry_after = None
+            try:
+                resp = self.session.get(url, timeout=timeout, headers=hdr)
+                konten = resp.content # Body dibaca di sini -> error di tengah download ikut di-retry
+                if resp.status_code in STATUS_ULANG and coba < self.maks_ulang:
+                    retry_after = resp.headers.get("Retry-After")
+                    resp.close()
+                    raise requests.HTTPError(f"{resp.status_code} {resp.reason}", response=resp)
+                resp.raise_for_status()
+            except requests.HTTPError as e:
+                with self._lock: self.detik += time.perf_counter() - t0
+                if e.response is None or e.response.status_code not in STATUS_ULANG or coba == self.maks_ulang:
+                    with self._lock: self.gagal += 1
+                    raise
+            except ERROR_ULANG:
+                with self._lock: self.detik += time.perf_counter() - t0
+                if coba == self.maks_ulang:
+                    with self._lock: self.gagal += 1
+                    raise
+            else:
+                with self._lock:
+                    self.detik += time.perf_counter() - t0
+                    self.sukses += 1
+                    self.bytes += len(konten)
+                    self.respons_gzip += "gzip" in resp.headers.get("Content-Encoding", "")
+                return resp
+            with self._lock: self.retry += 1
+            time.sleep(self._jeda(coba, retry_after))
+
+    def unduh(self, url, timeout=None, gzip=None):
+        return self.get(url, timeout=timeout, gzip=gzip).content
+
+    def stats(self):
+        # koneksi_baru = connect() TCP yang benar-benar terjadi; sisanya request lewat koneksi keep-alive
+        with self._lock:
+            return {
+                "request": self.request, "sukses": self.sukses, "gagal": self.gagal, "retry": self.retry,
+                "mb": self.bytes / 1e6, "respons_gzip": self.respons_gzip,
+                "ms_rata2": (self.detik / self.request * 1000) if self.request else 0.0,
+                "koneksi_baru": self.koneksi,
+                "koneksi_dipakai_ulang": max(0, self.request - self.koneksi),
+                "rasio_pakai_ulang": max(0.0, 1 - self.koneksi / self.request) if self.request else 0.0,
+            }
+
+klien = KlienHTTP()
+
+def unduh(url, timeout=None, gzip=None):
+    """Download bytes lewat session bersama"""
+    return klien.unduh(url, timeout=timeout, gzip=gzip)
@@ -0,0 +1,139 @@
+import functools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# =================================================================
+# INSTRUMENTASI - Durasi, bytes & cache hit/miss per tahap, dikelompokkan per rerun
+# =================================================================
+# Satu rerun Streamlit = satu thread script -> tahap yang aktif disimpan di threading.local.
+# Tahap dari thread lain (worker / prefetch) tetap masuk agregat, tanpa rerun.
+MAKS_RERUN = 50 # Rerun terakhir yang disimpan untuk panel
+MAKS_SAMPEL = 2000 # Sampel per tahap untuk persentil
+MAKS_TAHAP_RERUN = 300 # Rerun dengan tahap sangat banyak (mis. rekap ratusan file) dipotong, agregat tetap lengkap
+
+def persentil(nilai_urut, p):
+    if not nilai_urut: return 0.0
+    i = (len(nilai_urut) - 1) * p / 100
+    bawah = int(i)
+    atas = min(bawah + 1, len(nilai_urut) - 1)
+    return nilai_urut[bawah] + (nilai_urut[atas] - nilai_urut[bawah]) * (i - bawah)
+
+class Pencatat:
+    def __init__(self, maks_rerun=MAKS_RERUN, maks_sampel=MAKS_SAMPEL):
+        self.maks_sampel = maks_sampel
+        self._lokal = threading.local()
+        self._lock = threading.Lock()
+        self._rerun = deque(maxlen=maks_rerun)
+        self._sampel = {} # nama tahap -> deque (ms, bytes, hit)
+
+    def _stack(self):
+        stack = getattr(self._lokal, "stack", None)
+        if stack is None: stack = self._lokal.stack = []
+        return stack
+
+    @contextmanager
+    def rerun(self, label=""):
+        """Bungkus satu eksekusi script. st.rerun() / st.stop() (exception) tetap tercatat"""
+        catatan = {"mulai": datetime.now().strftime("%H:%M:%S"), "label": label, "tahap": [], "ms": 0.0, "terpotong": 0}
+        self._lokal.rerun, self._lokal.t0, self._lokal.stack = catatan, time.perf_counter(), []
+        try:
+            yield catatan
+        finally:
+            catatan["ms"] = (time.perf_counter() - self._lokal.t0) * 1000
+            self._lokal.rerun = None
+            with self._lock: self._rerun.append(catatan)
+
+    def label(self, label):
+        rerun = getattr(self._lokal, "rerun", None)
+        if rerun is not None: rerun["label"] = label
+
+    @contextmanager
+    def tahap(self, nama, **info):
+        """
+        with tahap("cari", baris=n) as t: ... t["bytes"] = ..., t["hit"] = True/False
+        Tahap bersarang dicatat dengan kedalaman (untuk tampilan), durasi induk sudah termasuk anak.
+        """
+        stack = self._stack()
+        rerun = getattr(self._lokal, "rerun", None)
+        t = {"nama": nama, "kedalaman": len(stack), "bytes": None, "hit": None, **info}
+        if rerun is not None: t["mulai_ms"] = (time.perf_counter() - self._lokal.t0) * 1000
+        stack.append(t)
+        t0 = time.perf_counter()
+        try:
+            yield t
+        except Exception as e:
+            t["error"] = type(e).__name__
+            raise
+        finally:
+            t["ms"] = (time.perf_counter() - t0) * 1000
+            stack.pop()
+            if rerun is not None:
+                if len(rerun["tahap"]) < MAKS_TAHAP_RERUN: rerun["tahap"].append(t)
+                else: rerun["terpotong"] += 1
+            self._tambah_sampel(nama, t["ms"], t["bytes"], t["hit"])
+
+    def _tambah_sampel(self, nama, ms, nbytes, hit):
+        with self._lock:
+            sampel = self._sampel.get(nama)
+            if sampel is None: sampel = self._sampel[nama] = deque(maxlen=self.maks_sampel)
+            sampel.append((ms, nbytes, hit))
+
+    def tandai_cache(self, hit):
+        """Dipanggil oleh cache (CacheKunci, DocStore, ...): hit/miss untuk tahap terdalam yang belum bertanda"""
+        stack = getattr(self._lokal, "stack", None)
+        if stack and stack[-1]["hit"] is None: stack[-1]["hit"] = hit
+
+    def diukur(self, nama=None, bytes_hasil=None):
+        """Dekorator. bytes_hasil(hasil) -> jumlah bytes (mis. len untuk hasil download)"""
+        def dekorator(fn):
+            label = nama or fn.__name__
+            @functools.wraps(fn)
+            def bungkus(*args, **kwargs):
+                with self.tahap(label) as t:
+                    hasil = fn(*args, **kwargs)
+                    if bytes_hasil is not None:
+                        try: t["bytes"] = bytes_hasil(hasil)
+                        except Exception: pass
+                    return hasil
+            return bungkus
+        return dekorator
+
+    def reruns(self):
+        with self._lock: return list(self._rerun)
+
+    def ringkasan(self):
+        """Per tahap: jumlah, p50/p95/max ms, total bytes, hit rate (dari sampel terakhir)"""
+        with self._lock: sampel = {k: list(v) for k, v in self._sampel.items()}
+        hasil = []
+        for nama, isi in sampel.items():
+            ms = sorted(s[0] for s in isi)
+            nbytes = [s[1] for s in isi if s[1] is not None]
+            hit = [s[2] for s in isi if s[2] is not None]
+            hasil.append({
+                "tahap": nama, "n": len(isi), "p50_ms": persentil(ms, 50), "p95_ms": persentil(ms, 95),
+                "max_ms": ms[-1], "total_ms": sum(ms), "total_mb": sum(nbytes) / 1e6 if nbytes else None,
+                "hit_rate": sum(hit) / len(hit) if hit else None,
+            })
+        return sorted(hasil, key=lambda r: -r["total_ms"])
+
+    def clear(self):
+        with self._lock:
+            self._rerun.clear()
+            self._sampel.clear()
+
+pencatat = Pencatat()
+rerun = pencatat.rerun
+label_rerun = pencatat.label
+tahap = pencatat.tahap
+diukur = pencatat.diukur
+tandai_cache = pencatat.tandai_cache
+
+def pantau_storage(storage):
+    """Bungkus operasi storage (listing, metadata, download, upload, hapus) menjadi tahap 'storage.*'"""
+    def ukuran_simpan(res): return res.get('bytes') if isinstance(res, dict) else None
+    for nama, bytes_hasil in (("daftar", None), ("meta", None), ("unduh", len), ("simpan", ukuran_simpan), ("hapus", None)):
+        setattr(storage, nama, diukur(f"storage.{nama}", bytes_hasil)(getattr(storage, nama)))
+    return storage
@@ -0,0 +1,567 @@
+import atexit
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from instrumen import tandai_cache
+
+log = logging.getLogger(__name__)
+
+# =================================================================
+# DOC STORE - Cache dokumen JSON per version Cloudinary
+# =================================================================
+class KonflikVersi(Exception):
+    """Dokumen terus berubah oleh penulis lain sampai batas percobaan habis"""
+
+class SebagianGagal(Exception):
+    """Sebagian batch sudah tertulis. `sisa` = item yang gagal saja (yang perlu dikirim ulang)"""
+    def __init__(self, sisa, error):
+        super().__init__(f"{len(sisa)} item gagal ditulis: {type(error).__name__}: {error}")
+        self.sisa = sisa
+
+class DocStore:
+    """
+    Simpan isi JSON (bytes) per public_id + version.
+    get(): 1x panggilan metadata (ambil version), download hanya jika version berubah.
+    Panggilan berulang dalam `umur_valid` detik (mis. 1x rerun) tidak revalidasi lagi.
+    update(): baca -> ubah -> tulis jika version belum berubah, ulang (merge) jika konflik.
+    """
+    def __init__(self, ambil_meta, unduh, tulis=None, tidak_ada=(KeyError,), umur_valid=2.0):
+        # ambil_meta(public_id) -> dict berisi 'version' & 'secure_url' (raise `tidak_ada` jika belum ada)
+        # unduh(url) -> bytes
+        # tulis(public_id, bytes, version_harapan) -> (berhasil, version_baru)
+        self.ambil_meta = ambil_meta
+        self.unduh = unduh
+        self.tulis = tulis
+        self.tidak_ada = tidak_ada
+        self.umur_valid = umur_valid
+        self._cache = {} # public_id -> (version, bytes, waktu_validasi)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidasi = 0
+        self.tanpa_revalidasi = 0
+        self.tulis_sukses = 0
+        self.konflik = 0
+
+    def _muat(self, public_id, meta=None):
+        """Return (bytes, version) terbaru, None jika dokumen belum ada. Error lain diteruskan"""
+        with self._lock: simpanan = self._cache.get(public_id)
+        if meta is None:
+            self.revalidasi += 1
+            try:
+                meta = self.ambil_meta(public_id)
+            except self.tidak_ada:
+                self.lupakan(public_id)
+                return None
+        versi = str(meta.get('version', ''))
+        tandai_cache(bool(simpanan and simpanan[0] == versi))
+        if simpanan and simpanan[0] == versi:
+            self.hits += 1
+            blob = simpanan[1]
+        else:
+            self.misses += 1
+            blob = self.unduh(meta['secure_url'])
+            json.loads(blob) # Validasi sebelum masuk cache
+        self._simpan(public_id, versi, blob)
+        return blob, versi
+
+    def _simpan(self, public_id, versi, blob):
+        with self._lock: self._cache[public_id] = (str(versi), blob, time.time())
+
+    def get_versi(self, public_id, default=None):
+        """Return (data, version). Dokumen tidak ada / error -> (default, None)"""
+        with self._lock: simpanan = self._cache.get(public_id)
+        if simpanan and time.time() - simpanan[2] < self.umur_valid:
+            self.tanpa_revalidasi += 1
+            tandai_cache(True)
+            return json.loads(simpanan[1]), simpanan[0]
+        try:
+            hasil = self._muat(public_id)
+        except Exception:
+            return default, None
+        if hasil is None: return default, None
+        return json.loads(hasil[0]), hasil[1]
+
+    def get(self, public_id, default=None):
+        return self.get_versi(public_id, default)[0]
+
+    def muat(self, public_id, umur=0):
+        """
+        Seperti get(), tapi None hanya jika dokumen memang belum ada (error jaringan diteruskan).
+        umur > 0: dokumen yang divalidasi / ditulis < umur detik lalu dipakai tanpa panggilan metadata.
+        """
+        if umur:
+            with self._lock: simpanan = self._cache.get(public_id)
+            if simpanan and time.time() - simpanan[2] < umur:
+                self.tanpa_revalidasi += 1
+                tandai_cache(True)
+                return json.loads(simpanan[1])
+        hasil = self._muat(public_id)
+        return None if hasil is None else json.loads(hasil[0])
+
+    def get_dari_meta(self, resource, default=None):
+        """Pakai version dari hasil listing (tanpa panggilan metadata per dokumen)"""
+        try: return json.loads(self._muat(resource['public_id'], resource)[0])
+        except Exception: return default
+
+    def update(self, public_id, mutasi, default=None, maks_coba=6):
+        """
+        mutasi(data) -> data baru. Dipanggil ulang dengan data terbaru jika terjadi konflik,
+        jadi harus berupa perubahan (tambah counter, append, set key), bukan hasil jadi.
+        Exception dari mutasi membatalkan update. mutasi return None -> batal tanpa menulis, update return None
+        (mis. username sudah dipakai, user sudah dihapus sesi lain).
+        """
+        for coba in range(maks_coba):
+            hasil = self._muat(public_id)
+            if hasil is None: data, versi = json.loads(json.dumps(default)), None
+            else: data, versi = json.loads(hasil[0]), hasil[1]
+            data = mutasi(data)
+            if data is None: return None
+            blob = json.dumps(data).encode('utf-8')
+            berhasil, versi_baru = self.tulis(public_id, blob, versi)
+            if berhasil:
+                self.tulis_sukses += 1
+                self._simpan(public_id, versi_baru, blob)
+                return data
+            self.konflik += 1
+            time.sleep(random.uniform(0, 0.05 * 2 ** coba))
+        raise KonflikVersi(f"{public_id}: gagal menulis setelah {maks_coba}x percobaan")
+
+    def simpan_lokal(self, public_id, data, versi):
+        """Dipanggil setelah upload sukses, agar baca berikutnya tidak perlu download"""
+        self._simpan(public_id, versi, json.dumps(data).encode('utf-8'))
+
+    def lupakan(self, public_id):
+        with self._lock: self._cache.pop(public_id, None)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "dokumen": len(self._cache), "hits": self.hits, "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+            "revalidasi": self.revalidasi, "tanpa_revalidasi": self.tanpa_revalidasi,
+            "tulis_sukses": self.tulis_sukses, "konflik": self.konflik,
+        }
+
+# =================================================================
+# LOG AKTIVITAS - Shard per jam, dipadatkan jadi dokumen harian
+# =================================================================
+class LogAktivitas:
+    """
+    {folder}/jam/YYYY-MM-DD_HH   : {"_gen": id generasi, username: hits}  (ditulis saat login, kecil)
+    {folder}/harian/YYYY-MM-DD   : {"hits": {username: hits}, "shard": {id shard: {"gen": .., "hits": yang sudah masuk}}}
+    {folder}/ringkasan           : {YYYY-MM-DD: total hits} untuk hari yang sudah dipadatkan (+ "_arsip_selesai")
+    arsip() -> {tanggal: {username: hits}} dari dokumen lama (satu file all-time, read-only), dilipat sekali
+    ke dokumen harian oleh kompaksi; sebelum itu dibaca sekali lalu disimpan di memori.
+    arsip() return None jika dokumen lama memang tidak ada, raise jika gagal dibaca (jangan {}: arsip akan
+    dianggap kosong lalu ditandai selesai, riwayat lama hilang).
+    Shard yang dibuat ulang setelah dipadatkan (batch tertunda / jam server selisih) punya _gen baru,
+    jadi dihitung sebagai isi baru, bukan dilewati karena id-nya sudah tercatat.
+    """
+    def __init__(self, store, folder, daftar, hapus, arsip=None, jeda_kompaksi=6 * 3600, jeda_gagal=600):
+        # daftar(prefix) -> list resource (public_id, version, secure_url); hapus(list public_id)
+        self.store = store
+        self.folder = folder
+        self.daftar = daftar
+        self.hapus = hapus
+        self.arsip = arsip
+        self.jeda_kompaksi = jeda_kompaksi
+        self.jeda_gagal = jeda_gagal
+        self._kompaksi_terakhir = 0
+        self._lock_kompaksi = threading.Lock()
+        self.error_kompaksi = None
+        self._arsip = None
+        self._arsip_selesai = False
+        self.error_arsip = None
+
+    def _id_jam(self, waktu): return f"{self.folder}/jam/{waktu:%Y-%m-%d_%H}"
+    def _id_harian(self, tgl): return f"{self.folder}/harian/{tgl}"
+    def _id_ringkasan(self): return f"{self.folder}/ringkasan"
+
+    @staticmethod
+    def _tanggal_shard(public_id):
+        return public_id.rsplit("/", 1)[-1].split("_")[0]
+
+    @staticmethod
+    def _tambah_hits(hits):
+        def tambah(isi):
+            if not isi: isi["_gen"] = uuid.uuid4().hex[:12] # Shard baru = generasi baru
+            for u, n in hits.items(): isi[u] = isi.get(u, 0) + n
+            return isi
+        return tambah
+
+    def catat(self, username, waktu):
+        self.store.update(self._id_jam(waktu), self._tambah_hits({username: 1}), default={})
+
+    def catat_banyak(self, daftar):
+        """
+        daftar: list (username, waktu). Satu update per shard jam, bukan per login.
+        Shard yang gagal tidak membatalkan shard lain: raise SebagianGagal berisi item shard gagal saja,
+        jadi retry tidak menambah ulang hits shard yang sudah tertulis.
+        """
+        per_shard = {}
+        for item in daftar:
+            per_shard.setdefault(self._id_jam(item[1]), []).append(item)
+        gagal, error = [], None
+        for shard, items in per_shard.items():
+            hits = {}
+            for username, _ in items: hits[username] = hits.get(username, 0) + 1
+            try:
+                self.store.update(shard, self._tambah_hits(hits), default={})
+            except Exception as e:
+                gagal.extend(items)
+                error = e
+        if gagal: raise SebagianGagal(gagal, error)
+
+    # --- BACA ---
+    @staticmethod
+    def _catatan_shard(harian):
+        catatan = harian.get("shard", {})
+        # Format lama: list id shard yang sudah masuk seluruhnya
+        if isinstance(catatan, list): return {p_id: {"gen": None, "hits": None} for p_id in catatan}
+        return catatan
+
+    @staticmethod
+    def _sisa_shard(isi, catatan=None):
+        """Hits shard yang belum masuk dokumen harian"""
+        hits = {u: n for u, n in isi.items() if u != "_gen"}
+        if catatan is None or catatan.get("gen") != isi.get("_gen"): return hits
+        if catatan.get("hits") is None: return {}
+        return {u: n - catatan["hits"].get(u, 0) for u, n in hits.items() if n > catatan["hits"].get(u, 0)}
+
+    def _shard_jam(self, bulan=None):
+        # Listing dibatasi per bulan (prefix tanggal) jika rentang diketahui
+        if bulan is None: return self.daftar(f"{self.folder}/jam/")
+        return [r for bln in sorted(bulan) for r in self.daftar(f"{self.folder}/jam/{bln}")]
+
+    def _data_arsip(self):
+        """Raise jika arsip gagal dibaca (tidak di-cache, dicoba lagi di panggilan berikutnya)"""
+        if self._arsip is None:
+            data = self.arsip()
+            self._arsip = data or {}
+            self.error_arsip = None
+        return self._arsip
+
+    def _data_arsip_tampil(self):
+        # Untuk baca/total: arsip gagal dibaca -> tampilkan tanpa arsip + error_arsip, bukan error halaman
+        try: return self._data_arsip()
+        except Exception as e:
+            self.error_arsip = f"{type(e).__name__}: {e}"
+            return {}
+
+    def _cek_arsip_selesai(self, ringkasan=None):
+        if not self.arsip: return True
+        if not self._arsip_selesai:
+            if ringkasan is None: ringkasan = self.store.get(self._id_ringkasan(), {})
+            self._arsip_selesai = bool(ringkasan.get("_arsip_selesai"))
+        return self._arsip_selesai
+
+    def baca(self, awal, akhir):
+        """{tanggal: {username: hits}} hanya untuk awal..akhir (string YYYY-MM-DD, inklusif)"""
+        hasil = {}
+        def gabung(tgl, hits):
+            if not (awal <= tgl <= akhir): return
+            tujuan = hasil.setdefault(tgl, {})
+            for u, n in hits.items(): tujuan[u] = tujuan.get(u, 0) + n
+
+        # Dokumen harian & shard jam: listing per bulan dalam rentang
+        bulan, tgl_awal = set(), datetime.strptime(awal, "%Y-%m-%d")
+        while tgl_awal.strftime("%Y-%m-%d") <= akhir:
+            bulan.add(tgl_awal.strftime("%Y-%m"))
+            tgl_awal += timedelta(days=1)
+        catatan, arsip_dilipat = {}, set()
+        for bln in sorted(bulan):
+            for r in self.daftar(f"{self.folder}/harian/{bln}"):
+                tgl = r['public_id'].rsplit("/", 1)[-1]
+                if not (awal <= tgl <= akhir): continue
+                isi = self.store.get_dari_meta(r, {})
+                gabung(tgl, isi.get("hits", {}))
+                catatan.update(self._catatan_shard(isi))
+                if "arsip" in isi.get("shard", {}): arsip_dilipat.add(tgl)
+        # Shard jam yang belum (seluruhnya) dipadatkan
+        for r in self._shard_jam(bulan):
+            tgl = self._tanggal_shard(r['public_id'])
+            if not (awal <= tgl <= akhir): continue
+            gabung(tgl, self._sisa_shard(self.store.get_dari_meta(r, {}), catatan.get(r['public_id'])))
+        # Arsip format lama (sampai dilipat ke dokumen harian)
+        if not self._cek_arsip_selesai():
+            for tgl, hits in self._data_arsip_tampil().items():
+                if tgl not in arsip_dilipat: gabung(tgl, hits)
+        return hasil
+
+    def total_semua(self):
+        ringkasan = self.store.get(self._id_ringkasan(), {})
+        total = sum(n for tgl, n in ringkasan.items() if not tgl.startswith("_"))
+        for r in self._shard_jam():
+            isi = self.store.get_dari_meta(r, {})
+            if not any(u != "_gen" for u in isi): continue
+            tgl = self._tanggal_shard(r['public_id'])
+            # Hari yang sudah dipadatkan: kurangi bagian shard yang sudah masuk ringkasan
+            catatan = self._catatan_shard(self.store.get(self._id_harian(tgl), {})) if tgl in ringkasan else {}
+            total += sum(self._sisa_shard(isi, catatan.get(r['public_id'])).values())
+        if not self._cek_arsip_selesai(ringkasan):
+            total += sum(sum(h.values()) for h in self._data_arsip_tampil().values())
+        return total
+
+    # --- KOMPAKSI ---
+    def _lipat_arsip(self):
+        """
+        Sekali saja: arsip lama masuk dokumen harian + ringkasan (idempoten per tanggal jika terputus).
+        Arsip gagal dibaca -> raise sebelum apa pun ditulis, _arsip_selesai hanya ditulis setelah baca sukses.
+        """
+        if self._cek_arsip_selesai(): return
+        totals = {}
+        for tgl, hits in sorted(self._data_arsip().items()):
+            def lipat(harian, hits=hits):
+                harian.setdefault("hits", {})
+                harian["shard"] = self._catatan_shard(harian)
+                if "arsip" in harian["shard"]: return harian
+                for u, n in hits.items(): harian["hits"][u] = harian["hits"].get(u, 0) + n
+                harian["shard"]["arsip"] = {"gen": None, "hits": None}
+                return harian
+            totals[tgl] = sum(self.store.update(self._id_harian(tgl), lipat, default={})["hits"].values())
+        self.store.update(self._id_ringkasan(), lambda r: {**r, **totals, "_arsip_selesai": True}, default={})
+        self._arsip_selesai = True
+        self._arsip = None
+
+    def kompaksi(self, hari_ini):
+        """
+        Padatkan shard jam sebelum `hari_ini` ke dokumen harian. Shard lalu dikosongkan (compare-and-swap,
+        generasi baru) dan baru dihapus pada kompaksi berikutnya jika masih kosong, jadi hits yang masuk
+        di antara baca & hapus tidak hilang.
+        """
+        self._lipat_arsip()
+        per_hari, kosong = {}, []
+        for r in self._shard_jam():
+            tgl = self._tanggal_shard(r['public_id'])
+            if tgl >= hari_ini: continue
+            isi = self.store.get_dari_meta(r, None)
+            if isi is None: continue
+            if any(u != "_gen" for u in isi): per_hari.setdefault(tgl, []).append((r, isi))
+            else: kosong.append(r['public_id'])
+        for tgl, shards in sorted(per_hari.items()):
+            def padatkan(harian, shards=shards):
+                harian.setdefault("hits", {})
+                harian["shard"] = self._catatan_shard(harian)
+                for r, isi in shards:
+                    # Hanya selisih dari yang sudah tercatat (kompaksi sebelumnya terputus / shard bertambah)
+                    for u, n in self._sisa_shard(isi, harian["shard"].get(r['public_id'])).items():
+                        harian["hits"][u] = harian["hits"].get(u, 0) + n
+                    harian["shard"][r['public_id']] = {"gen": isi.get("_gen"), "hits": {u: n for u, n in isi.items() if u != "_gen"}}
+                return harian
+            harian = self.store.update(self._id_harian(tgl), padatkan, default={})
+            total = sum(harian["hits"].values())
+            self.store.update(self._id_ringkasan(), lambda r: {**r, tgl: total}, default={})
+            for r, _ in shards:
+                # Gagal (ada tulisan baru sejak dibaca) tidak apa: selisihnya masuk di kompaksi berikutnya
+                kosongkan = {"_gen": uuid.uuid4().hex[:12]}
+                berhasil, versi = self.store.tulis(r['public_id'], json.dumps(kosongkan).encode('utf-8'), str(r.get('version', '')))
+                if berhasil: self.store.simpan_lokal(r['public_id'], kosongkan, versi)
+        if kosong:
+            self.hapus(kosong)
+            for p_id in kosong: self.store.lupakan(p_id)
+        self._kompaksi_terakhir = time.time()
+        return len(per_hari)
+
+    def kompaksi_jika_perlu(self, hari_ini):
+        """Dipanggil berkala oleh worker latar (AntrianTulis). Gagal -> dicatat di log + error_kompaksi, dicoba lagi setelah jeda_gagal"""
+        if time.time() - self._kompaksi_terakhir < self.jeda_kompaksi: return 0
+        if not self._lock_kompaksi.acquire(blocking=False): return 0
+        try:
+            hasil = self.kompaksi(hari_ini)
+            self.error_kompaksi = None
+            return hasil
+        except Exception as e:
+            self.error_kompaksi = f"{type(e).__name__}: {e}"
+            self._kompaksi_terakhir = time.time() - self.jeda_kompaksi + self.jeda_gagal
+            log.warning("Kompaksi log %s gagal, dicoba lagi dalam %d detik", self.folder, self.jeda_gagal, exc_info=True)
+            return 0
+        finally:
+            self._lock_kompaksi.release()
+
+# =================================================================
+# DATA BULANAN - List JSON besar dipecah satu dokumen per bulan
+# =================================================================
+class DataBulanan:
+    """
+    {folder}/YYYY-MM.json : [entry, ...]            (append hanya menyentuh bulan berjalan)
+    {folder}/index.json   : {YYYY-MM: jumlah entry} (daftar bulan tanpa membuka isinya)
+    lama: public_id dokumen format lama (satu list all-time), dipecah otomatis saat index belum ada.
+    """
+    def __init__(self, store, folder, hapus, kolom_bulan="Bulan_Upload", lama=None):
+        # hapus(list public_id) -> hapus dokumen partisi dari storage
+        self.store = store
+        self.folder = folder
+        self.hapus = hapus
+        self.kolom_bulan = kolom_bulan
+        self.lama = lama
+        self._siap = False
+
+    def _id_bulan(self, bulan): return f"{self.folder}/{bulan}.json"
+    def _id_index(self): return f"{self.folder}/index.json"
+
+    def bulan_dari(self, entry):
+        # Data lama tanpa kolom bulan: pakai Input_Time / Tanggal_NRB
+        for kolom in (self.kolom_bulan, "Input_Time", "Tanggal_NRB"):
+            nilai = str(entry.get(kolom) or "")
+            if len(nilai) >= 7 and nilai[4] == "-": return nilai[:7]
+        return "lainnya"
+
+    def pastikan_index(self):
+        if self._siap: return
+        if self.store.muat(self._id_index()) is None:
+            self._pecah_data_lama()
+        self._siap = True
+
+    def _pecah_data_lama(self):
+        data = self.store.muat(self.lama) if self.lama else None
+        grup = {}
+        for entry in data if isinstance(data, list) else []:
+            grup.setdefault(self.bulan_dari(entry), []).append(entry)
+        for bulan, isi in sorted(grup.items()):
+            # Hanya isi partisi yang masih kosong -> aman jika migrasi terputus / jalan bersamaan
+            self.store.update(self._id_bulan(bulan), lambda d, isi=isi: d or isi, default=[])
+        def isi_index(idx):
+            for bulan, isi in grup.items(): idx.setdefault(bulan, len(isi))
+            return idx
+        self.store.update(self._id_index(), isi_index, default={})
+
+    def index(self):
+        self.pastikan_index()
+        return self.store.get(self._id_index(), {})
+
+    def daftar_bulan(self):
+        return sorted(self.index())
+
+    def tambah(self, entry):
+        self.pastikan_index()
+        bulan = self.bulan_dari(entry)
+        def append(data):
+            if not isinstance(data, list): data = []
+            data.append(entry)
+            return data
+        jumlah = len(self.store.update(self._id_bulan(bulan), append, default=[]))
+        self.store.update(self._id_index(), lambda idx: {**idx, bulan: max(idx.get(bulan, 0), jumlah)}, default={})
+        return bulan
+
+    def buang(self, entry):
+        """Hapus satu entry (rollback tambah yang gagal di tengah jalan)"""
+        bulan = self.bulan_dari(entry)
+        def filter_entry(data):
+            return [e for e in data if e != entry] if isinstance(data, list) else []
+        jumlah = len(self.store.update(self._id_bulan(bulan), filter_entry, default=[]))
+        self.store.update(self._id_index(), lambda idx: {**idx, bulan: jumlah}, default={})
+
+    def baca_bulan(self, bulan):
+        data = self.store.get(self._id_bulan(bulan), [])
+        return data if isinstance(data, list) else []
+
+    def baca(self, daftar_bulan=None):
+        """Gabungan entry dari bulan-bulan yang diminta (default: semua), urut bulan"""
+        if daftar_bulan is None: daftar_bulan = self.daftar_bulan()
+        return [e for bulan in sorted(daftar_bulan) for e in self.baca_bulan(bulan)]
+
+    def hapus_bulan(self, bulan):
+        self.pastikan_index()
+        self.hapus([self._id_bulan(bulan)])
+        self.store.lupakan(self._id_bulan(bulan))
+        def buang(idx):
+            idx.pop(bulan, None)
+            return idx
+        self.store.update(self._id_index(), buang, default={})
+
+# =================================================================
+# ANTRIAN TULIS - Write-behind untuk data non-kritis (telemetri)
+# =================================================================
+class AntrianTulis:
+    """
+    kirim() hanya menaruh item di buffer lalu kembali. Satu thread latar (dipakai bersama semua sesi)
+    mengirim buffer lewat tulis_batch(list item) tiap `interval` detik atau saat buffer >= `ukuran_batch`.
+    Batch yang gagal dikembalikan ke depan buffer dan dicoba lagi dengan jeda bertambah. Jika tulis_batch
+    raise SebagianGagal, hanya `sisa`-nya yang dikembalikan (item lain sudah tertulis).
+    """
+    def __init__(self, tulis_batch, interval=5.0, ukuran_batch=50, maks_buffer=10_000, jeda_maks=60.0, berkala=None):
+        # berkala(): tugas latar yang dicek tiap putaran worker walau tidak ada tulisan (mis. kompaksi log).
+        # Error-nya dicatat, tidak menghentikan worker maupun menggagalkan batch.
+        self.tulis_batch = tulis_batch
+        self.berkala = berkala
+        self.interval = interval
+        self.ukuran_batch = ukuran_batch
+        self.maks_buffer = maks_buffer
+        self.jeda_maks = jeda_maks
+        self._buffer = []
+        self._kondisi = threading.Condition()
+        self._sedang_kirim = False
+        self._gagal_beruntun = 0
+        self.terkirim = 0
+        self.batch_gagal = 0
+        self.dibuang = 0
+        self.error_terakhir = None
+        self._thread = threading.Thread(target=self._jalan, name="antrian-tulis", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush, 5.0)
+
+    def kirim(self, item):
+        with self._kondisi:
+            self._buffer.append(item)
+            if len(self._buffer) > self.maks_buffer:
+                # Storage mati terlalu lama: buang yang paling lama agar memori tidak bocor
+                del self._buffer[0]
+                self.dibuang += 1
+            if len(self._buffer) >= self.ukuran_batch: self._kondisi.notify_all()
+
+    def _jeda(self):
+        if not self._gagal_beruntun: return self.interval
+        return min(self.jeda_maks, self.interval * 2 ** self._gagal_beruntun) * random.uniform(0.5, 1.0)
+
+    def _jalan(self):
+        while True:
+            with self._kondisi:
+                # Setelah gagal selalu tunggu dulu, jangan langsung banjiri storage yang sedang error
+                if len(self._buffer) < self.ukuran_batch or self._gagal_beruntun:
+                    self._kondisi.wait(self._jeda())
+                batch, self._buffer = self._buffer, []
+                self._sedang_kirim = bool(batch)
+            if batch: self._kirim(batch)
+            if self.berkala:
+                try: self.berkala()
+                except Exception: log.warning("Tugas berkala antrian tulis gagal", exc_info=True)
+
+    def _kirim(self, batch):
+        try:
+            self.tulis_batch(batch)
+        except Exception as e:
+            sisa = e.sisa if isinstance(e, SebagianGagal) else batch
+            with self._kondisi:
+                self._buffer[:0] = sisa
+                self.terkirim += len(batch) - len(sisa)
+                self._gagal_beruntun += 1
+                self.batch_gagal += 1
+                self.error_terakhir = f"{type(e).__name__}: {e}"
+        else:
+            with self._kondisi:
+                self._gagal_beruntun = 0
+                self.terkirim += len(batch)
+        finally:
+            with self._kondisi:
+                self._sedang_kirim = False
+                self._kondisi.notify_all()
+
+    def flush(self, timeout=10.0):
+        """Tunggu buffer terkirim (dipakai saat proses berhenti / di uji). Return True jika kosong"""
+        batas = time.time() + timeout
+        with self._kondisi:
+            self._kondisi.notify_all()
+            while (self._buffer or self._sedang_kirim) and time.time() < batas:
+                self._kondisi.wait(min(0.1, max(0.0, batas - time.time())))
+                self._kondisi.notify_all()
+            return not self._buffer and not self._sedang_kirim
+
+    def stats(self):
+        with self._kondisi:
+            return {"antri": len(self._buffer), "terkirim": self.terkirim, "batch_gagal": self.batch_gagal,
+                    "dibuang": self.dibuang, "error_terakhir": self.error_terakhir}
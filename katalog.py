@@ -0,0 +1,164 @@
+import threading
+import time
+
+# =================================================================
+# KATALOG FILE - Daftar file Cloudinary + index per folder & kategori
+# =================================================================
+class KatalogFile:
+    """
+    Menyimpan seluruh daftar file (ikut next_cursor sampai habis) dan index:
+    - per folder  : folder -> {public_id: resource}
+    - per kategori: (folder, kategori) -> [public_id]
+    Upload / hapus cukup update index (tambah/hapus), tanpa reload penuh.
+    Index tidak pernah diubah di tempat: penulis membuat salinan lalu menggantinya dengan satu
+    assignment, jadi pembaca (tanpa lock) selalu melihat index lama atau baru, tidak setengah jadi.
+    Lookup per folder ikut subfolder (seperti filter prefix `folder/` sebelumnya): peta folder -> subfolder
+    dibuat sekali tiap index diganti (hanya jika daftar folder berubah), lookup tidak memindai semua folder.
+    """
+    def __init__(self, ambil_halaman, kategori=None, ttl=600, jeda_gagal=60):
+        # ambil_halaman(prefix=..., next_cursor=...) -> dict hasil cloudinary.api.resources
+        self.ambil_halaman = ambil_halaman
+        self.kategori = kategori or {}
+        self.ttl = ttl
+        self.jeda_gagal = jeda_gagal
+        self._lock = threading.RLock()
+        self._lock_muat = threading.Lock()
+        self._index = ({}, {}, {}) # (per folder, per kategori, folder -> folder itu + subfolder-nya)
+        self._dimuat = 0
+        self._coba_lagi = 0
+        self.error_terakhir = None
+
+    # --- LISTING ---
+    def list_semua(self, prefix=None):
+        hasil, cursor = [], None
+        while True:
+            kw = {"next_cursor": cursor} if cursor else {}
+            if prefix: kw["prefix"] = prefix
+            res = self.ambil_halaman(**kw)
+            hasil.extend(res.get('resources', []))
+            cursor = res.get('next_cursor')
+            if not cursor: break
+        return hasil
+
+    def muat_ulang(self, prefix=None):
+        resources = self.list_semua(prefix)
+        with self._lock:
+            if prefix:
+                # Hanya ganti folder di bawah prefix tsb, folder lain disalin
+                folder_lama, kat_lama, _ = self._index
+                folder = {fd: dict(isi) for fd, isi in folder_lama.items() if not (fd + "/").startswith(prefix)}
+                kat = {k: list(ids) for k, ids in kat_lama.items() if k[0] in folder}
+            else:
+                folder, kat = {}, {}
+            for r in resources: self._masukkan(folder, kat, r)
+            self._index = (folder, kat, self._susun_subfolder(folder))
+            if not prefix: self._dimuat = time.time()
+
+    def pastikan_segar(self):
+        """Refresh jika TTL habis. Hanya satu thread yang refresh, sesi lain tetap pakai index lama"""
+        if not self._perlu_muat(): return self
+        # Belum pernah dimuat: tunggu thread yang sedang memuat (tidak ada index lama untuk ditampilkan)
+        if not self._lock_muat.acquire(blocking=not self._dimuat): return self
+        try:
+            if self._perlu_muat():
+                try:
+                    self.muat_ulang()
+                    self.error_terakhir = None
+                except Exception as e:
+                    # Tetap pakai index lama jika Cloudinary error, coba lagi setelah jeda (bukan tiap rerun)
+                    self.error_terakhir = f"{type(e).__name__}: {e}"
+                    self._coba_lagi = time.time() + self.jeda_gagal
+        finally:
+            self._lock_muat.release()
+        return self
+
+    def _perlu_muat(self):
+        sekarang = time.time()
+        return sekarang - self._dimuat > self.ttl and sekarang >= self._coba_lagi
+
+    # --- UPDATE INKREMENTAL ---
+    def tambah(self, resource):
+        pid = resource['public_id']
+        with self._lock:
+            fd = self._nama_folder(pid)
+            folder, kat = self._salin_folder(fd)
+            self._buang(folder, kat, pid)
+            self._masukkan(folder, kat, resource, terbaru=True)
+            sub = self._index[2] if fd in self._index[0] else self._susun_subfolder(folder) # Folder baru saja
+            self._index = (folder, kat, sub)
+
+    def hapus(self, public_id):
+        with self._lock:
+            fd = self._nama_folder(public_id)
+            if public_id not in self._index[0].get(fd, {}): return
+            folder, kat = self._salin_folder(fd)
+            self._buang(folder, kat, public_id)
+            self._index = (folder, kat, self._index[2])
+
+    # --- LOOKUP ---
+    def files_folder(self, folder, ext=".xlsx"):
+        idx, _, sub = self._index
+        return [r for fd in sub.get(folder, ()) for pid, r in idx[fd].items() if not ext or pid.endswith(ext)]
+
+    def files_kategori(self, folder, kategori, ext=".xlsx"):
+        idx, kat, sub = self._index
+        return [idx[fd][pid] for fd in sub.get(folder, ()) for pid in kat.get((fd, kategori), [])
+                if pid in idx[fd] and (not ext or pid.endswith(ext))]
+
+    def cari(self, public_id):
+        return self._index[0].get(self._nama_folder(public_id), {}).get(public_id)
+
+    def semua(self):
+        return [r for isi in self._index[0].values() for r in isi.values()]
+
+    def stats(self):
+        return {"folder": len(self._index[0]), "file": sum(len(isi) for isi in self._index[0].values()),
+                "umur_detik": round(time.time() - self._dimuat) if self._dimuat else None, "error_terakhir": self.error_terakhir}
+
+    # --- INTERNAL ---
+    @staticmethod
+    def _nama_folder(public_id):
+        return public_id.rsplit("/", 1)[0] if "/" in public_id else ""
+
+    @classmethod
+    def _susun_subfolder(cls, idx):
+        # folder (dan tiap induknya) -> folder itu sendiri dulu, lalu subfolder-nya urut nama
+        sub = {}
+        for fd in idx:
+            induk = fd
+            while True:
+                sub.setdefault(induk, []).append(fd)
+                if "/" not in induk: break
+                induk = cls._nama_folder(induk)
+        return {induk: tuple(sorted(fds, key=lambda fd, induk=induk: (fd != induk, fd))) for induk, fds in sub.items()}
+
+    def _kategori_folder(self, folder):
+        # Kategori milik folder terdekat (folder sendiri / induknya) yang punya konfigurasi
+        while True:
+            if folder in self.kategori: return self.kategori[folder]
+            if not folder: return {}
+            folder = self._nama_folder(folder)
+
+    def _salin_folder(self, folder):
+        # Copy-on-write: isi folder yang akan diubah disalin, folder lain dipakai bersama
+        idx, kat, _ = self._index
+        return {**idx, folder: dict(idx.get(folder, {}))}, {k: (list(ids) if k[0] == folder else ids) for k, ids in kat.items()}
+
+    def _masukkan(self, idx, kat, r, terbaru=False):
+        pid = r['public_id']
+        folder = self._nama_folder(pid)
+        isi = idx.setdefault(folder, {})
+        if terbaru: idx[folder] = isi = {pid: r, **isi}
+        else: isi[pid] = r
+        nama = pid.lower()
+        for k, kata_kunci in self._kategori_folder(folder).items():
+            if any(kk in nama for kk in kata_kunci):
+                ids = kat.setdefault((folder, k), [])
+                if terbaru: ids.insert(0, pid)
+                else: ids.append(pid)
+
+    def _buang(self, idx, kat, public_id):
+        folder = self._nama_folder(public_id)
+        idx.get(folder, {}).pop(public_id, None)
+        for (fd, _), ids in kat.items():
+            if fd == folder and public_id in ids: ids.remove(public_id)
@@ -0,0 +1,49 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from storage import BATCH_HAPUS
+
+# =================================================================
+# PEMBERSIH - Hapus massal file per prefix (storage: turunan storage.Penyimpanan)
+# =================================================================
+def hapus_massal(storage, public_ids, resource_type="raw", max_workers=4, batch=BATCH_HAPUS, progress_cb=None):
+    """
+    Hapus per batch (maks 100 id) secara paralel terbatas.
+    Return dict: dihapus, gagal {public_id: alasan}, batch [(jumlah_id, detik, error)], detik.
+    progress_cb(batch_selesai, total_batch) dipanggil tiap satu batch selesai.
+    """
+    potongan = [public_ids[i:i + batch] for i in range(0, len(public_ids), batch)]
+    laporan = {"dihapus": 0, "gagal": {}, "batch": [], "detik": 0.0}
+
+    def kerjakan(ids):
+        t0 = time.perf_counter()
+        status = storage.hapus(ids, resource_type)
+        return status, time.perf_counter() - t0
+
+    t_mulai = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futs = {pool.submit(kerjakan, ids): ids for ids in potongan}
+        for fut in as_completed(futs):
+            ids = futs[fut]
+            try:
+                status, dt = fut.result()
+                laporan["batch"].append((len(ids), dt, None))
+                for pid in ids:
+                    hasil = status.get(pid)
+                    if hasil in ("deleted", "not_found"): laporan["dihapus"] += hasil == "deleted"
+                    else: laporan["gagal"][pid] = hasil or "tidak ada status"
+            except Exception as e:
+                laporan["batch"].append((len(ids), None, str(e)))
+                for pid in ids: laporan["gagal"][pid] = str(e)
+            if progress_cb: progress_cb(len(laporan["batch"]), len(potongan))
+    laporan["detik"] = time.perf_counter() - t_mulai
+    return laporan
+
+def bersihkan_prefix(storage, prefix, simpan=None, resource_type="raw", dry_run=False, **kw):
+    """
+    Hapus semua file di bawah prefix kecuali yang simpan(public_id) == True.
+    dry_run=True hanya menghitung (tanpa menghapus). Return (public_ids target, laporan / None).
+    """
+    target = [r['public_id'] for r in storage.daftar_semua(prefix, resource_type)
+              if not (simpan and simpan(r['public_id']))]
+    if dry_run or not target: return target, None
+    return target, hapus_massal(storage, target, resource_type, **kw)
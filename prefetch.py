@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import OrderedDict, deque
+
+# =================================================================
+# PREFETCH - Download + parse workbook di latar sebelum dibuka viewer
+# =================================================================
+class Prefetcher:
+    """
+    minta(kunci, fungsi, *args) hanya menaruh tugas di antrian lalu kembali.
+    Satu thread latar (dipakai bersama semua sesi) menjalankan tugas satu per satu; hasil masuk
+    cache bersama lewat fungsi itu sendiri (mis. load_excel_data). Kunci yang sudah diantri / selesai
+    dilewati, jadi aman dipanggil tiap rerun. Tugas gagal boleh diminta lagi setelah `jeda_gagal` detik.
+    """
+    def __init__(self, maks_antri=8, maks_kunci=256, jeda_gagal=300.0):
+        self.maks_antri = maks_antri
+        self.maks_kunci = maks_kunci
+        self.jeda_gagal = jeda_gagal
+        self._antri = deque()
+        self._kunci = OrderedDict() # kunci -> "antri" / "selesai" / waktu gagal
+        self._kondisi = threading.Condition()
+        self._sedang = None
+        self.diminta = 0
+        self.dilewati = 0
+        self.dibuang = 0
+        self.selesai = 0
+        self.gagal = 0
+        self.detik = 0.0
+        self.error_terakhir = None
+        self._thread = threading.Thread(target=self._jalan, name="prefetch", daemon=True)
+        self._thread.start()
+
+    def minta(self, kunci, fungsi, *args):
+        """Return True jika tugas baru masuk antrian"""
+        with self._kondisi:
+            status = self._kunci.get(kunci)
+            if status in ("antri", "selesai") or (isinstance(status, float) and time.time() - status < self.jeda_gagal):
+                self.dilewati += 1
+                return False
+            if len(self._antri) >= self.maks_antri:
+                # Antrian penuh: buang permintaan paling lama (kemungkinan sudah tidak relevan)
+                lama, _, _ = self._antri.popleft()
+                self._kunci.pop(lama, None)
+                self.dibuang += 1
+            self._antri.append((kunci, fungsi, args))
+            self._kunci[kunci] = "antri"
+            self._kunci.move_to_end(kunci)
+            while len(self._kunci) > self.maks_kunci:
+                k, s = next(iter(self._kunci.items()))
+                if s == "antri": break
+                del self._kunci[k]
+            self.diminta += 1
+            self._kondisi.notify_all()
+            return True
+
+    def _jalan(self):
+        while True:
+            with self._kondisi:
+                while not self._antri: self._kondisi.wait()
+                kunci, fungsi, args = self._antri.popleft()
+                self._sedang = kunci
+            t0 = time.perf_counter()
+            try:
+                fungsi(*args)
+                status = "selesai"
+            except Exception as e:
+                status = time.time()
+                self.error_terakhir = f"{kunci}: {e}"
+            with self._kondisi:
+                self.detik += time.perf_counter() - t0
+                if status == "selesai": self.selesai += 1
+                else: self.gagal += 1
+                if kunci in self._kunci: self._kunci[kunci] = status
+                self._sedang = None
+                self._kondisi.notify_all()
+
+    def tunggu(self, timeout=60.0):
+        """Tunggu antrian kosong (uji / benchmark). Return True jika semua sudah diproses"""
+        batas = time.time() + timeout
+        with self._kondisi:
+            while (self._antri or self._sedang is not None) and time.time() < batas:
+                self._kondisi.wait(min(0.1, max(0.0, batas - time.time())))
+            return not self._antri and self._sedang is None
+
+    def lupakan(self, kunci=None):
+        """Izinkan kunci (atau semua kunci) diprefetch lagi, mis. setelah cache dikosongkan"""
+        with self._kondisi:
+            if kunci is None: self._kunci = OrderedDict((k, s) for k, s in self._kunci.items() if s == "antri")
+            elif self._kunci.get(kunci) != "antri": self._kunci.pop(kunci, None)
+
+    def stats(self):
+        with self._kondisi:
+            return {"antri": len(self._antri), "sedang": self._sedang, "diminta": self.diminta, "dilewati": self.dilewati,
+                    "dibuang": self.dibuang, "selesai": self.selesai, "gagal": self.gagal,
+                    "detik_total": round(self.detik, 2), "error_terakhir": self.error_terakhir}
+
+def terbaru_per_folder(katalog, folders):
+    """Per folder: file yang tampil default di viewer (urutan katalog) + file dengan created_at terbaru"""
+    hasil = []
+    for folder in folders:
+        files = katalog.files_folder(folder)
+        if not files: continue
+        kandidat = [files[0], max(files, key=lambda r: r.get('created_at', ''))]
+        for r in kandidat:
+            if r not in hasil: hasil.append(r)
+    return hasil
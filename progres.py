@@ -0,0 +1,71 @@
+import threading
+import pandas as pd
+
+# =================================================================
+# PROGRES TOKO - Ringkasan AM/AS yang diupdate per toko (delta)
+# =================================================================
+KOLOM_RINGKASAN = ['Target Toko SO', 'Sudah Input', 'Belum Input', 'Progres']
+
+def kode_dari_hasil(public_id):
+    # so_rawan_hilang/hasil/Hasil_{kode}_v{versi}.xlsx -> kode
+    return public_id.split('Hasil_')[-1].split('_v')[0]
+
+class ProgresToko:
+    """
+    Dibangun sekali per versi master: tabel toko + target per AM/AS.
+    tandai(kode) menaikkan counter AM & AS toko tsb (O(1)), ringkasan() hanya menyusun tabel kecil per AM/AS.
+    """
+    def __init__(self, df_master):
+        self._lock = threading.Lock()
+        self.sudah = set()
+        # Cari kolom AM & AS secara fleksibel (tidak peduli huruf besar/kecil)
+        col_am = next((c for c in df_master.columns if c.lower() == 'am'), None)
+        col_as = next((c for c in df_master.columns if c.lower() == 'as'), None)
+        self.valid = bool(col_am and col_as)
+        if not self.valid: return
+
+        df_stores = df_master[[df_master.columns[0], df_master.columns[1], col_am, col_as]].drop_duplicates()
+        df_stores.columns = ['Kode', 'Nama', 'AM', 'AS']
+        df_stores['Status'] = 0
+        self.df_stores = df_stores
+        self._i_status = df_stores.columns.get_loc('Status')
+
+        self._posisi = {}
+        for pos, kode in enumerate(df_stores['Kode'].astype(str)):
+            self._posisi.setdefault(kode, []).append(pos)
+        self._am = df_stores['AM'].to_numpy()
+        self._as = df_stores['AS'].to_numpy()
+        self._target = {k: df_stores.groupby(k).size().to_dict() for k in ('AM', 'AS')}
+        self._jml_sudah = {k: dict.fromkeys(t, 0) for k, t in self._target.items()}
+
+    def tandai(self, kode):
+        kode = str(kode)
+        with self._lock:
+            if kode in self.sudah: return False
+            self.sudah.add(kode)
+            if not self.valid: return True
+            for pos in self._posisi.get(kode, []):
+                self.df_stores.iat[pos, self._i_status] = 1
+                for k, nilai in (('AM', self._am[pos]), ('AS', self._as[pos])):
+                    if nilai in self._jml_sudah[k]: self._jml_sudah[k][nilai] += 1
+            return True
+
+    def sinkron(self, daftar_kode):
+        """Terapkan hanya kode yang belum tercatat. Return jumlah toko baru"""
+        return sum(self.tandai(k) for k in set(map(str, daftar_kode)) - self.sudah)
+
+    def _tabel(self, k):
+        target, sudah = self._target[k], self._jml_sudah[k]
+        df = pd.DataFrame({k: list(target), 'Target': list(target.values()), 'Sudah': [sudah[n] for n in target]})
+        df['Belum'] = df['Target'] - df['Sudah']
+        df['Progres'] = (df['Sudah'] / df['Target']) * 100
+        df.columns = [k] + KOLOM_RINGKASAN
+        # Urut Terjelek (Ascending)
+        return df.sort_values(by=['Progres', 'Target Toko SO'], ascending=[True, False])
+
+    def ringkasan(self):
+        """(tabel toko, ringkasan AM, ringkasan AS), sama dengan perhitungan penuh dari listing"""
+        if not self.valid: return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+        with self._lock:
+            # Salinan: df_stores diubah in-place oleh tandai() & dipakai bersama semua sesi
+            return self.df_stores.copy(), self._tabel('AM'), self._tabel('AS')
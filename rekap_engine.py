@@ -0,0 +1,132 @@
+import io
+import time
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import http_client
+
+# =================================================================
+# REKAP ENGINE - Gabung hasil SO seluruh toko ke master
+# =================================================================
+KOLOM_TOKO_TMP = "__kunci_toko"
+KOLOM_PRDCD_TMP = "__kunci_prdcd"
+
+def cari_kolom_prdcd(df):
+    # Sama seperti logika lama: cari 'prdcd' (case insensitive), fallback kolom ke-3
+    return next((c for c in df.columns if str(c).lower() == 'prdcd'), df.columns[2])
+
+def _siapkan_hasil(s_df):
+    s_df = s_df.copy()
+    s_df.columns = [str(c).strip() for c in s_df.columns]
+    s_key = cari_kolom_prdcd(s_df)
+    s_df[KOLOM_TOKO_TMP] = s_df[s_df.columns[0]].astype(str)
+    s_df[KOLOM_PRDCD_TMP] = s_df[s_key].astype(str)
+    return s_df
+
+def _isi_kolom(df, mask, col, nilai):
+    try:
+        df.loc[mask, col] = nilai
+    except (TypeError, ValueError):
+        # Tipe data tidak cocok (mis. angka ke kolom teks) -> jadikan object
+        df[col] = df[col].astype(object)
+        df.loc[mask, col] = nilai
+
+def gabung_rekap(m_df, list_hasil):
+    """Update master dengan semua hasil toko sekaligus (kunci: kode toko + PRDCD)"""
+    hasil = m_df.copy()
+    frames = [_siapkan_hasil(s) for s in list_hasil if s is not None and not s.empty]
+    if not frames: return hasil
+
+    m_key = cari_kolom_prdcd(hasil)
+    kunci_master = pd.MultiIndex.from_arrays(
+        [hasil[hasil.columns[0]].astype(str), hasil[m_key].astype(str)]
+    )
+
+    # Kelompokkan per susunan kolom agar kolom yang tidak ada di suatu toko tidak menimpa master dengan NaN
+    grup = {}
+    for s_df in frames:
+        grup.setdefault(tuple(s_df.columns), []).append(s_df)
+
+    for kolom, isi in grup.items():
+        gab = pd.concat(isi, ignore_index=True)
+        gab = gab.drop_duplicates([KOLOM_TOKO_TMP, KOLOM_PRDCD_TMP], keep='last')
+        gab = gab.set_index([KOLOM_TOKO_TMP, KOLOM_PRDCD_TMP])
+
+        posisi = gab.index.get_indexer(kunci_master)
+        cocok = posisi >= 0
+        if not cocok.any(): continue
+        ambil = posisi[cocok]
+
+        for col in gab.columns:
+            if col not in hasil.columns: hasil[col] = float('nan')
+            _isi_kolom(hasil, cocok, col, gab[col].to_numpy()[ambil])
+    return hasil
+
+# =================================================================
+# BULK DOWNLOAD - Ambil semua file Hasil_ secara paralel
+# =================================================================
+def baca_hasil_bytes(konten):
+    df = pd.read_excel(io.BytesIO(konten))
+    df.columns = [str(c).strip() for c in df.columns]
+    return df
+
+def unduh_semua_hasil(daftar, max_workers=8, timeout=None, progress_cb=None, unduh=None):
+    """
+    Download & parse banyak workbook sekaligus. Tiap worker thread download lalu langsung parse
+    (tanpa process pool: fork di dalam server Streamlit yang banyak thread bisa deadlock).
+    daftar: list (nama, url). Return (dict nama -> DataFrame, dict nama -> pesan error).
+    progress_cb(selesai, total, nama) dipanggil (di thread pemanggil) setiap satu file selesai.
+    unduh(url) -> bytes: default session HTTP bersama (http_client, koneksi dipakai ulang & retry).
+    """
+    hasil, gagal = {}, {}
+    total = len(daftar)
+    if not total: return hasil, gagal
+    if unduh is None:
+        unduh = lambda url: http_client.unduh(url, timeout=timeout, gzip=False) # xlsx sudah terkompres
+
+    def ambil(url):
+        try: konten = unduh(url)
+        except Exception as e: return None, f"Download gagal: {e}"
+        try: return baca_hasil_bytes(konten), None
+        except Exception as e: return None, f"File tidak terbaca: {e}"
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futs = {pool.submit(ambil, url): nama for nama, url in daftar}
+        for selesai, fut in enumerate(as_completed(futs), 1):
+            nama = futs[fut]
+            df, err = fut.result()
+            if err is None: hasil[nama] = df
+            else: gagal[nama] = err
+            if progress_cb: progress_cb(selesai, total, nama)
+    return hasil, gagal
+
+# --- BENCHMARK (python rekap_engine.py) ---
+def _data_sintetis(n_toko, n_item):
+    toko = [f"T{i:03d}" for i in range(n_toko)]
+    prdcd = [str(100000 + j) for j in range(n_item)]
+    m_df = pd.DataFrame({
+        "Toko": [t for t in toko for _ in prdcd],
+        "Nama": [f"Toko {t}" for t in toko for _ in prdcd],
+        "PRDCD": prdcd * n_toko,
+        "AM": "AM1", "AS": "AS1",
+        "Stok H-1": 10, "Query Sales": None, "Jml Fisik": None, "Selisih": None,
+    })
+    list_hasil = []
+    for t in toko:
+        s = m_df[m_df["Toko"] == t].copy()
+        s["Query Sales"], s["Jml Fisik"] = 1, 9
+        s["Selisih"] = 0
+        list_hasil.append(s)
+    return m_df, list_hasil
+
+def benchmark(ukuran=((50, 100), (100, 100), (200, 100), (400, 100))):
+    print(f"{'Toko':>6} {'Baris':>9} {'Detik':>8} {'us/baris':>9}")
+    for n_toko, n_item in ukuran:
+        m_df, list_hasil = _data_sintetis(n_toko, n_item)
+        t0 = time.perf_counter()
+        gabung_rekap(m_df, list_hasil)
+        dt = time.perf_counter() - t0
+        total = n_toko * n_item
+        print(f"{n_toko:>6} {total:>9} {dt:>8.3f} {dt / total * 1e6:>9.2f}")
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,241 @@
+import io
+import os
+import threading
+import time
+import uuid
+import weakref
+from datetime import datetime, timezone
+from urllib.parse import quote, unquote, urlparse
+import http_client
+
+try:
+    import cloudinary
+    import cloudinary.api
+    import cloudinary.exceptions
+    import cloudinary.uploader
+    import cloudinary.utils
+except ImportError:
+    cloudinary = None
+
+# =================================================================
+# STORAGE - Satu pintu untuk semua I/O file (Cloudinary / folder lokal)
+# =================================================================
+# Resource = dict seperti hasil cloudinary.api: public_id, version, secure_url, resource_type, bytes, created_at
+BATCH_HAPUS = 100 # Batas id per panggilan delete_resources Cloudinary
+ENV_LOKAL = "STORAGE_LOKAL" # Isi dengan path folder -> pakai filesystem lokal (offline / benchmark)
+_LOCK_CAS = threading.Lock() # Menjaga pembuatan lock per public_id
+
+class TidakDitemukan(KeyError):
+    """public_id tidak ada di storage"""
+
+def unduh_url(url, timeout=None):
+    """Bytes dari secure_url (https:// Cloudinary lewat session bersama, atau file:// storage lokal)"""
+    if url.startswith("file://"):
+        with open(unquote(urlparse(url).path), "rb") as f: return f.read()
+    return http_client.unduh(url, timeout=timeout)
+
+def _isi_bytes(data):
+    if isinstance(data, (bytes, bytearray)): return bytes(data)
+    if hasattr(data, "getvalue"): return data.getvalue() # BytesIO / UploadedFile Streamlit
+    return data.read()
+
+class Penyimpanan:
+    """Antarmuka storage. Turunan wajib: daftar, meta, simpan, hapus, url"""
+    def daftar(self, prefix="", resource_type="raw", next_cursor=None, max_results=500):
+        """Satu halaman listing: {"resources": [...], "next_cursor": ...}"""
+        raise NotImplementedError
+
+    def meta(self, public_id, resource_type="raw"):
+        """Resource terbaru (version, secure_url). Raise TidakDitemukan jika belum ada"""
+        raise NotImplementedError
+
+    def simpan(self, data, public_id=None, resource_type="raw", folder=None, **opsi):
+        """Upload (overwrite). data: bytes / file-like. Return resource"""
+        raise NotImplementedError
+
+    def hapus(self, public_ids, resource_type="raw", invalidate=False):
+        """Return {public_id: 'deleted' / 'not_found'}"""
+        raise NotImplementedError
+
+    def url(self, public_id, resource_type="image"):
+        """URL tampilan tanpa version (bisa disusun sebelum upload selesai)"""
+        raise NotImplementedError
+
+    # --- Turunan dari operasi dasar ---
+    def daftar_semua(self, prefix="", resource_type="raw"):
+        hasil, cursor = [], None
+        while True:
+            res = self.daftar(prefix, resource_type, next_cursor=cursor)
+            hasil.extend(res.get('resources', []))
+            cursor = res.get('next_cursor')
+            if not cursor: return hasil
+
+    def versi(self, public_id, resource_type="raw"):
+        try: return str(self.meta(public_id, resource_type).get('version', ''))
+        except TidakDitemukan: return None
+
+    def unduh(self, url):
+        return unduh_url(url)
+
+    def ambil(self, public_id, resource_type="raw"):
+        return self.unduh(self.meta(public_id, resource_type)['secure_url'])
+
+    def _kunci_cas(self, public_id, resource_type):
+        # Satu lock per public_id, dibuang otomatis saat tidak ada yang memegang
+        with _LOCK_CAS:
+            semua = self.__dict__.get("_cas")
+            if semua is None: semua = self._cas = weakref.WeakValueDictionary()
+            kunci = semua.get((resource_type, public_id))
+            if kunci is None: kunci = semua[(resource_type, public_id)] = threading.Lock()
+            return kunci
+
+    def simpan_jika_versi(self, public_id, blob, versi_harapan, resource_type="raw"):
+        """
+        Compare-and-swap: tulis hanya jika version masih `versi_harapan` (None = belum ada). Return (berhasil, version)
+        Cek version + upload dua panggilan terpisah (Cloudinary tidak punya CAS): dijaga lock per public_id,
+        jadi semua sesi Streamlit (satu proses) tidak bisa lolos cek bersamaan.
+        """
+        with self._kunci_cas(public_id, resource_type):
+            versi_kini = self.versi(public_id, resource_type)
+            if versi_kini != versi_harapan: return False, versi_kini
+            return True, str(self.simpan(blob, public_id, resource_type).get('version', ''))
+
+    def hapus_prefix(self, prefix, resource_type="raw"):
+        ids = [r['public_id'] for r in self.daftar_semua(prefix, resource_type)]
+        status = self.hapus(ids, resource_type) if ids else {}
+        return sum(s == "deleted" for s in status.values())
+
+# =================================================================
+# CLOUDINARY
+# =================================================================
+class PenyimpananCloudinary(Penyimpanan):
+    # Admin API (listing / metadata / hapus) lewat pool urllib3 milik SDK, diberi batas waktu yang sama
+    TIMEOUT_API = http_client.TIMEOUT_KONEKSI + http_client.TIMEOUT_BACA
+
+    def daftar(self, prefix="", resource_type="raw", next_cursor=None, max_results=500):
+        kw = {"next_cursor": next_cursor} if next_cursor else {}
+        if prefix: kw["prefix"] = prefix
+        return cloudinary.api.resources(type="upload", resource_type=resource_type, max_results=max_results, timeout=self.TIMEOUT_API, **kw)
+
+    def meta(self, public_id, resource_type="raw"):
+        try: return cloudinary.api.resource(public_id, resource_type=resource_type, timeout=self.TIMEOUT_API)
+        except cloudinary.exceptions.NotFound: raise TidakDitemukan(public_id)
+
+    def simpan(self, data, public_id=None, resource_type="raw", folder=None, **opsi):
+        if isinstance(data, (bytes, bytearray)): data = io.BytesIO(data)
+        if public_id: opsi.setdefault("overwrite", True)
+        return cloudinary.uploader.upload(data, public_id=public_id, folder=folder, resource_type=resource_type, **opsi)
+
+    def hapus(self, public_ids, resource_type="raw", invalidate=False):
+        status = {}
+        for i in range(0, len(public_ids), BATCH_HAPUS):
+            res = cloudinary.api.delete_resources(public_ids[i:i + BATCH_HAPUS], resource_type=resource_type, type="upload",
+                                                  invalidate=invalidate, timeout=self.TIMEOUT_API)
+            status.update(res.get('deleted', {}))
+        return status
+
+    def hapus_prefix(self, prefix, resource_type="raw"):
+        res = cloudinary.api.delete_resources_by_prefix(prefix, resource_type=resource_type)
+        try: cloudinary.api.delete_folder(prefix)
+        except Exception: pass # Folder kosong bisa saja sudah tidak ada
+        return sum(s == "deleted" for s in res.get('deleted', {}).values())
+
+    def url(self, public_id, resource_type="image"):
+        return cloudinary.utils.cloudinary_url(public_id, resource_type=resource_type, secure=True)[0]
+
+# =================================================================
+# FILESYSTEM LOKAL - Pengganti Cloudinary untuk benchmark / uji tanpa internet
+# =================================================================
+class PenyimpananLokal(Penyimpanan):
+    """
+    File di {root}/{resource_type}/{public_id}. Version = mtime_ns (dinaikkan tiap tulis, selalu berubah).
+    Compare-and-swap atomik di dalam satu proses (lock).
+    """
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self._lock = threading.Lock()
+
+    def _path(self, public_id, resource_type):
+        path = os.path.normpath(os.path.join(self.root, resource_type, public_id))
+        if not path.startswith(os.path.join(self.root, resource_type) + os.sep): raise ValueError(f"public_id tidak valid: {public_id}")
+        return path
+
+    def _resource(self, public_id, resource_type, path):
+        st_ = os.stat(path)
+        return {
+            "public_id": public_id, "version": str(st_.st_mtime_ns), "resource_type": resource_type, "type": "upload",
+            "secure_url": "file://" + quote(path), "bytes": st_.st_size,
+            "created_at": datetime.fromtimestamp(st_.st_mtime, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+
+    def daftar(self, prefix="", resource_type="raw", next_cursor=None, max_results=500):
+        dasar = os.path.join(self.root, resource_type)
+        semua = []
+        for folder, _, files in os.walk(dasar):
+            for nama in files:
+                if nama.endswith(".tmp"): continue
+                path = os.path.join(folder, nama)
+                public_id = os.path.relpath(path, dasar).replace(os.sep, "/")
+                if public_id.startswith(prefix or ""):
+                    try: semua.append(self._resource(public_id, resource_type, path))
+                    except FileNotFoundError: pass # Terhapus saat listing
+        # Sama seperti Cloudinary: terbaru di depan
+        semua.sort(key=lambda r: (-int(r['version']), r['public_id']))
+        mulai = int(next_cursor or 0)
+        res = {"resources": semua[mulai:mulai + max_results]}
+        if mulai + max_results < len(semua): res["next_cursor"] = str(mulai + max_results)
+        return res
+
+    def meta(self, public_id, resource_type="raw"):
+        try: return self._resource(public_id, resource_type, self._path(public_id, resource_type))
+        except FileNotFoundError: raise TidakDitemukan(public_id)
+
+    def _tulis(self, path, blob):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try: lama = os.stat(path).st_mtime_ns
+        except FileNotFoundError: lama = 0
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "wb") as f: f.write(blob)
+        # mtime dipakai sebagai version -> pastikan selalu naik walau resolusi jam kasar
+        baru = max(time.time_ns(), lama + 1)
+        os.utime(tmp, ns=(baru, baru))
+        os.replace(tmp, path)
+
+    def simpan(self, data, public_id=None, resource_type="raw", folder=None, **opsi):
+        if not public_id: public_id = uuid.uuid4().hex[:20]
+        if folder: public_id = f"{folder.strip('/')}/{public_id}"
+        path = self._path(public_id, resource_type)
+        blob = _isi_bytes(data)
+        with self._lock: self._tulis(path, blob)
+        return self._resource(public_id, resource_type, path)
+
+    def simpan_jika_versi(self, public_id, blob, versi_harapan, resource_type="raw"):
+        path = self._path(public_id, resource_type)
+        with self._lock:
+            versi_kini = self.versi(public_id, resource_type)
+            if versi_kini != versi_harapan: return False, versi_kini
+            self._tulis(path, blob)
+            return True, self.versi(public_id, resource_type)
+
+    def hapus(self, public_ids, resource_type="raw", invalidate=False):
+        status = {}
+        with self._lock:
+            for public_id in public_ids:
+                try:
+                    os.remove(self._path(public_id, resource_type))
+                    status[public_id] = "deleted"
+                except FileNotFoundError:
+                    status[public_id] = "not_found"
+        return status
+
+    def url(self, public_id, resource_type="image"):
+        return "file://" + quote(self._path(public_id, resource_type))
+
+def folder_lokal():
+    return os.environ.get(ENV_LOKAL)
+
+def buat_penyimpanan(konfigurasi=None):
+    """STORAGE_LOKAL=<folder> -> PenyimpananLokal, selain itu Cloudinary (konfigurasi: cloud_name, api_key, api_secret)"""
+    if folder_lokal(): return PenyimpananLokal(folder_lokal())
+    if konfigurasi: cloudinary.config(**konfigurasi, secure=True)
+    return PenyimpananCloudinary()
@@ -0,0 +1,205 @@
+import re
+import sys
+import time
+import numpy as np
+import pandas as pd
+import streamlit as st
+from cache_kunci import SEMUA_CACHE, CacheKunci
+from instrumen import tahap
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = pc = None
+
+# =================================================================
+# INDEX PENCARIAN - Dibangun sekali per sheet, dipakai tiap ketikan
+# =================================================================
+PEMISAH = "\x1f" # Pemisah antar kolom, agar kata tidak "nyambung" lintas kolom
+_POLA_TOKEN = re.compile(r'(?:[^\s:"]+:)?"[^"]*"|\S+')
+
+def _teks_kolom(s):
+    return s.astype(str).where(s.notna(), "").str.lower()
+
+class IndexCari:
+    """Teks baris (lowercase, gabungan semua kolom) + teks per kolom (dibuat saat dibutuhkan)"""
+    def __init__(self, df):
+        self.kolom = [str(c) for c in df.columns]
+        self._df = df
+        self._per_kolom = {}
+        if len(df.columns):
+            teks = _teks_kolom(df.iloc[:, 0])
+            for i in range(1, len(df.columns)):
+                teks = teks + PEMISAH + _teks_kolom(df.iloc[:, i])
+            self.teks_baris = teks.to_numpy()
+        else:
+            self.teks_baris = np.array([], dtype=object)
+
+    def teks_kolom(self, nama):
+        if nama not in self._per_kolom:
+            self._per_kolom[nama] = _teks_kolom(self._df[nama]).to_numpy()
+        return self._per_kolom[nama]
+
+    def cari_kolom(self, nama):
+        nama = nama.lower()
+        return next((c for c in self.kolom if c.lower() == nama), None) or \
+               next((c for c in self.kolom if c.lower().startswith(nama)), None)
+
+    def cari(self, query):
+        """
+        Return mask baris yang cocok. Semua kata harus ada (AND).
+        Format: `kata`, `"frasa dengan spasi"`, `kolom:nilai`, `kolom:"nilai spasi"`.
+        """
+        mask = np.ones(len(self.teks_baris), dtype=bool)
+        for token in _POLA_TOKEN.findall(query.lower()):
+            kolom = None
+            if ":" in token and not token.startswith('"'):
+                nama, nilai = token.split(":", 1)
+                kolom = self.cari_kolom(nama)
+                if kolom is not None: token = nilai
+            token = token.strip('"')
+            if not token: continue
+            # Hanya cek baris yang masih lolos (makin banyak kata makin cepat)
+            idx = np.flatnonzero(mask)
+            if not len(idx): break
+            sumber = self.teks_kolom(kolom) if kolom is not None else self.teks_baris
+            cocok = pd.Series(sumber[idx]).str.contains(token, regex=False).to_numpy(dtype=bool)
+            mask[idx[~cocok]] = False
+        return mask
+
+# =================================================================
+# FORMAT ANGKA INDONESIA (1.234.567,89)
+# =================================================================
+def format_ribuan_indo(nilai):
+    try:
+        if float(nilai) % 1 != 0:
+            val = "{:,.2f}".format(float(nilai)) 
+        else:
+            val = "{:,.0f}".format(float(nilai))
+        translation = val.maketrans({",": ".", ".": ","})
+        return val.translate(translation)
+    except:
+        return nilai
+
+def _ribuan(n):
+    """int64 >= 0 -> teks dengan titik ribuan (array Arrow), dikerjakan per jumlah kelompok 3 digit"""
+    jml = np.ones(len(n), dtype="int64")
+    sisa = n // 1000
+    while (sisa > 0).any():
+        jml += sisa > 0
+        sisa //= 1000
+    potongan, urutan = [], []
+    for c in np.unique(jml):
+        idx = np.flatnonzero(jml == c)
+        sub = n[idx]
+        teks = pc.cast(pa.array(sub // 1000 ** (c - 1)), pa.string())
+        for k in range(c - 2, -1, -1):
+            grup = pc.utf8_lpad(pc.cast(pa.array(sub // 1000 ** k % 1000), pa.string()), 3, "0")
+            teks = pc.binary_join_element_wise(teks, grup, ".")
+        potongan.append(teks)
+        urutan.append(idx)
+    # Kembalikan ke urutan semula
+    return pa.concat_arrays(potongan).take(pa.array(np.argsort(np.concatenate(urutan), kind="stable")))
+
+def format_ribuan_kolom(s):
+    """Versi per kolom dari format_ribuan_indo (hasil identik, tanpa loop per sel)"""
+    if pc is None: return s.apply(format_ribuan_indo)
+    x = s.to_numpy(dtype="float64", na_value=np.nan)
+    hasil = np.empty(len(x), dtype=object)
+    a = np.abs(x)
+    minus = np.signbit(x)
+
+    with np.errstate(invalid="ignore"):
+        hingga = np.isfinite(x)
+        pecahan = x % 1
+        y = a * 100
+        # Tepat di ,xx5 atau angka sangat besar -> diformat per sel agar pembulatan identik
+        ambigu = np.abs(y - np.floor(y) - 0.5) < 1e-3
+    bulat = hingga & (pecahan == 0) & (a < 2**53)
+    desimal = hingga & (pecahan != 0) & (y < 2**43) & ~ambigu
+    lainnya = ~(bulat | desimal)
+
+    def pasang(m, teks):
+        teks = pc.if_else(pa.array(minus[m]), pc.binary_join_element_wise("-", teks, ""), teks)
+        hasil[m] = teks.to_numpy(zero_copy_only=False)
+
+    if bulat.any():
+        pasang(bulat, _ribuan(a[bulat].astype("int64")))
+    if desimal.any():
+        sen = np.rint(y[desimal]).astype("int64")
+        koma = pc.utf8_lpad(pc.cast(pa.array(sen % 100), pa.string()), 2, "0")
+        pasang(desimal, pc.binary_join_element_wise(_ribuan(sen // 100), koma, ","))
+    if lainnya.any():
+        hasil[lainnya] = [format_ribuan_indo(v) for v in x[lainnya]]
+    return pd.Series(hasil, index=s.index, name=s.name, dtype=object)
+
+# =================================================================
+# TABEL BERHALAMAN - Hanya potongan yang tampil yang dikirim ke browser
+# =================================================================
+UKURAN_HALAMAN = [50, 100, 250, 500, 1000]
+TANPA_URUT = "(Urutan Asli)"
+# Urutan baris per (kunci data, kolom, arah): pindah halaman tidak mengurutkan ulang seluruh tabel
+cache_urutan = SEMUA_CACHE.setdefault("tabel.urutan_baris", CacheKunci("tabel.urutan_baris", ttl=900, max_entries=32))
+
+def urutan_baris(df, kolom, turun=False):
+    """Posisi baris (iloc) setelah diurutkan, NaN selalu di bawah"""
+    s = df[kolom].reset_index(drop=True)
+    try:
+        return s.sort_values(ascending=not turun, na_position="last", kind="stable").index.to_numpy()
+    except TypeError: # Kolom campuran angka & teks
+        return s.astype(str).where(s.notna()).sort_values(ascending=not turun, na_position="last", kind="stable").index.to_numpy()
+
+def tampilkan_tabel_halaman(df, key, format_fn=None, index_col=None, ukuran_default=100, kunci_data=None, **kwargs):
+    """
+    Pengganti st.dataframe untuk tabel besar: urut & potong halaman di server.
+    format_fn(df_halaman) dipakai untuk format tampilan (hanya baris yang tampil).
+    kunci_data: tuple hashable yang unik untuk isi df (mis. (public_id, version, sheet, ...)) -> urutan di-cache.
+    """
+    total = len(df)
+    c_uk, c_urut, c_arah, c_hal = st.columns([1, 2, 1, 1])
+    ukuran = c_uk.selectbox("Baris/Hal:", UKURAN_HALAMAN, index=UKURAN_HALAMAN.index(ukuran_default), key=f"ps_{key}")
+    # Label selectbox selalu str, dipetakan balik ke kolom asli (header angka, tanggal, dst)
+    label_kolom = {}
+    for c in df.columns: label_kolom.setdefault(str(c), c)
+    label = c_urut.selectbox("Urutkan:", [TANPA_URUT] + list(label_kolom), key=f"so_{key}")
+    turun = c_arah.checkbox("Z→A / Besar→Kecil", key=f"sd_{key}")
+
+    jml_hal = max(1, -(-total // ukuran))
+    if st.session_state.get(f"pg_{key}", 1) > jml_hal: st.session_state[f"pg_{key}"] = 1
+    hal = c_hal.number_input(f"Hal (1-{jml_hal}):", min_value=1, max_value=jml_hal, step=1, key=f"pg_{key}")
+
+    mulai = (hal - 1) * ukuran
+    if label in label_kolom:
+        kolom = label_kolom[label]
+        if kunci_data is None: urutan = urutan_baris(df, kolom, turun)
+        else: urutan = cache_urutan.ambil((kunci_data, label, turun), lambda: urutan_baris(df, kolom, turun))
+        halaman = df.iloc[urutan[mulai:mulai + ukuran]]
+    else:
+        halaman = df.iloc[mulai:mulai + ukuran]
+
+    if format_fn: halaman = format_fn(halaman)
+    if index_col and index_col in halaman.columns: halaman = halaman.set_index(index_col)
+    with tahap("st.dataframe", baris=len(halaman)): st.dataframe(halaman, **kwargs)
+    rb = lambda n: f"{n:,}".replace(",", ".")
+    if total: st.caption(f"Baris {rb(mulai + 1)}–{rb(min(mulai + ukuran, total))} dari {rb(total)} (Hal {hal}/{jml_hal})")
+    else: st.caption("Tidak ada baris.")
+
+# --- BENCHMARK (python tabel.py [jumlah_baris]) ---
+def benchmark(n=200_000):
+    rng = np.random.default_rng(0)
+    kolom = {
+        "bulat": pd.Series(rng.integers(-10**9, 10**9, n)),
+        "desimal": pd.Series(np.round(rng.normal(0, 1e6, n) * 10.0 ** (k := rng.integers(0, 4, n))) / 10.0 ** k),
+        "campur_nan": pd.Series(np.where(rng.random(n) < 0.1, np.nan, rng.integers(0, 10**6, n) / 4)),
+    }
+    kolom["tepi"] = pd.Series([0.0, -0.0, -0.004, 0.125, 2.675, 1.005, 1e20, -1e15 + 0.5, np.inf, -np.inf, np.nan, 999.995, 12345678901.234] * 100)
+    print(f"{'Kolom':<12} {'Per sel (s)':>12} {'Vektor (s)':>11} {'Sama':>6}")
+    for nama, s in kolom.items():
+        t0 = time.perf_counter(); lama = s.apply(format_ribuan_indo); t1 = time.perf_counter()
+        baru = format_ribuan_kolom(s); t2 = time.perf_counter()
+        sama = lama.astype(str).equals(baru.astype(str))
+        print(f"{nama:<12} {t1 - t0:>12.3f} {t2 - t1:>11.3f} {str(sama):>6}")
+
+if __name__ == "__main__":
+    benchmark(*map(int, sys.argv[1:]))
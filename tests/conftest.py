@@ -0,0 +1,71 @@
+import os
+import sys
+import threading
+import time
+import pytest
+
+# Modul aplikasi ada di root repo (flat), bukan package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_store import DocStore
+from storage import BATCH_HAPUS, Penyimpanan, PenyimpananLokal
+
+class PenyimpananMiripCloudinary(PenyimpananLokal):
+    """
+    File lokal, tapi compare-and-swap seperti Cloudinary: cek version (meta) lalu upload (simpan),
+    dua panggilan terpisah dengan latensi -> hanya lock per public_id milik Penyimpanan yang menjaga.
+    """
+    simpan_jika_versi = Penyimpanan.simpan_jika_versi
+
+    def __init__(self, root, latensi=0.002):
+        super().__init__(root)
+        self.latensi = latensi
+
+    def meta(self, public_id, resource_type="raw"):
+        time.sleep(self.latensi)
+        return super().meta(public_id, resource_type)
+
+    def simpan(self, data, public_id=None, resource_type="raw", folder=None, **opsi):
+        time.sleep(self.latensi)
+        return super().simpan(data, public_id, resource_type, folder, **opsi)
+
+@pytest.fixture
+def lokal(tmp_path):
+    return PenyimpananLokal(tmp_path)
+
+@pytest.fixture(params=["lokal", "mirip_cloudinary"])
+def storage(request, tmp_path):
+    if request.param == "lokal": return PenyimpananLokal(tmp_path)
+    return PenyimpananMiripCloudinary(tmp_path)
+
+def doc_store(storage, **kw):
+    return DocStore(storage.meta, storage.unduh, storage.simpan_jika_versi, **kw)
+
+@pytest.fixture
+def store(storage):
+    return doc_store(storage, umur_valid=0)
+
+class PenyimpananBatasHapus(PenyimpananLokal):
+    """hapus() seperti delete_resources Cloudinary: maks 100 id, ada latensi, panggilan ke-N bisa dibuat gagal"""
+    def __init__(self, root, latensi=0.02, gagal_pada=()):
+        super().__init__(root)
+        self.latensi = latensi
+        self.gagal_pada = set(gagal_pada)
+        self.panggilan_hapus = 0
+        self.maks_paralel = 0
+        self._aktif = 0
+        self._lock_hitung = threading.Lock()
+
+    def hapus(self, public_ids, resource_type="raw", invalidate=False):
+        if len(public_ids) > BATCH_HAPUS: raise ValueError("maksimal 100 public_id per panggilan")
+        with self._lock_hitung:
+            self.panggilan_hapus += 1
+            ke = self.panggilan_hapus
+            self._aktif += 1
+            self.maks_paralel = max(self.maks_paralel, self._aktif)
+        try:
+            time.sleep(self.latensi)
+            if ke in self.gagal_pada: raise ConnectionError("rate limited")
+            return super().hapus(public_ids, resource_type, invalidate)
+        finally:
+            with self._lock_hitung: self._aktif -= 1
@@ -0,0 +1,44 @@
+import threading
+import time
+import pandas as pd
+from cache_kunci import CacheKunci, cache_kunci
+
+def test_kunci_dipilih_sendiri_argumen_berat_tidak_dihash():
+    dipanggil = []
+    @cache_kunci(lambda m_ver, df: m_ver)
+    def hitung(m_ver, df):
+        dipanggil.append(m_ver)
+        return len(df)
+    df = pd.DataFrame({"a": range(10)})
+    assert hitung("1", df) == 10 and hitung("1", df.head(3)) == 10 and hitung("2", df.head(3)) == 3
+    assert dipanggil == ["1", "2"]
+    assert hitung.cache.stats()["hits"] == 1
+
+def test_salin_tiap_pemanggil_dapat_salinan():
+    @cache_kunci(lambda p: p, salin=True)
+    def muat(p): return pd.DataFrame({"a": [1, 2, 3]})
+    df = muat("x")
+    df.loc[0, "a"] = 99
+    df["b"] = 0
+    assert muat("x")["a"].tolist() == [1, 2, 3] and "b" not in muat("x").columns
+
+def test_ttl_dan_lru():
+    c = CacheKunci("uji", ttl=0.05, max_entries=2)
+    for k in "abc": c.put(k, k)
+    assert c.get("a") == (False, None) and c.get("c") == (True, "c")
+    time.sleep(0.06)
+    assert c.get("c") == (False, None)
+
+def test_satu_hitung_walau_banyak_sesi_bersamaan():
+    c = CacheKunci("uji_paralel")
+    dipanggil = []
+    def hitung():
+        dipanggil.append(1)
+        time.sleep(0.05)
+        return "hasil"
+    hasil = []
+    threads = [threading.Thread(target=lambda: hasil.append(c.ambil("k", hitung))) for _ in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert hasil == ["hasil"] * 8 and len(dipanggil) == 1
+    assert c.stats()["misses"] == 1 and c.stats()["hits"] == 7
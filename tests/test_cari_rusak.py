@@ -0,0 +1,18 @@
+from cari_rusak import IndexRusak, _entry_sintetis
+
+def cari_manual(entries, toko, nrb, bulan):
+    return [e for e in entries if e["Kode_Toko"].startswith(toko.upper()) and e["No_NRB"].startswith(nrb.upper())
+            and (e["Bulan_Upload"].startswith(bulan) or e["Tanggal_NRB"].startswith(bulan))]
+
+def test_sama_dengan_cari_manual_urut_terbaru():
+    entries = _entry_sintetis(3000)
+    index = IndexRusak(entries)
+    for toko, nrb, bulan in (("ta", "", ""), ("TB05", "", ""), ("", "NRB12", ""), ("", "", "2025-03"), ("TC", "", "2025-07"), ("TZ99", "", "")):
+        harapan = sorted(cari_manual(entries, toko, nrb, bulan), key=lambda e: e["Input_Time"], reverse=True)
+        halaman, total = index.cari(toko, nrb, bulan, halaman=1, ukuran=len(entries))
+        assert total == len(harapan)
+        assert [e["Input_Time"] for e in halaman] == [e["Input_Time"] for e in harapan]
+
+def test_halaman():
+    index = IndexRusak(_entry_sintetis(45))
+    assert [len(index.cari(halaman=h)[0]) for h in (1, 2, 3, 4)] == [20, 20, 5, 0]
@@ -0,0 +1,86 @@
+import io
+import threading
+import time
+import pandas as pd
+import pytest
+from excel_engine import (
+    SheetCache, WorkbookCache, baca_grid_stream, buat_sidecar, id_manifest, id_sidecar, parquet_ke_grid,
+    sidecar_usang, susun_tabel,
+)
+
+def workbook(n_rows=50, n_cols=6):
+    df = pd.DataFrame({f"k{i}": range(n_rows) if i % 2 else [f"teks{j}" for j in range(n_rows)] for i in range(n_cols)})
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf) as w:
+        df.to_excel(w, sheet_name="Data", index=False)
+        df.head(3).to_excel(w, sheet_name="Lain", index=False)
+    return df, buf.getvalue()
+
+def test_stream_dibatasi_baris_dan_kolom():
+    _, blob = workbook()
+    grid = baca_grid_stream(blob, "Data")
+    assert grid.shape == (51, 6) and not grid.attrs["terpotong"]
+    grid = baca_grid_stream(blob, "Data", max_rows=10, max_cols=4)
+    assert grid.shape == (10, 4) and grid.attrs["terpotong"]
+
+def test_susun_tabel_sama_dengan_read_excel():
+    df, blob = workbook()
+    hasil = susun_tabel(baca_grid_stream(blob, "Data"), 1)
+    pd.testing.assert_frame_equal(hasil, pd.read_excel(io.BytesIO(blob), sheet_name="Data"), check_dtype=False)
+
+def test_sidecar_parquet_dan_sidecar_usang():
+    _, blob = workbook()
+    manifest, files = buat_sidecar(blob, "f/a.xlsx")
+    assert [p for p, _ in files] == [id_sidecar("f/a.xlsx", 0), id_sidecar("f/a.xlsx", 1)]
+    pd.testing.assert_frame_equal(parquet_ke_grid(files[0][1]), baca_grid_stream(blob, "Data"), check_dtype=False)
+    ada = [id_sidecar("f/a.xlsx", i) for i in range(4)] + [id_manifest("f/a.xlsx"), "f/a.xlsx.bak", "f/ab.xlsx.sheet0.parquet"]
+    assert sidecar_usang("f/a.xlsx", manifest, ada) == [id_sidecar("f/a.xlsx", 2), id_sidecar("f/a.xlsx", 3)]
+    assert sidecar_usang("f/a.xlsx", None, ada) == ada[:5]
+
+def test_workbook_cache_lru_dan_satu_unduh():
+    c = WorkbookCache(max_bytes=10, max_items=8)
+    unduh = []
+    assert c.ambil(("a", "1"), lambda: unduh.append(1) or b"12345") == b"12345"
+    assert c.ambil(("a", "1"), lambda: unduh.append(1) or b"x") == b"12345" and len(unduh) == 1
+    c.ambil(("b", "1"), lambda: b"123456")
+    assert c.get(("a", "1")) is None and c.stats()["evictions"] == 1
+
+def test_workbook_cache_gagal_dibagi_ke_yang_menunggu():
+    # Download gagal: semua yang antre menerima error yang sama, bukan mengunduh ulang bergiliran
+    c = WorkbookCache()
+    unduh, hasil = [], []
+    def gagal():
+        unduh.append(1)
+        time.sleep(0.2)
+        raise ConnectionError("timeout")
+    def minta():
+        try: hasil.append(c.ambil(("a", "1"), gagal))
+        except ConnectionError as e: hasil.append(e)
+    threads = [threading.Thread(target=minta) for _ in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert len(unduh) == 1 and len(hasil) == 8 and all(isinstance(h, ConnectionError) for h in hasil)
+    assert c.stats()["gagal"] == 1 and c.stats()["misses"] == 1
+    # Kegagalan tidak di-cache
+    assert c.ambil(("a", "1"), lambda: b"ok") == b"ok"
+    with pytest.raises(ConnectionError): c.ambil(("b", "1"), gagal)
+
+def test_workbook_cache_hitungan_paralel_tepat():
+    c = WorkbookCache()
+    c.put(("a", "1"), b"x")
+    def minta():
+        for _ in range(2000): c.ambil(("a", "1"), lambda: b"y")
+    threads = [threading.Thread(target=minta) for _ in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert c.stats()["hits"] == 16000
+
+def test_sheet_cache_disk_dan_versi_lama(tmp_path):
+    _, blob = workbook()
+    grid = baca_grid_stream(blob, "Data")
+    c = SheetCache(folder=str(tmp_path))
+    c.ambil(("f/a.xlsx", "1", "Data"), lambda: grid)
+    c2 = SheetCache(folder=str(tmp_path))
+    assert c2.ambil(("f/a.xlsx", "1", "Data"), lambda: None).shape == grid.shape and c2.disk_hits == 1
+    c2.ambil(("f/a.xlsx", "2", "Data"), lambda: grid) # Versi baru: file versi lama dihapus dari disk
+    assert len(list(tmp_path.iterdir())) == 1
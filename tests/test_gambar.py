@@ -0,0 +1,33 @@
+import io
+from PIL import Image
+from gambar import LEBAR_MAKS, cek_foto, kecilkan_foto
+
+def foto(lebar, tinggi, fmt="JPEG", mode="RGB"):
+    buf = io.BytesIO()
+    Image.new(mode, (lebar, tinggi), (200, 100, 50, 128)[:len(mode)]).save(buf, format=fmt)
+    return buf.getvalue()
+
+def test_cek_foto_tolak_sebelum_decode():
+    assert cek_foto(foto(100, 100)) == (True, "")
+    ok, pesan = cek_foto(foto(100, 100), maks_bytes=10)
+    assert not ok and "MB" in pesan
+    ok, pesan = cek_foto(foto(400, 300), maks_piksel=100_000)
+    assert not ok and "400x300" in pesan
+    assert cek_foto(b"bukan gambar")[0] # Tetap diupload apa adanya
+
+def test_cek_foto_pakai_size_uploadedfile():
+    class Upload(io.BytesIO): size = 20 * 1024 * 1024
+    assert not cek_foto(Upload(foto(10, 10)))[0]
+
+def test_kecilkan_foto_lebar_dan_transparansi():
+    hasil, asli, baru = kecilkan_foto(foto(2000, 1000, "PNG", "RGBA"))
+    img = Image.open(io.BytesIO(hasil))
+    assert img.format == "JPEG" and img.size == (LEBAR_MAKS, 400) and baru == len(hasil) < asli
+
+def test_kecilkan_foto_kecil_dan_rusak_apa_adanya():
+    # JPEG kecil kualitas rendah: encode ulang (kualitas 80) lebih besar -> yang asli dipakai
+    buf = io.BytesIO()
+    Image.effect_noise((100, 100), 80).convert("RGB").save(buf, format="JPEG", quality=20)
+    kecil = buf.getvalue()
+    assert kecilkan_foto(kecil) == (kecil, len(kecil), len(kecil))
+    assert kecilkan_foto(b"xx") == (b"xx", 2, 2)
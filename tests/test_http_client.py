@@ -0,0 +1,68 @@
+import gzip
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from http_client import KlienHTTP
+
+ISI = json.dumps({f"user{i}": "x" * 40 for i in range(2000)}).encode()
+
+@pytest.fixture
+def server():
+    gagal_sisa = {"/kadang-503": 2}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1" # keep-alive
+        def log_message(self, *args): pass
+        def do_GET(self):
+            if gagal_sisa.get(self.path, 0) > 0:
+                gagal_sisa[self.path] -= 1
+                return self._kirim(503, b"sibuk", {"Retry-After": "0"})
+            if self.path == "/lambat": time.sleep(1.0)
+            if self.path == "/tidak-ada": return self._kirim(404, b"?")
+            body, hdr = ISI, {}
+            if "gzip" in self.headers.get("Accept-Encoding", ""): body, hdr = gzip.compress(ISI), {"Content-Encoding": "gzip"}
+            self._kirim(200, body, hdr)
+        def _kirim(self, status, body, hdr=None):
+            self.send_response(status)
+            for k, v in (hdr or {}).items(): self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            try: self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError): pass # Klien sudah timeout (/lambat)
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+
+def test_paralel_pakai_ulang_koneksi(server):
+    k = KlienHTTP(timeout=(1, 0.3), jeda_awal=0.01)
+    with ThreadPoolExecutor(8) as pool: hasil = list(pool.map(lambda i: k.unduh(f"{server}/doc{i % 10}.json"), range(100)))
+    assert all(h == ISI for h in hasil)
+    s = k.stats()
+    assert s["koneksi_baru"] <= 8 + 2 and s["koneksi_dipakai_ulang"] >= 100 - s["koneksi_baru"]
+    assert s["respons_gzip"] == 100
+
+def test_koneksi_baru_dihitung_per_connect(server):
+    k = KlienHTTP(timeout=(1, 0.3), jeda_awal=0.01)
+    for i in range(5): k.unduh(f"{server}/doc{i}.json")
+    assert k.stats()["koneksi_baru"] == 1 and k.stats()["koneksi_dipakai_ulang"] == 4
+    k.session.close() # Pool ditutup -> request berikutnya harus connect ulang
+    k.unduh(f"{server}/doc0.json")
+    assert k.stats()["koneksi_baru"] == 2
+
+def test_retry_503_dan_tanpa_gzip(server):
+    k = KlienHTTP(timeout=(1, 0.3), jeda_awal=0.01)
+    assert k.unduh(f"{server}/kadang-503") == ISI and k.retry == 2
+    assert k.unduh(f"{server}/x.xlsx", gzip=False) == ISI and k.stats()["respons_gzip"] == 1
+
+def test_404_langsung_gagal_dan_timeout(server):
+    k = KlienHTTP(timeout=(1, 0.3), jeda_awal=0.01, maks_ulang=1)
+    with pytest.raises(requests.HTTPError): k.unduh(f"{server}/tidak-ada")
+    assert k.retry == 0
+    with pytest.raises(requests.Timeout): k.unduh(f"{server}/lambat")
+    assert k.stats()["gagal"] == 2
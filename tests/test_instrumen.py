@@ -0,0 +1,31 @@
+import pytest
+from instrumen import Pencatat, persentil
+
+def test_tahap_bersarang_per_rerun():
+    p = Pencatat()
+    with p.rerun("viewer") as catatan:
+        with p.tahap("luar"):
+            with p.tahap("dalam") as t:
+                t["bytes"] = 10
+                p.tandai_cache(True)
+    assert [(t["nama"], t["kedalaman"], t["hit"]) for t in catatan["tahap"]] == [("dalam", 1, True), ("luar", 0, None)]
+    assert p.reruns()[0]["label"] == "viewer"
+    ringkasan = {r["tahap"]: r for r in p.ringkasan()}
+    assert ringkasan["dalam"]["hit_rate"] == 1.0 and ringkasan["dalam"]["total_mb"] == 10 / 1e6
+
+def test_error_tetap_tercatat():
+    p = Pencatat()
+    with pytest.raises(ValueError):
+        with p.rerun():
+            with p.tahap("gagal"): raise ValueError("x")
+    assert p.reruns()[0]["tahap"][0]["error"] == "ValueError"
+
+def test_diukur_bytes_hasil():
+    p = Pencatat()
+    unduh = p.diukur("unduh", bytes_hasil=len)(lambda: b"12345")
+    with p.rerun(): unduh()
+    assert p.reruns()[0]["tahap"][0]["bytes"] == 5
+
+def test_persentil():
+    assert persentil([], 50) == 0.0
+    assert persentil([1, 2, 3, 4], 50) == 2.5 and persentil([1, 2, 3, 4], 100) == 4
@@ -0,0 +1,160 @@
+import json
+import threading
+import time
+from datetime import datetime
+from conftest import doc_store
+from json_store import AntrianTulis, DataBulanan, LogAktivitas
+
+def jalankan_paralel(fungsi, n_thread=8, n_kali=25):
+    threads = [threading.Thread(target=lambda u=u: [fungsi(f"user{u}") for _ in range(n_kali)]) for u in range(n_thread)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+def tambah(user):
+    def mutasi(log):
+        log[user] = log.get(user, 0) + 1
+        return log
+    return mutasi
+
+def log_aktivitas(storage, store, **kw):
+    return LogAktivitas(store, "log", storage.daftar_semua, lambda ids: storage.hapus(ids), **kw)
+
+# --- Compare-and-swap (lokal: CAS atomik, mirip_cloudinary: cek version + upload terpisah) ---
+def test_update_paralel_tidak_ada_yang_hilang(storage, store):
+    jalankan_paralel(lambda user: store.update("Config/log.json", tambah(user), default={}, maks_coba=200))
+    isi = json.loads(storage.ambil("Config/log.json"))
+    assert isi == {f"user{u}": 25 for u in range(8)}
+
+def test_simpan_jika_versi_satu_pemenang(storage):
+    storage.simpan(b"0", "counter.json")
+    versi = storage.versi("counter.json")
+    hasil = []
+    def tulis(i): hasil.append(storage.simpan_jika_versi("counter.json", str(i).encode(), versi)[0])
+    threads = [threading.Thread(target=tulis, args=(i,)) for i in range(16)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert hasil.count(True) == 1
+
+def test_update_batal_tidak_menulis(storage, store):
+    store.update("Config/users.json", lambda db: {**db, "a": "x"}, default={})
+    versi = storage.versi("Config/users.json")
+    assert store.update("Config/users.json", lambda db: None if "a" in db else {**db, "a": "y"}, default={}) is None
+    assert storage.versi("Config/users.json") == versi
+
+def test_muat_dengan_umur_tanpa_metadata(lokal):
+    panggil = []
+    meta = lokal.meta
+    store = doc_store(lokal)
+    store.ambil_meta = lambda *a: panggil.append(1) or meta(*a)
+    store.update("progres.json", lambda d: d + ["T001"], default=[])
+    n = len(panggil)
+    for _ in range(5): assert store.muat("progres.json", umur=60) == ["T001"]
+    assert len(panggil) == n
+    assert store.muat("progres.json") == ["T001"] and len(panggil) == n + 1
+
+# --- Log aktivitas ---
+def test_write_behind_storage_sempat_error(storage, store):
+    log = log_aktivitas(storage, store)
+    error = {"sisa": 2}
+    def tulis_batch(batch):
+        if error["sisa"]:
+            error["sisa"] -= 1
+            raise ConnectionError("storage tidak tersedia")
+        log.catat_banyak(batch)
+    antrian = AntrianTulis(tulis_batch, interval=0.05, ukuran_batch=100)
+    waktu = datetime(2024, 1, 1, 8)
+    jalankan_paralel(lambda user: antrian.kirim((user, waktu)), n_thread=8, n_kali=10)
+    assert antrian.flush(30)
+    assert sum(log.baca("2024-01-01", "2024-01-01")["2024-01-01"].values()) == 80
+    assert antrian.stats()["batch_gagal"] == 2
+
+def test_retry_hanya_shard_yang_gagal(lokal):
+    # Batch lintas 2 shard jam, shard kedua gagal sekali: shard pertama tidak boleh terhitung dobel
+    error = {"sisa": 1}
+    def tulis_kadang_gagal(public_id, blob, versi):
+        if public_id.endswith("_09") and error["sisa"]:
+            error["sisa"] -= 1
+            raise ConnectionError("storage tidak tersedia")
+        return lokal.simpan_jika_versi(public_id, blob, versi)
+    store = doc_store(lokal, umur_valid=0)
+    store.tulis = tulis_kadang_gagal
+    log = log_aktivitas(lokal, store)
+    antrian = AntrianTulis(log.catat_banyak, interval=0.02, ukuran_batch=1000)
+    for i in range(30): antrian.kirim((f"user{i % 3}", datetime(2024, 1, 1, 8 + i % 2)))
+    assert antrian.flush(10)
+    assert log.baca("2024-01-01", "2024-01-01")["2024-01-01"] == {"user0": 10, "user1": 10, "user2": 10}
+    assert antrian.stats()["batch_gagal"] == 1
+    for jam in ("08", "09"):
+        isi = json.loads(lokal.ambil(f"log/jam/2024-01-01_{jam}"))
+        assert sum(LogAktivitas._sisa_shard(isi).values()) == 15
+
+def test_kompaksi_tulisan_terlambat_tetap_terhitung(lokal):
+    # Hits yang datang setelah shard dipadatkan / dihapus tetap terhitung, arsip lama dilipat sekali
+    store = doc_store(lokal, umur_valid=0)
+    baca_arsip = []
+    log = log_aktivitas(lokal, store, arsip=lambda: baca_arsip.append(1) or {"2023-12-31": {"lama": 5}})
+    jam = lambda h, n, u="user0": log.catat_banyak([(u, datetime(2024, 1, 1, h))] * n)
+    jam(8, 10); jam(9, 5, "user1")
+    hasil = []
+    for langkah in (lambda: None, lambda: jam(8, 3), lambda: None, lambda: jam(8, 2), lambda: None):
+        log.kompaksi("2024-01-02")
+        langkah() # Tulisan terlambat: ke shard yang sudah dikosongkan / sudah dihapus
+        isi = log.baca("2023-12-31", "2024-01-01")
+        hasil.append((sum(isi.get("2024-01-01", {}).values()), sum(isi.get("2023-12-31", {}).values()), log.total_semua()))
+    assert hasil == [(15, 5, 20), (18, 5, 23), (18, 5, 23), (20, 5, 25), (20, 5, 25)]
+    assert len(baca_arsip) == 1
+
+def test_arsip_gagal_dibaca_tidak_ditandai_selesai(lokal):
+    store = doc_store(lokal, umur_valid=0)
+    gagal = {"ya": True}
+    def arsip():
+        if gagal["ya"]: raise ConnectionError("storage tidak tersedia")
+        return {"2023-12-31": {"lama": 5}}
+    log = log_aktivitas(lokal, store, arsip=arsip)
+    try:
+        log.kompaksi("2024-01-02")
+        assert False, "kompaksi harus gagal"
+    except ConnectionError: pass
+    assert store.muat("log/ringkasan") is None
+    assert log.total_semua() == 0 and log.error_arsip
+    gagal["ya"] = False
+    log.kompaksi("2024-01-02")
+    assert store.muat("log/ringkasan") == {"2023-12-31": 5, "_arsip_selesai": True}
+    assert log.total_semua() == 5
+
+def test_kompaksi_berjalan_dari_worker_dan_gagal_dicatat(lokal, caplog):
+    # Tanpa ada yang membuka tab monitoring: worker antrian yang memicu kompaksi; error tidak ditelan diam-diam
+    store = doc_store(lokal, umur_valid=0)
+    gagal = {"ya": True}
+    def arsip():
+        if gagal["ya"]: raise ConnectionError("storage tidak tersedia")
+        return {}
+    log = log_aktivitas(lokal, store, arsip=arsip, jeda_gagal=0)
+    log.catat_banyak([("user0", datetime(2024, 1, 1, 8))] * 3)
+    selesai = threading.Event()
+    def berkala():
+        log.kompaksi_jika_perlu("2024-01-02")
+        if not gagal["ya"] and log.error_kompaksi is None: selesai.set()
+    with caplog.at_level("WARNING", logger="json_store"):
+        antrian = AntrianTulis(log.catat_banyak, interval=0.02, berkala=berkala)
+        deadline = time.time() + 5
+        while log.error_kompaksi is None and time.time() < deadline: time.sleep(0.01)
+    assert "ConnectionError" in log.error_kompaksi
+    assert any("Kompaksi log" in r.getMessage() for r in caplog.records)
+    gagal["ya"] = False
+    assert selesai.wait(5)
+    assert antrian.stats()["batch_gagal"] == 0
+    assert store.muat("log/ringkasan") == {"2024-01-01": 3, "_arsip_selesai": True}
+    assert log.baca("2024-01-01", "2024-01-01")["2024-01-01"] == {"user0": 3}
+
+# --- Data bulanan ---
+def test_data_bulanan_pecah_data_lama(lokal):
+    store = doc_store(lokal, umur_valid=0)
+    lama = [{"Bulan_Upload": f"2024-{b:02d}", "No": i} for b in (1, 2, 3) for i in range(100)] + [{"Input_Time": "2023-12-31 10:00:00"}]
+    lokal.simpan(json.dumps(lama).encode(), "lama.json")
+    hapus = lambda ids: lokal.hapus(ids)
+    data = DataBulanan(store, "rusak", hapus, lama="lama.json")
+    data.tambah({"Bulan_Upload": "2024-03", "No": 100})
+    data.hapus_bulan("2024-01")
+    assert DataBulanan(store, "rusak", hapus, lama="lama.json").index() == {"2023-12": 1, "2024-02": 100, "2024-03": 101}
+    assert len(data.baca()) == 202
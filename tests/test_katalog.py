@@ -0,0 +1,82 @@
+import threading
+from katalog import KatalogFile
+
+def sumber(ids, ukuran_halaman=2):
+    # Pengganti cloudinary.api.resources: berhalaman (next_cursor), filter prefix
+    panggil = []
+    def ambil_halaman(prefix="", next_cursor=None):
+        panggil.append(prefix)
+        cocok = [i for i in ids if i.startswith(prefix or "")]
+        mulai = int(next_cursor or 0)
+        res = {"resources": [{"public_id": i} for i in cocok[mulai:mulai + ukuran_halaman]]}
+        if mulai + ukuran_halaman < len(cocok): res["next_cursor"] = str(mulai + ukuran_halaman)
+        return res
+    return ambil_halaman, panggil
+
+IDS = ["AREA/DC/stok_dc.xlsx", "AREA/DC/sub/intransit_a.xlsx", "AREA/rekap.xlsx", "AREA/intransit_b.xlsx",
+       "AREAX/lain.xlsx", "root.xlsx", "AREA/DC/foto.jpg"]
+
+def katalog(ids=tuple(IDS), **kw):
+    ambil, panggil = sumber(ids)
+    k = KatalogFile(ambil, kategori={"AREA": {"intransit": ["intransit"]}}, **kw)
+    k.muat_ulang()
+    return k, panggil
+
+def nama(resources): return [r["public_id"] for r in resources]
+
+def test_ikut_next_cursor_dan_subfolder():
+    k, panggil = katalog()
+    assert len(k.semua()) == len(IDS) and len(panggil) == 4
+    assert nama(k.files_folder("AREA")) == ["AREA/rekap.xlsx", "AREA/intransit_b.xlsx", "AREA/DC/stok_dc.xlsx", "AREA/DC/sub/intransit_a.xlsx"]
+    assert nama(k.files_folder("AREA/DC", ext=None)) == ["AREA/DC/stok_dc.xlsx", "AREA/DC/foto.jpg", "AREA/DC/sub/intransit_a.xlsx"]
+    assert nama(k.files_folder("")) == ["root.xlsx"] and k.files_folder("TIDAK") == []
+    # Kategori subfolder ikut konfigurasi induk terdekat
+    assert nama(k.files_kategori("AREA", "intransit")) == ["AREA/intransit_b.xlsx", "AREA/DC/sub/intransit_a.xlsx"]
+
+def test_tambah_hapus_inkremental_tanpa_listing():
+    k, panggil = katalog()
+    n = len(panggil)
+    k.tambah({"public_id": "AREA/baru/intransit_c.xlsx"})
+    k.tambah({"public_id": "AREA/rekap.xlsx", "version": 2}) # Overwrite: pindah ke depan
+    k.hapus("AREA/intransit_b.xlsx")
+    assert nama(k.files_folder("AREA")) == ["AREA/rekap.xlsx", "AREA/DC/stok_dc.xlsx", "AREA/DC/sub/intransit_a.xlsx", "AREA/baru/intransit_c.xlsx"]
+    assert nama(k.files_kategori("AREA", "intransit")) == ["AREA/DC/sub/intransit_a.xlsx", "AREA/baru/intransit_c.xlsx"]
+    assert k.cari("AREA/rekap.xlsx")["version"] == 2 and len(panggil) == n
+
+def test_muat_ulang_per_prefix():
+    ids = list(IDS)
+    k, _ = katalog(ids)
+    ids.remove("AREA/DC/stok_dc.xlsx")
+    ids.append("AREA/DC/stok_baru.xlsx")
+    k.muat_ulang("AREA/DC/")
+    assert nama(k.files_folder("AREA/DC")) == ["AREA/DC/stok_baru.xlsx", "AREA/DC/sub/intransit_a.xlsx"]
+    assert nama(k.files_folder("AREAX")) == ["AREAX/lain.xlsx"]
+
+def test_refresh_gagal_tetap_pakai_index_lama():
+    ambil, _ = sumber(IDS)
+    gagal = {"ya": False}
+    def ambil_kadang_gagal(**kw):
+        if gagal["ya"]: raise ConnectionError("rate limited")
+        return ambil(**kw)
+    k = KatalogFile(ambil_kadang_gagal, ttl=0, jeda_gagal=60).pastikan_segar()
+    gagal["ya"] = True
+    assert len(k.pastikan_segar().semua()) == len(IDS) and "ConnectionError" in k.error_terakhir
+
+def test_refresh_satu_thread_saja():
+    masuk, lepas = threading.Event(), threading.Event()
+    ambil, panggil = sumber(IDS, ukuran_halaman=100)
+    def ambil_lambat(**kw):
+        masuk.set()
+        lepas.wait(5)
+        return ambil(**kw)
+    k = KatalogFile(ambil_lambat, ttl=0)
+    lepas.set()
+    k.muat_ulang()
+    lepas.clear(); masuk.clear()
+    t = threading.Thread(target=k.pastikan_segar)
+    t.start()
+    masuk.wait(5)
+    k.pastikan_segar() # Sesi lain: tidak menunggu, tidak ikut refresh
+    lepas.set()
+    t.join()
+    assert len(panggil) == 2
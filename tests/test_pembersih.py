@@ -0,0 +1,37 @@
+from conftest import PenyimpananBatasHapus
+from pembersih import bersihkan_prefix, hapus_massal
+
+PREFIX = "so_rawan_hilang/hasil/Hasil_"
+
+def isi_storage(storage, n):
+    ids = [f"{PREFIX}T{i:04d}_v{1 + i % 3}.xlsx" for i in range(n)] + ["so_rawan_hilang/master_utama.xlsx"]
+    for p in ids: storage.simpan(b"x", p)
+    return ids
+
+def test_dry_run_tidak_menghapus(tmp_path):
+    api = PenyimpananBatasHapus(tmp_path)
+    ids = isi_storage(api, 450)
+    target, laporan = bersihkan_prefix(api, PREFIX, lambda pid: "_v3" in pid, dry_run=True)
+    assert laporan is None and len(target) == 300
+    assert len(api.daftar_semua()) == len(ids) and api.panggilan_hapus == 0
+
+def test_batch_gagal_cukup_diulang(tmp_path):
+    api = PenyimpananBatasHapus(tmp_path, gagal_pada={3})
+    ids = isi_storage(api, 1234)
+    simpan = lambda pid: "_v3" in pid
+    target, lap = bersihkan_prefix(api, PREFIX, simpan, max_workers=4)
+    assert len(lap["batch"]) == -(-len(target) // 100) and api.maks_paralel <= 4
+    assert len(lap["gagal"]) == 100 and lap["dihapus"] == len(target) - 100
+    assert all(dt is not None for _, dt, err in lap["batch"] if err is None)
+    # Sisa target dicari ulang dari listing
+    _, lap2 = bersihkan_prefix(api, PREFIX, simpan, max_workers=4)
+    assert lap2["dihapus"] == 100 and not lap2["gagal"]
+    sisa = {r['public_id'] for r in api.daftar_semua()}
+    assert sisa == {p for p in ids if simpan(p) or not p.startswith(PREFIX)}
+
+def test_hapus_massal_progress_dan_not_found(tmp_path):
+    api = PenyimpananBatasHapus(tmp_path, latensi=0)
+    api.simpan(b"x", "a.json")
+    progres = []
+    lap = hapus_massal(api, ["a.json", "tidak/ada"], progress_cb=lambda s, t: progres.append((s, t)))
+    assert lap["dihapus"] == 1 and not lap["gagal"] and progres == [(1, 1)]
@@ -0,0 +1,30 @@
+import time
+from prefetch import Prefetcher, terbaru_per_folder
+
+def test_antri_lewati_gagal_dan_buang():
+    dikerjakan = []
+    def muat(kunci, detik):
+        time.sleep(detik)
+        if kunci == "rusak": raise ValueError("file rusak")
+        dikerjakan.append(kunci)
+
+    p = Prefetcher(maks_antri=3, jeda_gagal=0.2)
+    for k in ("a", "b", "a", "rusak"): p.minta(k, muat, k, 0.05) # "a" kedua dilewati
+    assert p.tunggu(5) and dikerjakan == ["a", "b"] and p.gagal == 1
+    assert not p.minta("a", muat, "a", 0) # Sudah selesai
+    assert not p.minta("rusak", muat, "rusak", 0) # Baru gagal, tunggu jeda
+    time.sleep(0.25)
+    assert p.minta("rusak", muat, "rusak", 0) # Boleh dicoba lagi
+    for k in "cdefg": p.minta(k, muat, k, 0.05) # Antrian penuh -> yang paling lama dibuang
+    assert p.tunggu(5) and p.stats()["dibuang"] > 0
+    p.lupakan("a")
+    assert p.minta("a", muat, "a", 0) and p.tunggu(5)
+    assert dikerjakan.count("a") == 2
+
+def test_terbaru_per_folder():
+    class Katalog:
+        isi = {"A": [{"public_id": "A/1", "created_at": "2024-01-01"}, {"public_id": "A/2", "created_at": "2024-03-01"}],
+               "B": [{"public_id": "B/1", "created_at": "2024-02-01"}], "C": []}
+        def files_folder(self, folder): return self.isi[folder]
+    hasil = [r["public_id"] for r in terbaru_per_folder(Katalog(), ["A", "B", "C"])]
+    assert hasil == ["A/1", "A/2", "B/1"]
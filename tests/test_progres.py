@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+from progres import KOLOM_RINGKASAN, ProgresToko, kode_dari_hasil
+
+def ringkasan_penuh(df_master, submitted_codes):
+    # Perhitungan lama: bangun ulang tabel toko + groupby setiap kali
+    df_stores = df_master[[df_master.columns[0], df_master.columns[1], "am", "AS"]].drop_duplicates()
+    df_stores.columns = ['Kode', 'Nama', 'AM', 'AS']
+    df_stores['Status'] = df_stores['Kode'].astype(str).apply(lambda x: 1 if x in submitted_codes else 0)
+    hasil = [df_stores]
+    for k in ('AM', 'AS'):
+        s = df_stores.groupby(k).agg(Target=('Kode', 'count'), Sudah=('Status', 'sum')).reset_index()
+        s['Belum'] = s['Target'] - s['Sudah']
+        s['Progres'] = (s['Sudah'] / s['Target']) * 100
+        s.columns = [k] + KOLOM_RINGKASAN
+        hasil.append(s.sort_values(by=['Progres', 'Target Toko SO'], ascending=[True, False]))
+    return hasil
+
+def master(n_toko=300, n_item=5):
+    rng = np.random.default_rng(0)
+    kode = [f"T{i:04d}" for i in range(n_toko)]
+    am = {k: f"AM{rng.integers(5)}" for k in kode}
+    as_ = {k: f"AS{rng.integers(20)}" for k in kode}
+    return kode, pd.DataFrame({
+        "Toko": [k for k in kode for _ in range(n_item)], "Nama": [f"Toko {k}" for k in kode for _ in range(n_item)],
+        "PRDCD": list(range(n_item)) * n_toko, "am": [am[k] for k in kode for _ in range(n_item)],
+        "AS": [as_[k] for k in kode for _ in range(n_item)],
+    })
+
+def test_inkremental_sama_dengan_hitung_penuh():
+    kode, df_master = master()
+    prog, terkirim = ProgresToko(df_master), set()
+    for batch in np.array_split(np.random.default_rng(1).permutation(kode), 5):
+        terkirim.update(batch.tolist())
+        prog.sinkron(terkirim)
+        for b, l in zip(prog.ringkasan(), ringkasan_penuh(df_master, terkirim)):
+            pd.testing.assert_frame_equal(b.reset_index(drop=True), l.reset_index(drop=True))
+
+def test_ringkasan_salinan():
+    kode, df_master = master(10, 2)
+    prog = ProgresToko(df_master)
+    toko, _, _ = prog.ringkasan()
+    toko["Status"] = 1
+    assert prog.ringkasan()[0]["Status"].sum() == 0
+
+def test_kode_dari_hasil():
+    assert kode_dari_hasil("so_rawan_hilang/hasil/Hasil_T001_v12.xlsx") == "T001"
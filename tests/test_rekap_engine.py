@@ -0,0 +1,46 @@
+import functools
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from rekap_engine import _data_sintetis, gabung_rekap, unduh_semua_hasil
+
+class Handler(SimpleHTTPRequestHandler):
+    def log_message(self, *args): pass
+
+@pytest.fixture
+def server_hasil(tmp_path):
+    # Server HTTP lokal sebagai pengganti Cloudinary, berisi workbook fixture + 1 file rusak
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(Handler, directory=str(tmp_path)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield tmp_path, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+def test_unduh_paralel_dan_gabung(server_hasil):
+    folder, base = server_hasil
+    m_df, list_hasil = _data_sintetis(20, 50)
+    daftar = []
+    for s_df in list_hasil:
+        nama = f"Hasil_{s_df.iloc[0, 0]}_v1.xlsx"
+        s_df.to_excel(folder / nama, index=False)
+        daftar.append(nama)
+    (folder / "Hasil_RUSAK_v1.xlsx").write_bytes(b"bukan excel")
+    daftar += ["Hasil_RUSAK_v1.xlsx", "Hasil_HILANG_v1.xlsx"]
+    progres = []
+
+    hasil, gagal = unduh_semua_hasil([(n, f"{base}/{n}") for n in daftar], max_workers=8,
+                                     progress_cb=lambda selesai, total, nama: progres.append(selesai))
+    # Semua toko berhasil, hanya file rusak & file hilang yang gagal
+    assert len(hasil) == 20
+    assert set(gagal) == {"Hasil_RUSAK_v1.xlsx", "Hasil_HILANG_v1.xlsx"}
+    assert gagal["Hasil_RUSAK_v1.xlsx"].startswith("File tidak terbaca")
+    assert gagal["Hasil_HILANG_v1.xlsx"].startswith("Download gagal")
+    assert sorted(progres) == list(range(1, len(daftar) + 1))
+    # Semua baris master terisi dari hasil toko
+    rekap = gabung_rekap(m_df, list(hasil.values()))
+    assert len(rekap) == len(m_df) and (rekap['Jml Fisik'] == 9).all()
+
+def test_gabung_toko_tanpa_hasil_tetap_kosong():
+    m_df, list_hasil = _data_sintetis(3, 4)
+    rekap = gabung_rekap(m_df, list_hasil[:2])
+    assert len(rekap) == 12
+    assert rekap['Jml Fisik'].notna().sum() == 8
@@ -0,0 +1,34 @@
+import io
+import pytest
+from storage import TidakDitemukan
+
+def test_simpan_ambil_versi(lokal):
+    res = lokal.simpan(b'{"a": 1}', "Config/users.json")
+    assert lokal.ambil("Config/users.json") == b'{"a": 1}'
+    assert lokal.versi("Config/users.json") == res['version']
+    assert lokal.versi("tidak/ada") is None
+    with pytest.raises(TidakDitemukan): lokal.meta("tidak/ada")
+
+def test_simpan_jika_versi_ditolak_jika_versi_berubah(storage):
+    storage.simpan(b"{}", "Config/users.json")
+    assert storage.simpan_jika_versi("Config/users.json", b"{}", "versi-lama")[0] is False
+    assert storage.simpan_jika_versi("baru.json", b"{}", None)[0] is True
+
+def test_listing_berhalaman(lokal):
+    for i in range(1203): lokal.simpan(b"x", f"so/hasil/Hasil_T{i:04d}_v1.xlsx")
+    assert len(lokal.daftar_semua("so/hasil/")) == 1203
+    assert len(lokal.daftar("so/")["resources"]) == 500
+
+def test_hapus_dan_hapus_prefix(lokal):
+    for i in range(300): lokal.simpan(b"x", f"so/hasil/Hasil_T{i:04d}_v1.xlsx")
+    assert lokal.hapus_prefix("so/hasil/Hasil_T00") == 100
+    assert len(lokal.daftar_semua("so/")) == 200
+    assert lokal.hapus(["so/hasil/Hasil_T0100_v1.xlsx", "tidak/ada"]) == {"so/hasil/Hasil_T0100_v1.xlsx": "deleted", "tidak/ada": "not_found"}
+
+def test_upload_file_like_ke_folder(lokal):
+    foto = lokal.simpan(io.BytesIO(b"jpg"), folder="ReportError", resource_type="image")
+    assert foto['public_id'].startswith("ReportError/")
+    assert lokal.unduh(foto['secure_url']) == b"jpg"
+
+def test_public_id_di_luar_root_ditolak(lokal):
+    with pytest.raises(ValueError): lokal.simpan(b"x", "../luar.json")
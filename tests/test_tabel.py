@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+from tabel import IndexCari, format_ribuan_indo, format_ribuan_kolom, urutan_baris
+
+def test_format_kolom_sama_dengan_per_sel():
+    s = pd.Series([0.0, -0.0, -0.004, 0.125, 2.675, 1.005, 1e20, -1e15 + 0.5, np.inf, -np.inf, np.nan,
+                   999.995, 12345678901.234, 1234567, -1234.5, 7])
+    assert format_ribuan_kolom(s).astype(str).tolist() == s.apply(format_ribuan_indo).astype(str).tolist()
+    assert format_ribuan_kolom(pd.Series([1234567, -1234.5])).tolist() == ["1.234.567", "-1.234,50"]
+
+def test_cari_kata_frasa_dan_kolom():
+    df = pd.DataFrame({"Toko": ["T001", "T002", "T003"], "Nama": ["Indomaret Jaya", "Toko Jaya Abadi", "Maju"], 2024: [1, 2, 3]})
+    idx = IndexCari(df)
+    assert idx.cari("jaya").tolist() == [True, True, False]
+    assert idx.cari('"jaya abadi"').tolist() == [False, True, False]
+    assert idx.cari("nama:maju").tolist() == [False, False, True]
+    assert idx.cari("toko:t00 jaya").tolist() == [True, True, False]
+    # Kata di kolom berbeda tidak "nyambung"
+    assert not idx.cari('"t001indomaret"').any()
+
+def test_urutan_nan_di_bawah_dan_kolom_campuran():
+    df = pd.DataFrame({"a": [3, np.nan, 1, 2], "b": [1, "x", 2, None]})
+    assert urutan_baris(df, "a").tolist() == [2, 3, 0, 1]
+    assert urutan_baris(df, "a", turun=True).tolist() == [0, 3, 2, 1]
+    assert urutan_baris(df, "b")[-1] == 3